@@ -0,0 +1,320 @@
+# benchmarks/run.py
+"""
+Synthetic-load benchmarks for the bot's hot code paths.
+
+Builds a synthetic guild in a temporary SQLite file, boots the real bot and cogs against
+stand-in Discord objects (no network), and times:
+    on_message, leaderboard (cold and cached), run_cycle, tenure_check and event_close.
+
+Usage (from the repository root):
+    python -m benchmarks.run                      # quick run (--preset small)
+    python -m benchmarks.run --preset full        # 50k members, 10M activity rows, 200 channels, 50 awards
+    python -m benchmarks.run --compare benchmarks/results/<earlier run>.json
+
+Results are printed and written as JSON (benchmarks/results/ by default) so runs can be compared.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import discord  # noqa: E402
+
+from benchmarks import synthetic  # noqa: E402
+from benchmarks.stand_ins import StandInContext, StandInMessage  # noqa: E402
+
+
+# --- Measurement helpers ---
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: list, wall_seconds: float, operations: int = None) -> dict:
+    """Latency distribution (ms) and throughput (operations per second) for one benchmark."""
+    values = sorted(latencies)
+    operations = len(values) if operations is None else operations
+    return {
+        "count": len(values),
+        "operations": operations,
+        "wall_s": wall_seconds,
+        "throughput_per_s": operations / wall_seconds if wall_seconds else 0.0,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "mean_ms": (sum(values) / len(values) * 1000) if values else 0.0,
+        "max_ms": (values[-1] * 1000) if values else 0.0,
+    }
+
+
+async def timed(coro_factory, repeats: int, setup=None) -> dict:
+    """Awaits `coro_factory()` `repeats` times. `setup()` runs before each call and is not timed."""
+    latencies = []
+    wall = 0.0
+    for _ in range(repeats):
+        if setup:
+            await setup()
+        start = time.perf_counter()
+        await coro_factory()
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        wall += elapsed
+    return summarize(latencies, wall)
+
+
+# --- Bot lifecycle ---
+
+async def wait_for_database_setup():
+    """ConfigCog sets up the schema in a background task; wait for it to finish."""
+    for task in asyncio.all_tasks():
+        if task.get_coro().__qualname__ == "ConfigCog.setup_database":
+            await task
+
+
+def attach_guild(bot, guild, ready: asyncio.Event):
+    """Points the bot's guild/channel/user lookups at the stand-in guild. Background loops start once `ready` is set."""
+    async def wait_until_ready():
+        await ready.wait()
+    bot.wait_until_ready = wait_until_ready
+    bot._connection._guilds[guild.id] = guild
+    bot.get_channel = guild.get_channel
+    bot.get_user = guild.get_member
+
+
+# --- Benchmarks ---
+
+async def bench_on_message(bot, guild, count: int, rng: random.Random) -> dict:
+    cog = bot.get_cog("ActivityCog")
+    members = list(guild._members.values())
+    channels = [channel for channel in guild._channels.values() if channel.category_id]
+    messages = []
+    for index in range(count):
+        channel = channels[synthetic.skewed_index(rng, len(channels))]
+        author = members[synthetic.skewed_index(rng, len(members))]
+        messages.append(StandInMessage(index + 1, channel, author=author, content="synthetic message"))
+
+    latencies = []
+    start = time.perf_counter()
+    for message in messages:
+        call_start = time.perf_counter()
+        await cog.on_message(message)
+        latencies.append(time.perf_counter() - call_start)
+    # Whatever is still buffered is part of the cost of ingesting these messages.
+    await bot.activity_buffer.flush()
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def bench_leaderboard(bot, ctx, repeats: int) -> dict:
+    cog = bot.get_cog("UtilityCog")
+    command = bot.get_command("leaderboard")
+    results = {}
+    for stat in ("activity", "participation"):
+        async def invalidate(stat=stat):
+            bot.leaderboards.invalidate(ctx.guild.id, stat)
+        results[f"leaderboard.{stat}.cold"] = await timed(lambda: command.callback(cog, ctx, stat), repeats, setup=invalidate)
+        results[f"leaderboard.{stat}.cached"] = await timed(lambda: command.callback(cog, ctx, stat), repeats * 20)
+    return results
+
+
+async def bench_run_cycle(bot, ctx, repeats: int) -> dict:
+    cog = bot.get_cog("ActivityCog")
+    command = bot.get_command("award-cycle run")
+    # The first cycle hands out every role; later ones only apply changes.
+    first = await timed(lambda: command.callback(cog, ctx, "gamma"), 1)
+    steady = await timed(lambda: command.callback(cog, ctx, "gamma"), repeats)
+    return {"run_cycle.first": first, "run_cycle.steady": steady}
+
+
+async def bench_tenure_check(bot, guild, repeats: int) -> dict:
+    cog = bot.get_cog("MembershipCog")
+
+    async def make_everyone_due():
+        async with bot.db.transaction() as cursor:
+            await cursor.execute("UPDATE members SET next_tenure_due = 0")
+        bot.member_stats.guild(guild.id).reset_tenure_due()
+
+    full = await timed(lambda: cog.tenure_check.coro(cog), repeats, setup=make_everyone_due)
+    due_only = await timed(lambda: cog.tenure_check.coro(cog), repeats)
+    return {"tenure_check.all_due": full, "tenure_check.steady": due_only}
+
+
+async def bench_event_close(bot, guild, ctx, participants: int, repeats: int, rng: random.Random) -> dict:
+    cog = bot.get_cog("EventsCog")
+    command = bot.get_command("event-close")
+    channel = guild.get_channel(synthetic.EVENT_CHANNEL_ID)
+    member_ids = list(guild._members)
+    next_message_id = [2 * 10**15]
+
+    async def open_event():
+        message_id = next_message_id[0] = next_message_id[0] + 1
+        embed = discord.Embed(title="Synthetic Event", description="Benchmark event")
+        channel.messages[message_id] = StandInMessage(message_id, channel, embeds=[embed])
+        async with bot.db.transaction() as cursor:
+            await cursor.execute(
+                "INSERT INTO active_events (message_id, guild_id, host_id, title, channel_id) VALUES (?, ?, ?, ?, ?)",
+                (message_id, guild.id, ctx.author.id, "Synthetic Event", channel.id)
+            )
+            await cursor.executemany(
+                "INSERT OR IGNORE INTO event_participants (message_id, user_id) VALUES (?, ?)",
+                [(message_id, user_id) for user_id in rng.sample(member_ids, min(participants, len(member_ids)))]
+            )
+        cog.active_event_ids.add(message_id)
+        cog.reconciled_event_ids.add(message_id)
+        ctx.channel = channel
+        ctx.message.reference = SimpleNamespace(message_id=message_id)
+
+    return {"event_close": await timed(lambda: command.callback(cog, ctx), repeats, setup=open_event)}
+
+
+# --- Reporting ---
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: dict, baseline: dict = None):
+    header = f"{'benchmark':<32}{'count':>8}{'ops/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    if baseline:
+        header += f"{'Δp50':>9}{'Δp99':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        line = (
+            f"{name:<32}{result['count']:>8}{result['throughput_per_s']:>12.1f}"
+            f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['max_ms']:>10.2f}"
+        )
+        previous = (baseline or {}).get(name)
+        if previous:
+            for key in ("p50_ms", "p99_ms"):
+                change = (result[key] - previous[key]) / previous[key] * 100 if previous[key] else 0.0
+                line += f"{change:>+8.0f}%"
+        print(line)
+
+
+async def run(args) -> dict:
+    scale = dict(synthetic.PRESETS[args.preset])
+    for key in scale:
+        if getattr(args, key, None) is not None:
+            scale[key] = getattr(args, key)
+    rng = random.Random(args.seed)
+
+    # Stand-ins have no rate limits; the role change window and pacing would only add fixed waits.
+    os.environ["ROLE_CHANGE_WINDOW_SECONDS"] = str(args.role_change_window)
+    os.environ["ROLE_CHANGES_PER_SECOND"] = str(args.role_changes_per_second)
+
+    workdir = tempfile.mkdtemp(prefix="alliance-bench-")
+    os.chdir(workdir)
+    import bot as bot_module
+    bot = bot_module.bot
+    guild = synthetic.build_guild(scale, args.seed, args.api_latency_ms / 1000)
+    admin = next(iter(guild._members.values()))
+    ctx = StandInContext(bot, guild, admin, guild.get_channel(synthetic.LOG_CHANNEL_ID))
+
+    setup_timings = {}
+    results = {}
+    async with bot:
+        ready = asyncio.Event()
+        attach_guild(bot, guild, ready)
+        start = time.perf_counter()
+        await bot.setup_hook()
+        await wait_for_database_setup()
+        ready.set()
+        setup_timings["boot"] = time.perf_counter() - start
+
+        now_ts = int(time.time())
+        for month in synthetic.activity_months(now_ts):
+            await bot.activity_partitions.ensure(month)
+        print(f"Generating synthetic data in {workdir} ({scale})...")
+        setup_timings.update(await asyncio.to_thread(
+            synthetic.populate_database, os.path.join(workdir, "database.db"), guild, scale, args.seed, now_ts
+        ))
+        await bot.settings.load()
+        await bot.member_stats.load()
+        print("Data ready: " + ", ".join(f"{step} {seconds:.1f}s" for step, seconds in setup_timings.items()))
+
+        results["on_message"] = await bench_on_message(bot, guild, scale["messages"], rng)
+        results.update(await bench_leaderboard(bot, ctx, scale["repeats"]))
+        results.update(await bench_run_cycle(bot, ctx, scale["repeats"]))
+        results.update(await bench_tenure_check(bot, guild, scale["repeats"]))
+        results.update(await bench_event_close(bot, guild, ctx, scale["participants"], scale["repeats"], rng))
+
+    os.chdir(REPO_ROOT)
+    if args.keep_data:
+        print(f"Synthetic database kept in {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "preset": args.preset,
+            "scale": scale,
+            "seed": args.seed,
+            "api_latency_ms": args.api_latency_ms,
+            "role_change_window": args.role_change_window,
+            "role_changes_per_second": args.role_changes_per_second,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "discord.py": discord.__version__,
+            "setup_s": setup_timings,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic-load benchmarks for the alliance bot.")
+    parser.add_argument("--preset", choices=sorted(synthetic.PRESETS), default="small")
+    for key in synthetic.PRESETS["small"]:
+        parser.add_argument(f"--{key.replace('_', '-')}", dest=key, type=int, help=f"Override the preset's {key}.")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="Simulated latency of each Discord REST call.")
+    parser.add_argument("--role-change-window", type=float, default=0.0,
+                        help="ROLE_CHANGE_WINDOW_SECONDS for the run (default 0: only same-tick changes are merged).")
+    parser.add_argument("--role-changes-per-second", type=float, default=0.0,
+                        help="ROLE_CHANGES_PER_SECOND for the run (default 0: unpaced).")
+    parser.add_argument("--output", help="Where to write the JSON results (default: benchmarks/results/<time>.json).")
+    parser.add_argument("--keep-data", action="store_true", help="Keep the temporary database for inspection.")
+    parser.add_argument("--compare", help="A previous JSON result to show p50/p99 changes against.")
+    args = parser.parse_args()
+
+    output = Path(args.output).resolve() if args.output else (
+        REPO_ROOT / "benchmarks" / "results" / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{args.preset}.json"
+    )
+    baseline = json.loads(Path(args.compare).read_text())["results"] if args.compare else None
+
+    report = asyncio.run(run(args))
+
+    print()
+    print_results(report["results"], baseline)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
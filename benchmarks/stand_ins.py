@@ -0,0 +1,175 @@
+# benchmarks/stand_ins.py
+# Lightweight stand-ins for the discord.py objects the cogs touch.
+# They implement just enough of the real interfaces for the benchmarked code paths,
+# and can add a simulated REST latency to role edits and sends.
+import asyncio
+from datetime import datetime
+
+
+class StandInRole:
+    def __init__(self, role_id: int, name: str):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+        # Kept in step by StandInMember so role.members doesn't scan the whole guild.
+        self._members = {}
+
+    @property
+    def members(self) -> list:
+        return list(self._members.values())
+
+    def is_default(self) -> bool:
+        return False
+
+    def __eq__(self, other):
+        return isinstance(other, StandInRole) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class StandInMember:
+    def __init__(self, user_id: int, guild, joined_at: datetime, api_latency: float = 0.0):
+        self.id = user_id
+        self.guild = guild
+        self.bot = False
+        self.mention = f"<@{user_id}>"
+        self.display_name = f"member{user_id}"
+        self.joined_at = joined_at
+        self.roles = []
+        self.api_latency = api_latency
+        self.guild_permissions = _Permissions(administrator=True)
+        self.color = 0
+        self.avatar = None
+        self.display_avatar = None
+
+    async def _rest_call(self):
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+
+    async def add_roles(self, *roles, reason=None, atomic=True):
+        await self._rest_call()
+        for role in roles:
+            if role not in self.roles:
+                self.roles.append(role)
+                role._members[self.id] = self
+
+    async def remove_roles(self, *roles, reason=None, atomic=True):
+        await self._rest_call()
+        for role in roles:
+            if role in self.roles:
+                self.roles.remove(role)
+                role._members.pop(self.id, None)
+
+    async def edit(self, *, roles=None, reason=None, **fields):
+        await self._rest_call()
+        if roles is not None:
+            for role in self.roles:
+                role._members.pop(self.id, None)
+            self.roles = list(roles)
+            for role in self.roles:
+                role._members[self.id] = self
+
+    def __str__(self):
+        return self.display_name
+
+
+class _Permissions:
+    def __init__(self, administrator: bool = False):
+        self.administrator = administrator
+        self.value = 8 if administrator else 0
+
+
+class StandInChannel:
+    def __init__(self, channel_id: int, guild, category_id=None, api_latency: float = 0.0):
+        self.id = channel_id
+        self.guild = guild
+        self.category_id = category_id
+        self.mention = f"<#{channel_id}>"
+        self.name = f"channel-{channel_id}"
+        self.api_latency = api_latency
+        self.messages = {}
+        self.sent_count = 0
+
+    async def send(self, content=None, *, embed=None, view=None, **kwargs):
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        self.sent_count += 1
+        message = StandInMessage(10**15 + self.sent_count, self, content=content or "", embeds=[embed] if embed else [])
+        return message
+
+    async def fetch_message(self, message_id: int):
+        return self.messages[message_id]
+
+
+class StandInMessage:
+    def __init__(self, message_id: int, channel, author=None, content: str = "", embeds=None):
+        self.id = message_id
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.embeds = embeds or []
+        self.reactions = []
+        self.reference = None
+
+    async def edit(self, **kwargs):
+        if "embed" in kwargs:
+            self.embeds = [kwargs["embed"]]
+
+    async def add_reaction(self, emoji):
+        pass
+
+    async def clear_reactions(self):
+        pass
+
+
+class StandInGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+        self.shard_id = 0
+        self._members = {}
+        self._roles = {}
+        self._channels = {}
+
+    def get_member(self, user_id: int):
+        return self._members.get(user_id)
+
+    def get_role(self, role_id: int):
+        return self._roles.get(role_id)
+
+    def get_channel(self, channel_id: int):
+        return self._channels.get(channel_id)
+
+    @property
+    def members(self) -> list:
+        return list(self._members.values())
+
+    @property
+    def member_count(self) -> int:
+        return len(self._members)
+
+    @property
+    def roles(self) -> list:
+        return list(self._roles.values())
+
+    def add_role(self, role_id: int, name: str) -> StandInRole:
+        role = self._roles[role_id] = StandInRole(role_id, name)
+        return role
+
+
+class StandInContext:
+    """Enough of commands.Context for calling command callbacks directly."""
+    def __init__(self, bot, guild, author, channel, prefix: str = "!"):
+        self.bot = bot
+        self.guild = guild
+        self.author = author
+        self.channel = channel
+        self.prefix = prefix
+        self.message = StandInMessage(0, channel, author=author)
+        self.sent = 0
+
+    async def send(self, content=None, *, embed=None, view=None, **kwargs):
+        self.sent += 1
+        return await self.channel.send(content, embed=embed, view=view)
@@ -0,0 +1,189 @@
+# benchmarks/synthetic.py
+# Generates a synthetic guild: stand-in Discord objects plus matching rows in the bot's database.
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.stand_ins import StandInChannel, StandInGuild, StandInMember
+from utils.activity_partitions import month_of, table_for
+
+# Scales selectable with --preset; every value can also be overridden on the command line.
+PRESETS = {
+    "small": {
+        "members": 5_000, "activity_rows": 200_000, "channels": 50, "categories": 10, "awards": 20,
+        "messages": 5_000, "participants": 200, "repeats": 5,
+    },
+    "full": {
+        "members": 50_000, "activity_rows": 10_000_000, "channels": 200, "categories": 20, "awards": 50,
+        "messages": 50_000, "participants": 1_000, "repeats": 5,
+    },
+}
+
+GUILD_ID = 1
+FIRST_MEMBER_ID = 10_000
+FIRST_CHANNEL_ID = 100_000
+FIRST_CATEGORY_ID = 900_000
+FIRST_AWARD_ROLE_ID = 500_000
+LOG_CHANNEL_ID = 1_000
+EVENT_CHANNEL_ID = 1_001
+TENURE_MILESTONES = (30, 90, 180, 365, 730)
+PARTICIPATION_MILESTONES = (5, 10, 25, 50)
+TENURE_ROLE_IDS = {days: 600_000 + days for days in TENURE_MILESTONES}
+PARTICIPATION_ROLE_IDS = {count: 700_000 + count for count in PARTICIPATION_MILESTONES}
+# Raw activity spans this many days back, so several monthly partitions exist.
+ACTIVITY_DAYS = 120
+# Share of database members that are still in the server.
+PRESENT_RATIO = 0.98
+INSERT_CHUNK = 100_000
+
+
+def skewed_index(rng: random.Random, size: int) -> int:
+    """Picks an index in [0, size) with a heavy head, like real message activity."""
+    return int(size * rng.random() ** 3)
+
+
+def build_guild(scale: dict, seed: int, api_latency: float = 0.0) -> StandInGuild:
+    """Creates the stand-in guild: members, channels in categories, and award/tenure/participation roles."""
+    rng = random.Random(seed)
+    guild = StandInGuild(GUILD_ID)
+    now = datetime.now(timezone.utc)
+
+    for index in range(scale["members"]):
+        if rng.random() > PRESENT_RATIO:
+            continue
+        user_id = FIRST_MEMBER_ID + index
+        joined_at = now - timedelta(days=rng.uniform(0, 3 * 365))
+        guild._members[user_id] = StandInMember(user_id, guild, joined_at, api_latency)
+
+    for index in range(scale["channels"]):
+        channel_id = FIRST_CHANNEL_ID + index
+        category_id = FIRST_CATEGORY_ID + index % scale["categories"]
+        guild._channels[channel_id] = StandInChannel(channel_id, guild, category_id, api_latency)
+    for channel_id in (LOG_CHANNEL_ID, EVENT_CHANNEL_ID):
+        guild._channels[channel_id] = StandInChannel(channel_id, guild)
+
+    for index in range(scale["awards"]):
+        guild.add_role(FIRST_AWARD_ROLE_ID + index, f"award-{index}")
+    for days, role_id in TENURE_ROLE_IDS.items():
+        guild.add_role(role_id, f"tenure-{days}")
+    for count, role_id in PARTICIPATION_ROLE_IDS.items():
+        guild.add_role(role_id, f"participation-{count}")
+    return guild
+
+
+def activity_months(now_ts: int) -> list:
+    """YYYYMM partitions the synthetic activity window touches, oldest first."""
+    start_ts = now_ts - ACTIVITY_DAYS * 86400
+    months = []
+    ts = start_ts
+    while ts <= now_ts:
+        month = month_of(ts)
+        if month not in months:
+            months.append(month)
+        ts += 86400
+    if month_of(now_ts) not in months:
+        months.append(month_of(now_ts))
+    return months
+
+
+def populate_database(path: str, guild: StandInGuild, scale: dict, seed: int, now_ts: int) -> dict:
+    """
+    Writes members, raw activity (into existing monthly partitions), daily rollups, award,
+    tenure and participation configuration. The schema and partitions must already exist.
+    Returns how long each step took, in seconds.
+    """
+    rng = random.Random(seed + 1)
+    timings = {}
+    connection = sqlite3.connect(path)
+    try:
+        start = time.perf_counter()
+        members = []
+        for index in range(scale["members"]):
+            user_id = FIRST_MEMBER_ID + index
+            member = guild.get_member(user_id)
+            joined_at = member.joined_at if member else datetime.now(timezone.utc) - timedelta(days=rng.uniform(0, 3 * 365))
+            participation = int(60 * rng.random() ** 4)
+            hosting = int(12 * rng.random() ** 6)
+            members.append((guild.id, user_id, joined_at.isoformat(), participation, hosting))
+        connection.executemany(
+            "INSERT OR REPLACE INTO members (guild_id, user_id, join_date, participation_count, host_count, next_tenure_due) VALUES (?, ?, ?, ?, ?, 0)",
+            members
+        )
+        connection.commit()
+        timings["members"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        channels = [channel for channel in guild._channels.values() if channel.category_id]
+        window_start = now_ts - ACTIVITY_DAYS * 86400
+        total = scale["activity_rows"]
+        chunks = max(1, total // INSERT_CHUNK)
+        slice_seconds = (now_ts - window_start) / chunks
+        for chunk in range(chunks):
+            size = total // chunks + (1 if chunk < total % chunks else 0)
+            chunk_start = window_start + chunk * slice_seconds
+            timestamps = sorted(int(chunk_start + rng.random() * slice_seconds) for _ in range(size))
+            by_month = {}
+            for ts in timestamps:
+                channel = channels[skewed_index(rng, len(channels))]
+                by_month.setdefault(month_of(ts), []).append((
+                    guild.id,
+                    FIRST_MEMBER_ID + skewed_index(rng, scale["members"]),
+                    channel.id,
+                    channel.category_id,
+                    datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+                    ts,
+                ))
+            for month, rows in by_month.items():
+                connection.executemany(
+                    f"INSERT INTO {table_for(month)} (guild_id, user_id, channel_id, category_id, timestamp, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+            connection.commit()
+        timings["activity_rows"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for month in activity_months(now_ts):
+            connection.execute(f"""
+                INSERT INTO activity_daily (guild_id, day, user_id, channel_id, category_id, message_count)
+                SELECT guild_id, ts / 86400, user_id, channel_id, COALESCE(category_id, 0), COUNT(*)
+                FROM {table_for(month)} WHERE 1
+                GROUP BY 1, 2, 3, 4, 5
+                ON CONFLICT (guild_id, day, user_id, channel_id, category_id)
+                DO UPDATE SET message_count = message_count + excluded.message_count
+            """)
+        connection.commit()
+        timings["rollups"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        award_rows = []
+        category_ids = sorted({channel.category_id for channel in channels})
+        for index in range(scale["awards"]):
+            kind = ("server", "channel", "channel", "category")[index % 4]
+            if kind == "channel":
+                target_id = channels[index % len(channels)].id
+            elif kind == "category":
+                target_id = category_ids[index % len(category_ids)]
+            else:
+                target_id = None
+            award_rows.append((guild.id, f"award-{index}", kind, "monthly", FIRST_AWARD_ROLE_ID + index, target_id, 1 + index % 3))
+        connection.executemany(
+            "INSERT OR REPLACE INTO award_configs (guild_id, award_name, award_type, frequency, role_id, target_id, winner_count) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            award_rows
+        )
+        connection.executemany(
+            "INSERT OR REPLACE INTO tenure_roles (guild_id, days, role_id) VALUES (?, ?, ?)",
+            [(guild.id, days, role_id) for days, role_id in TENURE_ROLE_IDS.items()]
+        )
+        connection.executemany(
+            "INSERT OR REPLACE INTO participation_roles (guild_id, count, role_id) VALUES (?, ?, ?)",
+            [(guild.id, count, role_id) for count, role_id in PARTICIPATION_ROLE_IDS.items()]
+        )
+        connection.execute("INSERT OR REPLACE INTO settings (guild_id, key, value) VALUES (?, 'log_channel_id', ?)", (guild.id, str(LOG_CHANNEL_ID)))
+        connection.commit()
+        timings["configuration"] = time.perf_counter() - start
+
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        connection.close()
+    return timings
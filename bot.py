@@ -5,9 +5,21 @@ import discord
 from discord.ext import commands
 import os
 import asyncio
+import time
 import traceback
 from dotenv import load_dotenv
-import aiosqlite
+from utils.database import Database
+from utils.activity_buffer import ActivityBuffer
+from utils.activity_partitions import ActivityPartitions
+from utils.settings import SettingsStore
+from utils.member_stats import MemberStatsIndex
+from utils.log_dispatcher import LogDispatcher
+from utils.leaderboards import LeaderboardCache
+from utils.metrics import Metrics
+from utils.slow_queries import SlowQueryLog
+from utils.leases import JobLeases
+from utils.shards import ShardMonitor, parse_shard_ids, describe_shard_group
+from utils.roles import RoleChangeCoalescer
 
 # --- Define Intents (Copied from working example) ---
 intents = discord.Intents.default()
@@ -15,12 +27,61 @@ intents.message_content = True
 intents.members = True # Enabled, as required by the P&W bot features.
 intents.presences = False # Disabled for efficiency.
 
+# --- Bot Class ---
+# AutoShardedBot runs every shard in this process, or only SHARD_IDS when the shards are split across processes.
+class AllianceBot(commands.AutoShardedBot):
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        # Every listener (bot events and cog listeners) is dispatched through here, so time it for !stats.
+        start = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            self.metrics.observe('listener', coro.__qualname__, time.perf_counter() - start)
+
+    async def close(self):
+        # Unload the cogs first so their final log messages are queued while we can still send them.
+        for extension in tuple(self.extensions):
+            try:
+                await self.unload_extension(extension)
+            except Exception:
+                traceback.print_exc()
+        if hasattr(self, 'role_changes'):
+            await self.role_changes.close()
+        if hasattr(self, 'log_dispatcher'):
+            await self.log_dispatcher.close()
+        if hasattr(self, 'slow_queries'):
+            await self.slow_queries.close()
+        if hasattr(self, 'shard_monitor'):
+            await self.shard_monitor.close()
+        if hasattr(self, 'db'):
+            await self.db.close()
+        await self.metrics.stop_server()
+        await super().close()
+
 # --- Bot Instance (Template from working example) ---
 # We use a static prefix as required by the P&W bot.
-bot = commands.Bot(command_prefix='!',
-                   intents=intents,
-                   help_command=None,
-                   case_insensitive=True)
+# Latency histograms (see utils/metrics.py) exist before the bot so its HTTP session can be traced.
+metrics = Metrics()
+bot = AllianceBot(command_prefix='!',
+                  intents=intents,
+                  help_command=None,
+                  case_insensitive=True,
+                  http_trace=metrics.http_trace())
+bot.metrics = metrics
+
+
+# --- Command Timing ---
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.metrics_start = time.perf_counter()
+
+
+@bot.after_invoke
+async def record_command_latency(ctx):
+    # after_invoke also runs when the command raised, so failed commands are timed too.
+    start = getattr(ctx, 'metrics_start', None)
+    if start is not None:
+        bot.metrics.observe('command', ctx.command.qualified_name, time.perf_counter() - start)
 
 # --- Bot Setup Hook (Template from working example) ---
 @bot.event
@@ -29,8 +90,9 @@ async def setup_hook():
 
     # Connect to the database and attach it to the bot instance.
     # This is the P&W bot's equivalent of loading the pokemon_list.
+    # bot.db is the writer; leaderboard, profile and award queries use its read-only pool (see utils/database.py).
     try:
-        bot.db = await aiosqlite.connect("database.db")
+        bot.db = await Database("database.db", readers=int(os.getenv('DB_READ_CONNECTIONS', '3'))).connect()
         print("✅ Database connected successfully.")
     except Exception as e:
         print(f"❌ FATAL: Could not connect to database: {e}")
@@ -40,6 +102,84 @@ async def setup_hook():
         await bot.close()
         return
 
+    # This process's shards, and its name for job leases (see utils/leases.py) so that processes
+    # running other shard groups against the same database never run the same job twice.
+    bot.shard_group = describe_shard_group(bot.shard_ids, bot.shard_count)
+
+    # Commands that act on storage shared by every server are limited to the bot's owners:
+    # OWNER_IDS if set, otherwise the owner (or team) of the Discord application.
+    owner_ids = os.getenv('OWNER_IDS')
+    if owner_ids:
+        bot.owner_ids = {int(user_id) for user_id in owner_ids.replace(" ", "").split(",") if user_id}
+    bot.leases = JobLeases(bot.db, label=bot.shard_group)
+
+    # Settings are cached in memory; ConfigCog loads them once the tables exist.
+    bot.settings = SettingsStore(bot.db)
+
+    # The members table (join dates, event counts, tenure schedule) as compact in-memory columns;
+    # ConfigCog loads it, and the cogs that write the table keep it up to date.
+    bot.member_stats = MemberStatsIndex(bot.db)
+
+    # Every cog's log_action goes through this queue instead of sending inline.
+    bot.log_dispatcher = LogDispatcher(bot)
+    bot.log_dispatcher.start()
+
+    # Raw activity lives in monthly partitions; ConfigCog loads them (and migrates old databases).
+    bot.activity_partitions = ActivityPartitions(bot.db)
+
+    # Activity inserts are batched in memory and written by the ActivityCog flush loop.
+    # Each process has its own buffer, so every shard group ingests its own servers' messages.
+    bot.activity_buffer = ActivityBuffer(
+        bot.db,
+        bot.activity_partitions,
+        max_rows=int(os.getenv('ACTIVITY_FLUSH_ROWS', '200')),
+        flush_interval=float(os.getenv('ACTIVITY_FLUSH_SECONDS', '5'))
+    )
+
+    # Every role change (tenure, milestones, award cycles, !accept) goes through here, so changes
+    # for the same member are merged into one REST call under a bot-wide rate budget.
+    bot.role_changes = RoleChangeCoalescer(
+        window=float(os.getenv('ROLE_CHANGE_WINDOW_SECONDS', '0.5')),
+        per_second=float(os.getenv('ROLE_CHANGES_PER_SECOND', '5'))
+    )
+
+    # Ranked leaderboard snapshots shared by !leaderboard (and its page buttons).
+    bot.leaderboards = LeaderboardCache(bot, ttl=float(os.getenv('LEADERBOARD_TTL_SECONDS', '60')))
+
+    # SQL latency by statement shape, plus the services' own counters for the Prometheus endpoint.
+    bot.db.add_hook(bot.metrics.observe_sql)
+    bot.metrics.add_collector('database', bot.db.stats)
+    bot.metrics.add_collector('settings', bot.settings.stats)
+    bot.metrics.add_collector('member_stats', bot.member_stats.stats)
+    bot.metrics.add_collector('log_dispatcher', bot.log_dispatcher.stats)
+    bot.metrics.add_collector('activity_buffer', bot.activity_buffer.stats)
+    bot.metrics.add_collector('leaderboards', bot.leaderboards.stats)
+    bot.metrics.add_collector('leases', bot.leases.stats)
+    bot.metrics.add_collector('role_changes', bot.role_changes.stats)
+
+    # Per-shard heartbeat latency and gateway event rate for !stats shards.
+    bot.shard_monitor = ShardMonitor(bot)
+    bot.shard_monitor.start()
+    bot.metrics.add_collector('shards', bot.shard_monitor.stats)
+
+    # Statements slower than SLOW_QUERY_MS are kept with their query plans for !slow-queries.
+    bot.slow_queries = SlowQueryLog(
+        bot.db,
+        threshold_ms=float(os.getenv('SLOW_QUERY_MS', '100')),
+        capacity=int(os.getenv('SLOW_QUERY_LOG_SIZE', '50'))
+    )
+    bot.slow_queries.start()
+    bot.metrics.add_collector('slow_queries', bot.slow_queries.stats)
+
+    metrics_port = os.getenv('METRICS_PORT')
+    if metrics_port:
+        try:
+            metrics_host = os.getenv('METRICS_HOST', '127.0.0.1')
+            await bot.metrics.start_server(metrics_host, int(metrics_port))
+            print(f"✅ Metrics served on http://{metrics_host}:{metrics_port}/metrics")
+        except Exception as e:
+            print(f"⚠️ Warning: Could not start the metrics endpoint: {e}")
+
     # Load Cogs from a hardcoded list (Template from working example)
     print("--- Loading Cogs ---")
     cogs_to_load = [
@@ -49,6 +189,8 @@ async def setup_hook():
         'cogs.activity_cog',
         'cogs.utility_cog',
         'cogs.listeners_cog',
+        'cogs.maintenance_cog',
+        'cogs.stats_cog',
         'cogs.help_cog'
     ]
 
@@ -96,6 +238,21 @@ def run_bot():
         print("-" * 50)
         return
 
+    # Sharding: SHARD_COUNT alone runs every shard here; add SHARD_IDS to run one shard group per process.
+    shard_count = os.getenv('SHARD_COUNT')
+    shard_ids = os.getenv('SHARD_IDS')
+    if shard_ids and not shard_count:
+        print("❌ ERROR: SHARD_IDS requires SHARD_COUNT (the total number of shards across all processes).")
+        return
+    if shard_count:
+        bot.shard_count = int(shard_count)
+    if shard_ids:
+        bot.shard_ids = parse_shard_ids(shard_ids)
+        if any(shard_id >= bot.shard_count for shard_id in bot.shard_ids):
+            print(f"❌ ERROR: SHARD_IDS must be between 0 and {bot.shard_count - 1}.")
+            return
+    print(f"Running {describe_shard_group(bot.shard_ids, bot.shard_count)}.")
+
     print("Attempting to connect to Discord...")
     try:
         # Use bot.run() as it is used in the working example.
@@ -1,36 +1,39 @@
 # cogs/activity_cog.py
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from datetime import datetime, timedelta, timezone
+import time
+import asyncio
+from utils.rankings import rank_awards
+from utils.roles import reconcile_role
+from utils.rollups import window_start_day, rebuild_rollups, check_rollups, SECONDS_PER_DAY
 
 class ActivityCog(commands.Cog):
+    # How long one process may own a server's award cycle (see utils/leases.py).
+    AWARD_LEASE_SECONDS = 1800
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Periodically write buffered activity rows (see utils/activity_buffer.py).
+        self.flush_activity.change_interval(seconds=self.bot.activity_buffer.flush_interval)
+        self.flush_activity.start()
+
+    async def cog_unload(self):
+        """Stops the flush loop and writes any buffered rows before shutdown."""
+        self.flush_activity.cancel()
+        await self.bot.activity_buffer.flush()
+
+    @tasks.loop(seconds=5)
+    async def flush_activity(self):
+        """Time-based flush of the activity write buffer."""
+        try:
+            await self.bot.activity_buffer.flush()
+        except Exception as e:
+            print(f"Error: Failed to flush activity buffer ({self.bot.activity_buffer.pending} rows pending): {e}")
 
-    async def log_action(self, message: str):
-       """Helper function to send a message to the configured log channel."""
-       async with self.bot.db.cursor() as cursor:
-           await cursor.execute("SELECT value FROM settings WHERE key = ?", ('log_channel_id',))
-           result = await cursor.fetchone()
-       if result:
-           channel_id = int(result[0])
-           log_channel = self.bot.get_channel(channel_id)
-           if log_channel:
-               try:
-                   await log_channel.send(f"[`{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}`] {message}")
-               except discord.Forbidden:
-                   print(f"Error: Bot could not send message to log channel {channel_id}.")
-       async with self.bot.db.cursor() as cursor:
-           await cursor.execute("SELECT value FROM settings WHERE key = ?", ('log_channel_id',))
-           result = await cursor.fetchone()
-       if result:
-           channel_id = int(result[0])
-           log_channel = self.bot.get_channel(channel_id)
-           if log_channel:
-               try:
-                   await log_channel.send(f"[`{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}`] {message}")
-               except discord.Forbidden:
-                   print(f"Error: Bot could not send message to log channel {channel_id}.")
+    async def log_action(self, guild_id: int, message: str):
+        """Queues a message for the server's log channel (see utils/log_dispatcher.py)."""
+        self.bot.log_dispatcher.log(guild_id, message)
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -44,15 +47,30 @@ class ActivityCog(commands.Cog):
             return
 
         # FIX APPLIED HERE: Store all timestamps as aware UTC
-        timestamp = datetime.now(timezone.utc).isoformat()
+        now_utc = datetime.now(timezone.utc)
         category_id = message.channel.category_id if hasattr(message.channel, 'category_id') else None
 
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("""
-                INSERT INTO activity_log (user_id, channel_id, category_id, timestamp)
-                VALUES (?, ?, ?, ?)
-            """, (message.author.id, message.channel.id, category_id, timestamp))
-        await self.bot.db.commit()
+        # Rows are buffered and written in batches instead of one commit per message.
+        if self.bot.activity_buffer.add(message.guild.id, message.author.id, message.channel.id, category_id, now_utc.isoformat(), int(now_utc.timestamp())):
+            await self.bot.activity_buffer.flush()
+
+    @commands.command(name="activity-buffer", brief="(Admin) Shows activity write buffer statistics.",
+
+    help="Shows how many activity rows are waiting to be written and how large and slow recent batch writes were. Useful for tuning ACTIVITY_FLUSH_ROWS and ACTIVITY_FLUSH_SECONDS.")
+    @commands.has_permissions(administrator=True)
+    async def activity_buffer_stats(self, ctx):
+        """Shows the activity write buffer counters."""
+        buffer = self.bot.activity_buffer
+        stats = buffer.stats()
+        embed = discord.Embed(title="Activity Write Buffer", color=discord.Color.blue())
+        embed.add_field(name="Thresholds", value=f"**{buffer.max_rows}** rows / **{buffer.flush_interval:g}**s", inline=False)
+        embed.add_field(name="Pending Rows", value=f"**{stats['pending']}**", inline=True)
+        embed.add_field(name="Rows Buffered", value=f"**{stats['rows_buffered']}**", inline=True)
+        embed.add_field(name="Rows Written", value=f"**{stats['rows_flushed']}**", inline=True)
+        embed.add_field(name="Flushes", value=f"**{stats['flush_count']}** ({stats['failed_flushes']} failed, {stats['rows_dropped']} rows dropped)", inline=True)
+        embed.add_field(name="Flush Size", value=f"last {stats['last_flush_size']} / avg {stats['avg_flush_size']:.1f} / max {stats['max_flush_size']}", inline=False)
+        embed.add_field(name="Flush Latency", value=f"last {stats['last_flush_ms']:.1f}ms / avg {stats['avg_flush_ms']:.1f}ms / max {stats['max_flush_ms']:.1f}ms", inline=False)
+        await ctx.send(embed=embed)
 
     @commands.group(name="award-cycle",brief="(Admin) Manages the cyclical award process.",
 
@@ -64,7 +82,7 @@ class ActivityCog(commands.Cog):
 
     @award_cycle.command(name="run", brief="Runs the award cycle for a specific tier.",
 
-    help="Processes all configured awards for a given frequency. 'gamma' runs all 'monthly' awards, and 'beta' runs all 'quarterly' awards. This command removes old roles and assigns them to the new winners.")
+    help="Processes all configured awards for a given frequency. 'gamma' runs all 'monthly' awards, and 'beta' runs all 'quarterly' awards. This command removes old roles and assigns them to the new winners (the top N members for awards configured with `!config-award winners`). Ties go to the member with the lower user ID.")
     @commands.has_permissions(administrator=True)
     async def run_cycle(self, ctx, tier: str):
         """
@@ -80,96 +98,120 @@ class ActivityCog(commands.Cog):
             days = 90
         else:
             return await ctx.send("Invalid tier. Please use `gamma` (monthly) or `beta` (quarterly).")
-        
+
+        # Only one award cycle per server at a time, even across shard processes.
+        if not await self.bot.leases.acquire('award-cycle', ctx.guild.id, self.AWARD_LEASE_SECONDS):
+            return await ctx.send("⏳ An award cycle for this server is already running. Try again once it has finished.")
+        try:
+            await self._run_cycle(ctx, tier, frequency, days)
+        finally:
+            await self.bot.leases.release('award-cycle', ctx.guild.id)
+
+    async def _run_cycle(self, ctx, tier: str, frequency: str, days: int):
+        """Ranks, reassigns and announces every award of one frequency."""
         await ctx.send(f"⚙️ Running **{tier.capitalize()} ({frequency})** award cycle. This may take a moment...")
+
+        # Make sure buffered messages are counted.
+        await self.bot.activity_buffer.flush()
         
         async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT award_name, award_type, role_id, target_id FROM award_configs WHERE frequency = ?", (frequency,))
+            await cursor.execute("SELECT award_name, award_type, role_id, target_id, winner_count FROM award_configs WHERE guild_id = ? AND frequency = ?", (ctx.guild.id, frequency))
             awards_to_process = await cursor.fetchall()
         
         if not awards_to_process:
             return await ctx.send(f"No {frequency} awards found in the configuration.")
 
         # Get announcement channel
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT value FROM settings WHERE key = 'announcement_channel_id'")
-            res = await cursor.fetchone()
-        announcement_channel = self.bot.get_channel(int(res[0])) if res else None
+        announcement_channel_id = self.bot.settings.guild(ctx.guild.id).announcement_channel_id
+        announcement_channel = self.bot.get_channel(announcement_channel_id) if announcement_channel_id else None
 
         summary_log = [f"**🏆 Award Cycle Report: {tier.capitalize()} ({datetime.utcnow().strftime('%Y-%m-%d')}) 🏆**"]
         
-        time_cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
-        for award_name, award_type, role_id, target_id in awards_to_process:
+        # Winners of every award are ranked in one pass over the daily rollups: at most `days` buckets.
+        compute_start = time.perf_counter()
+        rankings = await rank_awards(
+            self.bot.db,
+            ctx.guild.id,
+            [(award_name, award_type, target_id, winner_count) for award_name, award_type, _, target_id, winner_count in awards_to_process],
+            window_start_day(days)
+        )
+        compute_ms = (time.perf_counter() - compute_start) * 1000
+
+        # --- 1. Resolve the New Winners of Every Award ---
+        resolved = []
+        for award_name, award_type, role_id, target_id, winner_count in awards_to_process:
             role = ctx.guild.get_role(role_id)
             if not role:
-                summary_log.append(f"⚠️ **{award_name}**: Skipped. Role with ID `{role_id}` not found.")
+                resolved.append((award_name, None, [], [], [f"⚠️ **{award_name}**: Skipped. Role with ID `{role_id}` not found."]))
                 continue
 
-            # --- 1. Clear Old Winners ---
-            old_winners = role.members
-            for member in old_winners:
-                try:
-                    await member.remove_roles(role, reason="Award cycle reset.")
-                except discord.Forbidden:
-                    summary_log.append(f"⚠️ **{award_name}**: Could not remove role from {member.mention} (Permissions error).")
-            
-            # --- 2. Calculate New Winner ---
-            winner_id = None
-            async with self.bot.db.cursor() as cursor:
-                if award_type == 'server':
-                    await cursor.execute("""
-                        SELECT user_id, COUNT(*) as msg_count 
-                        FROM activity_log 
-                        WHERE timestamp >= ?
-                        GROUP BY user_id ORDER BY msg_count DESC LIMIT 1
-                    """, (time_cutoff,))
-                elif award_type == 'channel':
-                    await cursor.execute("""
-                        SELECT user_id, COUNT(*) as msg_count 
-                        FROM activity_log 
-                        WHERE channel_id = ? AND timestamp >= ?
-                        GROUP BY user_id ORDER BY msg_count DESC LIMIT 1
-                    """, (target_id, time_cutoff))
-                elif award_type == 'category':
-                    await cursor.execute("""
-                        SELECT user_id, COUNT(*) as msg_count 
-                        FROM activity_log 
-                        WHERE category_id = ? AND timestamp >= ?
-                        GROUP BY user_id ORDER BY msg_count DESC LIMIT 1
-                    """, (target_id, time_cutoff))
-                
-                winner_data = await cursor.fetchone()
-                if winner_data:
-                    winner_id = winner_data[0]
-
-            # --- 3. Assign Role and Announce ---
-            if winner_id:
+            winners = rankings.get(award_name, [])
+            notes = []
+            if not winners:
+                notes.append(f"ℹ️ **{award_name}**: No eligible winner found for this period.")
+
+            winner_members = []
+            for winner_id, msg_count in winners:
                 winner_member = ctx.guild.get_member(winner_id)
                 if winner_member:
-                    try:
-                        await winner_member.add_roles(role, reason=f"Winner of {award_name} award.")
-                        summary_log.append(f"✅ **{award_name}**: Awarded {role.mention} to {winner_member.mention}.")
-                    except discord.Forbidden:
-                        summary_log.append(f"❌ **{award_name}**: Found winner {winner_member.mention} but failed to assign role (Permissions error).")
+                    winner_members.append(winner_member)
+                else:
+                    notes.append(f"⚠️ **{award_name}**: Found winner (ID: {winner_id}) but they are no longer in the server.")
+            resolved.append((award_name, role, winners, winner_members, notes))
+
+        # --- 2. Apply Only the Difference to Each Role's Holders ---
+        # All awards are reconciled together, so a member gaining one award and losing another
+        # gets a single role update from bot.role_changes.
+        results = await asyncio.gather(*(
+            reconcile_role(
+                role, winner_members, self.bot.role_changes,
+                add_reason=f"Winner of {award_name} award.", remove_reason="Award cycle reset."
+            )
+            for award_name, role, _, winner_members, _ in resolved if role
+        ))
+
+        # --- 3. Announce ---
+        results = iter(results)
+        skipped_calls = 0
+        for award_name, role, winners, winner_members, notes in resolved:
+            summary_log.extend(notes)
+            if not role:
+                continue
+            result = next(results)
+            skipped_calls += result.skipped_calls
+            failed = {(member.id, action) for member, action in result.failed}
+
+            placings = {winner_id: (place, msg_count) for place, (winner_id, msg_count) in enumerate(winners, start=1)}
+            for member in winner_members:
+                place, msg_count = placings[member.id]
+                place_str = f" (#{place}, {msg_count} messages)" if len(winners) > 1 else f" ({msg_count} messages)"
+                if (member.id, 'add') in failed:
+                    summary_log.append(f"❌ **{award_name}**: Found winner {member.mention} but failed to assign role (Permissions error).")
+                elif member in result.kept:
+                    summary_log.append(f"✅ **{award_name}**: {member.mention} keeps {role.mention}{place_str}.")
                 else:
-                    summary_log.append(f"⚠️ **{award_name}**: Found winner (ID: {winner_id}) but they are no longer in the server.")
-            else:
-                summary_log.append(f"ℹ️ **{award_name}**: No eligible winner found for this period.")
+                    summary_log.append(f"✅ **{award_name}**: Awarded {role.mention} to {member.mention}{place_str}.")
+            for member, action in result.failed:
+                if action == 'remove':
+                    summary_log.append(f"⚠️ **{award_name}**: Could not remove role from {member.mention} (Permissions error).")
+
+        summary_log.append(f"⏱️ Rankings for {len(awards_to_process)} awards computed in {compute_ms:.1f}ms. Skipped {skipped_calls} unnecessary role updates.")
 
         # Send logs and announcements
-        await self.log_action("\n".join(summary_log))
+        await self.log_action(ctx.guild.id, "\n".join(summary_log))
         if announcement_channel:
             try:
                 await announcement_channel.send("\n".join(summary_log))
             except discord.Forbidden:
-                await self.log_action(f"**ERROR**: Could not send award summary to announcement channel.")
+                await self.log_action(ctx.guild.id, f"**ERROR**: Could not send award summary to announcement channel.")
         
         await ctx.send("✅ Award cycle finished. A detailed report has been sent to the log channel.")
 
-    @award_cycle.command(name="reset", brief="Clears old activity data for a tier.",
+    @award_cycle.command(name="reset", brief="(Bot owner) Clears old activity data for a tier.",
 
-    help="Deletes old message activity logs to keep the database from growing too large. 'gamma' deletes data older than 30 days, and 'beta' deletes data older than 90 days.")
-    @commands.has_permissions(administrator=True)
+    help="Deletes old message activity logs to keep the database from growing too large. 'gamma' deletes data older than 30 days, and 'beta' deletes data older than 90 days. Logs are stored per month, so whole months older than the cutoff are removed. Daily activity rollups are kept, so awards and leaderboards are unaffected. The raw log is shared by every server the bot is in, so the cutoff applies to all of them and only the bot's owners can run it.")
+    # Shared by every server, so a server administrator isn't enough.
+    @commands.is_owner()
     async def reset_cycle_data(self, ctx, tier: str):
         """Deletes activity data older than the cycle period."""
         tier = tier.lower()
@@ -180,17 +222,56 @@ class ActivityCog(commands.Cog):
         else:
             return await ctx.send("Invalid tier. Please use `gamma` (monthly) or `beta` (quarterly).")
         
-        time_cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        time_cutoff = int((datetime.now(timezone.utc) - timedelta(days=days)).timestamp())
 
         await ctx.send(f"🗑️ Deleting activity log data older than {days} days... This may take a moment.")
         
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("DELETE FROM activity_log WHERE timestamp < ?", (time_cutoff,))
-            await self.bot.db.commit()
-            deleted_rows = cursor.changes()
+        # Raw activity is partitioned by month, so only whole months older than the cutoff are dropped.
+        dropped_months, deleted_rows = await self.bot.activity_partitions.drop_before(time_cutoff)
         
-        await ctx.send(f"✅ Data reset complete. Deleted {deleted_rows} old log entries.")
-        await self.log_action(f"**Data Reset**: {ctx.author.mention} ran data reset for tier `{tier}`. Deleted {deleted_rows} old log entries.")
+        await ctx.send(f"✅ Data reset complete. Deleted {deleted_rows} old log entries ({dropped_months} monthly partitions).")
+        await self.log_action(ctx.guild.id, f"**Data Reset**: {ctx.author.mention} ran data reset for tier `{tier}`. Deleted {deleted_rows} old log entries in {dropped_months} monthly partitions.")
+
+    @commands.group(name="activity-rollup", brief="(Admin) Maintains the daily activity rollups.",
+
+    help="Parent command for the daily activity rollups that awards and leaderboards are computed from. Use `rebuild` to recompute them from the raw activity log, or `check` to compare them against it.", invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def activity_rollup(self, ctx):
+        """Parent command for managing activity rollups."""
+        await ctx.send("Invalid subcommand. Use `rebuild` or `check`. Example: `!activity-rollup check`")
+
+    @activity_rollup.command(name="rebuild", brief="(Bot owner) Recomputes rollups from the activity log.",
+
+    help="Recomputes the daily activity rollups of every server from the raw activity log in chunks. Only days still fully covered by the raw log are rebuilt, so history older than the last `!award-cycle reset` is kept. Because it affects every server, only the bot's owners can run it.")
+    # Shared by every server, so a server administrator isn't enough.
+    @commands.is_owner()
+    async def rollup_rebuild(self, ctx):
+        """Rebuilds the daily activity rollups from activity_log."""
+        await ctx.send("⚙️ Rebuilding daily activity rollups... This may take a moment.")
+        rebuilt = await rebuild_rollups(self.bot.db, self.bot.activity_buffer)
+        # Rollups are rebuilt for every server at once.
+        for guild in self.bot.guilds:
+            self.bot.leaderboards.invalidate(guild.id, 'activity')
+        await ctx.send(f"✅ Rollup rebuild complete. Re-aggregated {rebuilt} log entries.")
+        await self.log_action(ctx.guild.id, f"**Rollup Rebuild**: {ctx.author.mention} rebuilt the daily activity rollups from {rebuilt} log entries.")
+
+    @activity_rollup.command(name="check", brief="Checks rollups against the activity log.",
+
+    help="Compares this server's daily activity rollups with a fresh count of the raw activity log for every day it still fully covers, and lists the days that disagree.")
+    @commands.has_permissions(administrator=True)
+    async def rollup_check(self, ctx):
+        """Checks the daily activity rollups for consistency."""
+        mismatches = await check_rollups(self.bot.db, self.bot.activity_buffer, ctx.guild.id)
+        if not mismatches:
+            return await ctx.send("✅ Rollups are consistent with the activity log.")
+
+        lines = [
+            f"`{datetime.fromtimestamp(day * SECONDS_PER_DAY, timezone.utc).strftime('%Y-%m-%d')}`: log {raw}, rollup {rolled}"
+            for day, raw, rolled in mismatches[:20]
+        ]
+        if len(mismatches) > 20:
+            lines.append(f"...and {len(mismatches) - 20} more days.")
+        await ctx.send(f"⚠️ Found {len(mismatches)} inconsistent days. Run `!activity-rollup rebuild` to fix them.\n" + "\n".join(lines))
 
 async def setup(bot):
     await bot.add_cog(ActivityCog(bot))
\ No newline at end of file
@@ -1,15 +1,33 @@
 # cogs/config_cog.py
 import discord
 from discord.ext import commands
-import json
+import asyncio
+import os
+from utils.rollups import rebuild_rollups
+
+# PRAGMA user_version once every table is keyed by server and rows from the single-server
+# layout have been adopted by their server (see `adopt_single_guild_data`).
+SCHEMA_VERSION = 1
+
+# Tables whose primary key starts with guild_id. Older databases have them without it.
+GUILD_KEYED_TABLES = ("members", "settings", "activity_daily", "tenure_roles", "participation_roles", "award_configs")
+# Suffix of a single-server table while its rows are copied into the new layout.
+SINGLE_GUILD_SUFFIX = "_single_guild"
 
 class ConfigCog(commands.Cog):
     """
     Handles all bot configuration and the initial setup of the database.
     This cog creates all necessary tables for all bot features on its first run.
+    Every table is keyed by server (guild_id), so one bot can serve several servers.
     """
+    # How long one process may hold the single-server adoption before another can take over.
+    ADOPTION_LEASE_SECONDS = 600
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Set once the tables exist; on_ready waits for it before adopting single-server data.
+        self.schema_ready = asyncio.Event()
+        self.adoption_pending = False
         # This task runs in the background to set up the database when the cog loads.
         self.bot.loop.create_task(self.setup_database())
 
@@ -19,80 +37,333 @@ class ConfigCog(commands.Cog):
         Creates all tables required for the entire bot's functionality from scratch.
         Uses 'IF NOT EXISTS' to be safe on subsequent runs, but is designed for a fresh start.
         """
-        async with self.bot.db.cursor() as cursor:
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("PRAGMA user_version")
+            schema_version = (await cursor.fetchone())[0]
+            existing_database = await self._table_exists(cursor, "members")
+            # Decided before anything can write rollups: a database without them gets them built from its raw history.
+            # Also checks the name a single-server rollup table has while it is copied into the new layout.
+            has_rollup_table = (await self._table_exists(cursor, "activity_daily")
+                                or await self._table_exists(cursor, "activity_daily" + SINGLE_GUILD_SUFFIX))
+            # Tables from the single-server layout are moved aside here and copied into the new one below.
+            single_guild_tables = await self._detach_single_guild_tables(cursor) if schema_version < SCHEMA_VERSION else []
+
             # --- CORE TABLES ---
             
-            # 1. Members Table: The central table for all user-specific stats.
+            # 1. Members Table: The central table for all user-specific stats, per server.
             # This is the corrected version that includes all columns from the start.
             await cursor.execute("""
                 CREATE TABLE IF NOT EXISTS members (
-                    user_id INTEGER PRIMARY KEY,
+                    guild_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
                     join_date TEXT NOT NULL,
                     participation_count INTEGER DEFAULT 0,
-                    host_count INTEGER DEFAULT 0
+                    host_count INTEGER DEFAULT 0,
+                    next_tenure_due INTEGER DEFAULT 0,
+                    PRIMARY KEY (guild_id, user_id)
                 )
             """)
+            # Epoch time of the member's next tenure milestone (0 = check at the next run, NULL = none left).
+            # The tenure check only loads members that are due, through this index.
+            await self._ensure_column(cursor, "members", "next_tenure_due", "INTEGER DEFAULT 0")
+            await cursor.execute("CREATE INDEX IF NOT EXISTS idx_members_tenure_due ON members (guild_id, next_tenure_due)")
+            # Start time of the last !sync-members run that saw the member, and when they were found to have left
+            # (NULL while they are in the server). Departed members are skipped by tenure checks and leaderboards.
+            await self._ensure_column(cursor, "members", "last_synced", "INTEGER")
+            await self._ensure_column(cursor, "members", "departed_at", "INTEGER")
             
             # 2. Settings Table: For simple key-value configurations like channel IDs.
             await cursor.execute("""
                 CREATE TABLE IF NOT EXISTS settings (
-                    key TEXT PRIMARY KEY,
-                    value TEXT
+                    guild_id INTEGER NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT,
+                    PRIMARY KEY (guild_id, key)
                 )
             """)
             
-            # 3. Activity Log Table: Stores a record of every message for cyclical awards.
+            # 3. Activity Log: a record of every message, stored in one table per UTC month
+            # (activity_log_YYYYMM) behind an `activity_log` view. The partitions are created by
+            # utils/activity_partitions.py below. Databases from before partitioning have a single
+            # activity_log table; it gets `ts` here if it predates that too, and is migrated below.
+            if await self._table_exists(cursor, "activity_log"):
+                await self._ensure_column(cursor, "activity_log", "ts", "INTEGER")
+
+            # 3b. Daily Activity Rollups: message counts per UTC day, kept in step with activity_log.
+            # Award and leaderboard windows sum these buckets instead of counting raw rows.
+            # category_id is 0 for channels without a category so it can be part of the key.
             await cursor.execute("""
-                CREATE TABLE IF NOT EXISTS activity_log (
-                    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                CREATE TABLE IF NOT EXISTS activity_daily (
+                    guild_id INTEGER NOT NULL,
+                    day INTEGER NOT NULL,
                     user_id INTEGER NOT NULL,
                     channel_id INTEGER NOT NULL,
-                    category_id INTEGER,
-                    timestamp TEXT NOT NULL
-                )
+                    category_id INTEGER NOT NULL DEFAULT 0,
+                    message_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (guild_id, day, user_id, channel_id, category_id)
+                ) WITHOUT ROWID
             """)
+            await cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_channel ON activity_daily (channel_id, day, user_id, message_count)")
+            await cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_category ON activity_daily (category_id, day, user_id, message_count)")
 
             # --- FEATURE-SPECIFIC CONFIGURATION TABLES ---
             
             # 4. Tenure Roles Table: For seniority-based role awards.
             await cursor.execute("""
                 CREATE TABLE IF NOT EXISTS tenure_roles (
-                    days INTEGER PRIMARY KEY,
-                    role_id INTEGER NOT NULL
+                    guild_id INTEGER NOT NULL,
+                    days INTEGER NOT NULL,
+                    role_id INTEGER NOT NULL,
+                    PRIMARY KEY (guild_id, days)
                 )
             """)
 
             # 5. Participation Roles Table: For event participation milestone awards.
             await cursor.execute("""
                 CREATE TABLE IF NOT EXISTS participation_roles (
-                    count INTEGER PRIMARY KEY,
-                    role_id INTEGER NOT NULL
+                    guild_id INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    role_id INTEGER NOT NULL,
+                    PRIMARY KEY (guild_id, count)
                 )
             """)
             
             # 6. Award Configs Table: Defines the rules for cyclical awards.
             await cursor.execute("""
                 CREATE TABLE IF NOT EXISTS award_configs (
-                    award_name TEXT PRIMARY KEY,
+                    guild_id INTEGER NOT NULL,
+                    award_name TEXT NOT NULL,
                     award_type TEXT NOT NULL,
                     frequency TEXT NOT NULL,
                     role_id INTEGER NOT NULL,
-                    target_id INTEGER 
+                    target_id INTEGER,
+                    winner_count INTEGER NOT NULL DEFAULT 1,
+                    PRIMARY KEY (guild_id, award_name)
                 )
             """)
+            await self._ensure_column(cursor, "award_configs", "winner_count", "INTEGER NOT NULL DEFAULT 1")
             
             # 7. Active Events Table: Tracks events that have been created but not closed.
             await cursor.execute("""
                 CREATE TABLE IF NOT EXISTS active_events (
                     message_id INTEGER PRIMARY KEY,
                     host_id INTEGER NOT NULL,
-                    title TEXT NOT NULL
+                    title TEXT NOT NULL,
+                    channel_id INTEGER,
+                    guild_id INTEGER NOT NULL DEFAULT 0
                 )
             """)
+            await self._ensure_column(cursor, "active_events", "channel_id", "INTEGER")
+            await self._ensure_column(cursor, "active_events", "guild_id", "INTEGER NOT NULL DEFAULT 0")
+
+            # 8. Event Participants Table: Live sign-ups for active events, kept in sync from reaction events.
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS event_participants (
+                    message_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    PRIMARY KEY (message_id, user_id)
+                ) WITHOUT ROWID
+            """)
+
+            # 9. Member Syncs Table: Position of a running !sync-members per server, so it can resume after a restart.
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS member_syncs (
+                    guild_id INTEGER PRIMARY KEY,
+                    started_at INTEGER NOT NULL,
+                    last_user_id INTEGER NOT NULL DEFAULT 0,
+                    members_seen INTEGER NOT NULL DEFAULT 0,
+                    members_added INTEGER NOT NULL DEFAULT 0,
+                    channel_id INTEGER,
+                    message_id INTEGER
+                )
+            """)
+
+            # 10. Job Leases Table: Which process owns a background job (see utils/leases.py).
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS job_leases (
+                    job TEXT NOT NULL,
+                    guild_id INTEGER NOT NULL,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (job, guild_id)
+                ) WITHOUT ROWID
+            """)
+
+            # 11. Schema Tasks Table: One-off upgrade steps still to run. A step's row is written in the
+            # transaction that makes it necessary and deleted once it has finished, so an interrupted step runs again.
+            await cursor.execute("CREATE TABLE IF NOT EXISTS schema_tasks (task TEXT PRIMARY KEY) WITHOUT ROWID")
+            if not has_rollup_table:
+                await cursor.execute("INSERT OR IGNORE INTO schema_tasks (task) VALUES ('build-rollups')")
+
+            for table in single_guild_tables:
+                await self._copy_single_guild_rows(cursor, table)
+            if single_guild_tables:
+                print(f"Moved {', '.join(single_guild_tables)} to the multi-server layout.")
+
+            # Rows from the single-server layout wait under guild_id 0 until on_ready knows which server they belong to.
+            if schema_version < SCHEMA_VERSION:
+                if existing_database:
+                    self.adoption_pending = True
+                else:
+                    await cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             
-        await self.bot.db.commit()
         print("Database tables verified/created for all cogs.")
 
+        await self.bot.settings.load()
+        await self.bot.member_stats.load()
+
+        await self.bot.activity_partitions.load()
+
+        legacy_table = await self.bot.activity_partitions.detach_legacy()
+        if legacy_table:
+            await self.backfill_activity_ts(legacy_table)
+            moved = await self.bot.activity_partitions.migrate_legacy()
+            print(f"Moved {moved} activity log entries into monthly partitions.")
+
+        # First run with rollups: build them from the raw history, including the rows migrated above.
+        # Flushes may already have added rollups since startup; the rebuild recounts those days too.
+        async with self.bot.db.cursor() as cursor:
+            await cursor.execute("SELECT 1 FROM schema_tasks WHERE task = 'build-rollups'")
+            build_rollups = await cursor.fetchone() is not None
+        if build_rollups:
+            rebuilt = await rebuild_rollups(self.bot.db, self.bot.activity_buffer, since_day=0)
+            async with self.bot.db.transaction() as cursor:
+                await cursor.execute("DELETE FROM schema_tasks WHERE task = 'build-rollups'")
+            if rebuilt:
+                print(f"Built daily activity rollups from {rebuilt} activity log entries.")
+
+        self.schema_ready.set()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self.schema_ready.wait()
+        if self.adoption_pending:
+            await self.adopt_single_guild_data()
+
+    async def adopt_single_guild_data(self):
+        """
+        Assigns rows from the single-server layout (guild_id 0) to the server they came from:
+        LEGACY_GUILD_ID if it is set, otherwise the only server the bot is in.
+        """
+        legacy_guild_id = os.getenv('LEGACY_GUILD_ID')
+        if legacy_guild_id:
+            guild_id = int(legacy_guild_id)
+        # A process running only some shards can't tell which server is the only one.
+        elif len(self.bot.guilds) == 1 and self.bot.shard_ids is None:
+            guild_id = self.bot.guilds[0].id
+        else:
+            print(f"Warning: The database has data from before multi-server support, but the bot is in {len(self.bot.guilds)} servers (or runs only some shards). Set LEGACY_GUILD_ID to the server it belongs to and restart.")
+            return
+
+        # With several shard processes, only one of them adopts.
+        if not await self.bot.leases.acquire('schema-adoption', 0, self.ADOPTION_LEASE_SECONDS):
+            return
+
+        # Counts recorded for the server since startup are merged with the old ones rather than replaced.
+        async with self.bot.activity_buffer.lock:
+            async with self.bot.db.transaction() as cursor:
+                await cursor.execute("""
+                    INSERT INTO activity_daily (guild_id, day, user_id, channel_id, category_id, message_count)
+                    SELECT ?, day, user_id, channel_id, category_id, message_count FROM activity_daily WHERE guild_id = 0
+                    ON CONFLICT (guild_id, day, user_id, channel_id, category_id)
+                    DO UPDATE SET message_count = message_count + excluded.message_count
+                """, (guild_id,))
+                # Members recorded since startup as well keep their earliest join date and the sum of both
+                # rows' event counts; next_tenure_due = 0 makes the tenure check work out their schedule again.
+                await cursor.execute("""
+                    INSERT INTO members (guild_id, user_id, join_date, participation_count, host_count, next_tenure_due, last_synced, departed_at)
+                    SELECT ?, user_id, join_date, participation_count, host_count, next_tenure_due, last_synced, departed_at FROM members WHERE guild_id = 0
+                    ON CONFLICT (guild_id, user_id) DO UPDATE SET
+                        join_date = MIN(join_date, excluded.join_date),
+                        participation_count = participation_count + excluded.participation_count,
+                        host_count = host_count + excluded.host_count,
+                        next_tenure_due = 0
+                """, (guild_id,))
+                for table in GUILD_KEYED_TABLES + ("active_events",):
+                    if table not in ("activity_daily", "members"):
+                        # Anything the server already has a newer row for keeps the newer row.
+                        await cursor.execute(f"UPDATE OR IGNORE {table} SET guild_id = ? WHERE guild_id = 0", (guild_id,))
+                    # What is left under guild_id 0 was merged above or replaced by a newer row.
+                    await cursor.execute(f"DELETE FROM {table} WHERE guild_id = 0")
+        adopted_rows = await self.bot.activity_partitions.adopt(guild_id)
+
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        await self.bot.leases.release('schema-adoption', 0)
+        self.adoption_pending = False
+        await self.bot.settings.load()
+        await self.bot.member_stats.load()
+        self.bot.leaderboards.invalidate(guild_id)
+        print(f"Assigned existing data and {adopted_rows} activity log entries to server {guild_id}.")
+
+    async def _table_exists(self, cursor, name: str) -> bool:
+        await cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+        return await cursor.fetchone() is not None
+
+    async def _columns(self, cursor, table: str) -> list:
+        await cursor.execute(f"PRAGMA table_info({table})")
+        return [row[1] for row in await cursor.fetchall()]
+
+    async def _detach_single_guild_tables(self, cursor) -> list:
+        """
+        Renames tables that don't have guild_id yet (and drops their indexes, whose names the new
+        tables reuse). Returns every table with single-server rows waiting to be copied, including
+        any left over from an interrupted earlier run.
+        """
+        pending = []
+        for table in GUILD_KEYED_TABLES:
+            old_table = f"{table}{SINGLE_GUILD_SUFFIX}"
+            if await self._table_exists(cursor, table) and "guild_id" not in await self._columns(cursor, table):
+                await cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,))
+                for (index_name,) in await cursor.fetchall():
+                    await cursor.execute(f"DROP INDEX {index_name}")
+                await cursor.execute(f"ALTER TABLE {table} RENAME TO {old_table}")
+            if await self._table_exists(cursor, old_table):
+                pending.append(table)
+        return pending
+
+    async def _copy_single_guild_rows(self, cursor, table: str):
+        """Copies a detached single-server table into its new layout under guild_id 0, then drops it."""
+        old_table = f"{table}{SINGLE_GUILD_SUFFIX}"
+        old_columns = set(await self._columns(cursor, old_table))
+        columns = ", ".join(column for column in await self._columns(cursor, table) if column in old_columns)
+        await cursor.execute(f"INSERT OR IGNORE INTO {table} (guild_id, {columns}) SELECT 0, {columns} FROM {old_table}")
+        await cursor.execute(f"DROP TABLE {old_table}")
+
+    async def _ensure_column(self, cursor, table: str, column: str, definition: str):
+        """Adds a column to an existing table if an older database doesn't have it yet."""
+        await cursor.execute(f"PRAGMA table_info({table})")
+        existing_columns = {row[1] for row in await cursor.fetchall()}
+        if column not in existing_columns:
+            await cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    async def backfill_activity_ts(self, table: str, chunk_size: int = 5000):
+        """
+        Fills `ts` in a legacy activity table for rows written before the column existed.
+        Works in small committed chunks so activity inserts can interleave with it.
+        Rows must be backfilled before they can be moved into monthly partitions.
+        """
+        total = 0
+        last_log_id = 0
+        while True:
+            # Walks log_id ranges so every row is visited once: rows whose timestamp can't be parsed keep
+            # ts NULL (migrate_legacy drops them) instead of being selected again on every pass.
+            async with self.bot.db.transaction() as cursor:
+                await cursor.execute(f"SELECT MAX(log_id) FROM (SELECT log_id FROM {table} WHERE log_id > ? ORDER BY log_id LIMIT ?)",
+                                     (last_log_id, chunk_size))
+                chunk_end = (await cursor.fetchone())[0]
+                if chunk_end is None:
+                    break
+                await cursor.execute(f"""
+                    UPDATE {table} SET ts = CAST(strftime('%s', timestamp) AS INTEGER)
+                    WHERE log_id > ? AND log_id <= ? AND ts IS NULL AND strftime('%s', timestamp) IS NOT NULL
+                """, (last_log_id, chunk_end))
+                total += cursor.rowcount
+            last_log_id = chunk_end
+            await asyncio.sleep(0)
+        if total:
+            print(f"Backfilled epoch timestamps for {total} activity log entries.")
+
     # --- Utility Configuration Commands ---
 
     @commands.command(name="config-logchannel", brief="Sets the bot's logging channel.",
@@ -101,10 +372,7 @@ class ConfigCog(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def config_logchannel(self, ctx, channel: discord.TextChannel):
         """Sets the channel where the bot will post detailed action logs."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", 
-                                 ('log_channel_id', str(channel.id)))
-        await self.bot.db.commit()
+        await self.bot.settings.guild(ctx.guild.id).set('log_channel_id', channel.id)
         await ctx.send(f"✅ Log channel has been set to {channel.mention}")
 
     @commands.command(name="config-announcements", brief="Sets the award announcements channel.",
@@ -113,10 +381,7 @@ class ConfigCog(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def config_announcements(self, ctx, channel: discord.TextChannel):
         """Sets the channel for award cycle announcements."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", 
-                                 ('announcement_channel_id', str(channel.id)))
-        await self.bot.db.commit()
+        await self.bot.settings.guild(ctx.guild.id).set('announcement_channel_id', channel.id)
         await ctx.send(f"✅ Award announcement channel has been set to {channel.mention}")
 
     # --- `!accept` Command Configuration ---
@@ -127,14 +392,9 @@ class ConfigCog(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def config_accept(self, ctx):
         """Shows the current role configuration for the !accept command."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT value FROM settings WHERE key = ?", ('accept_add_roles',))
-            add_res = await cursor.fetchone()
-            await cursor.execute("SELECT value FROM settings WHERE key = ?", ('accept_remove_roles',))
-            remove_res = await cursor.fetchone()
-        
-        add_roles_ids = json.loads(add_res[0]) if add_res else []
-        remove_roles_ids = json.loads(remove_res[0]) if remove_res else []
+        settings = self.bot.settings.guild(ctx.guild.id)
+        add_roles_ids = settings.accept_add_roles
+        remove_roles_ids = settings.accept_remove_roles
         
         add_mentions = [f"<@&{role_id}>" for role_id in add_roles_ids if ctx.guild.get_role(role_id)]
         remove_mentions = [f"<@&{role_id}>" for role_id in remove_roles_ids if ctx.guild.get_role(role_id)]
@@ -150,17 +410,14 @@ class ConfigCog(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def accept_add(self, ctx, role: discord.Role):
         """Adds a role to be GIVEN on !accept."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT value FROM settings WHERE key = ?", ('accept_add_roles',))
-            result = await cursor.fetchone()
-            roles = json.loads(result[0]) if result else []
-            if role.id not in roles:
-                roles.append(role.id)
-                await cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", ('accept_add_roles', json.dumps(roles)))
-                await self.bot.db.commit()
-                await ctx.send(f"✅ {role.mention} will now be **added** on `!accept`.")
-            else:
-                await ctx.send(f"⚠️ {role.mention} is already in the 'add' list.")
+        settings = self.bot.settings.guild(ctx.guild.id)
+        roles = list(settings.accept_add_roles)
+        if role.id not in roles:
+            roles.append(role.id)
+            await settings.set('accept_add_roles', roles)
+            await ctx.send(f"✅ {role.mention} will now be **added** on `!accept`.")
+        else:
+            await ctx.send(f"⚠️ {role.mention} is already in the 'add' list.")
     
     @config_accept.command(name="remove", brief="Adds a role to remove on !accept.",
 
@@ -168,17 +425,14 @@ class ConfigCog(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def accept_remove(self, ctx, role: discord.Role):
         """Adds a role to be REMOVED on !accept."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT value FROM settings WHERE key = ?", ('accept_remove_roles',))
-            result = await cursor.fetchone()
-            roles = json.loads(result[0]) if result else []
-            if role.id not in roles:
-                roles.append(role.id)
-                await cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", ('accept_remove_roles', json.dumps(roles)))
-                await self.bot.db.commit()
-                await ctx.send(f"✅ {role.mention} will now be **removed** on `!accept`.")
-            else:
-                await ctx.send(f"⚠️ {role.mention} is already in the 'remove' list.")
+        settings = self.bot.settings.guild(ctx.guild.id)
+        roles = list(settings.accept_remove_roles)
+        if role.id not in roles:
+            roles.append(role.id)
+            await settings.set('accept_remove_roles', roles)
+            await ctx.send(f"✅ {role.mention} will now be **removed** on `!accept`.")
+        else:
+            await ctx.send(f"⚠️ {role.mention} is already in the 'remove' list.")
 
     # --- Tenure Role Configuration ---
 
@@ -190,7 +444,7 @@ class ConfigCog(commands.Cog):
         """Lists the current tenure milestone roles."""
         embed = discord.Embed(title="Tenure Milestone Roles", color=discord.Color.gold())
         async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT days, role_id FROM tenure_roles ORDER BY days ASC")
+            await cursor.execute("SELECT days, role_id FROM tenure_roles WHERE guild_id = ? ORDER BY days ASC", (ctx.guild.id,))
             rows = await cursor.fetchall()
             if not rows:
                 embed.description = "No tenure roles configured.\nUse `!config-tenure set <days> <@role>` to add one."
@@ -206,9 +460,10 @@ class ConfigCog(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def tenure_set(self, ctx, days: int, role: discord.Role):
         """Sets a role for a tenure milestone (e.g., 100 days)."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("INSERT OR REPLACE INTO tenure_roles (days, role_id) VALUES (?, ?)", (days, role.id))
-        await self.bot.db.commit()
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("INSERT OR REPLACE INTO tenure_roles (guild_id, days, role_id) VALUES (?, ?, ?)", (ctx.guild.id, days, role.id))
+        # The milestones changed, so every member's next due date has to be worked out again.
+        await self._reset_tenure_schedule(ctx.guild.id)
         await ctx.send(f"✅ Tenure role for **{days} days** set to {role.mention}.")
         
        
@@ -222,13 +477,11 @@ class ConfigCog(commands.Cog):
 
         """Sets the single role a member must have to be eligible for tenure."""
 
-        async with self.bot.db.cursor() as cursor:
-
-            await cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", 
+        await self.bot.settings.guild(ctx.guild.id).set('tenure_qualifying_role_id', role.id)
 
-                                 ('tenure_qualifying_role_id', str(role.id)))
+        # Members the old rule skipped may qualify now.
 
-        await self.bot.db.commit()
+        await self._reset_tenure_schedule(ctx.guild.id)
 
         await ctx.send(f"✅ Done. Tenure checks will now only apply to members with the {role.mention} role.")
 
@@ -242,13 +495,18 @@ class ConfigCog(commands.Cog):
 
         """Removes the qualifying role requirement. All members become eligible again."""
 
-        async with self.bot.db.cursor() as cursor:
+        await self.bot.settings.guild(ctx.guild.id).delete('tenure_qualifying_role_id')
 
-            await cursor.execute("DELETE FROM settings WHERE key = ?", ('tenure_qualifying_role_id',))
-
-        await self.bot.db.commit()
+        await self._reset_tenure_schedule(ctx.guild.id)
 
         await ctx.send("✅ Done. The tenure qualifying role has been cleared. All members in the database are now eligible.")
+
+    async def _reset_tenure_schedule(self, guild_id: int):
+        """Makes every member of the server due, so the next tenure check works out their schedule again."""
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("UPDATE members SET next_tenure_due = 0 WHERE guild_id = ?", (guild_id,))
+        self.bot.member_stats.guild(guild_id).reset_tenure_due()
+
     # --- Participation Role Configuration ---
 
     @commands.group(name="config-participation", brief="Configures event participation roles.",
@@ -259,7 +517,7 @@ class ConfigCog(commands.Cog):
         """Lists the current participation milestone roles."""
         embed = discord.Embed(title="Event Participation Milestone Roles", color=discord.Color.green())
         async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT count, role_id FROM participation_roles ORDER BY count ASC")
+            await cursor.execute("SELECT count, role_id FROM participation_roles WHERE guild_id = ? ORDER BY count ASC", (ctx.guild.id,))
             rows = await cursor.fetchall()
             if not rows:
                 embed.description = "No participation roles configured.\nUse `!config-participation set <count> <@role>` to add one."
@@ -275,9 +533,8 @@ class ConfigCog(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def participation_set(self, ctx, count: int, role: discord.Role):
         """Sets a role for an event participation milestone."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("INSERT OR REPLACE INTO participation_roles (count, role_id) VALUES (?, ?)", (count, role.id))
-        await self.bot.db.commit()
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("INSERT OR REPLACE INTO participation_roles (guild_id, count, role_id) VALUES (?, ?, ?)", (ctx.guild.id, count, role.id))
         await ctx.send(f"✅ Participation role for **{count} events** set to {role.mention}.")
 
     # --- Cyclical Award Configuration ---
@@ -290,12 +547,12 @@ class ConfigCog(commands.Cog):
         """Lists all configured cyclical awards."""
         embed = discord.Embed(title="Cyclical Award Configurations", color=discord.Color.purple())
         async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT award_name, award_type, frequency, role_id, target_id FROM award_configs")
+            await cursor.execute("SELECT award_name, award_type, frequency, role_id, target_id, winner_count FROM award_configs WHERE guild_id = ?", (ctx.guild.id,))
             rows = await cursor.fetchall()
             if not rows:
                 embed.description = "No awards configured.\nUse `!config-award create ...` to add one."
             else:
-                for name, type, freq, role_id, target_id in rows:
+                for name, type, freq, role_id, target_id, winner_count in rows:
                     role = ctx.guild.get_role(role_id)
                     target_str = ""
                     if target_id:
@@ -305,7 +562,7 @@ class ConfigCog(commands.Cog):
                     
                     embed.add_field(
                         name=f"`{name}` ({freq.capitalize()})",
-                        value=f"**Type:** {type.capitalize()}{target_str}\n**Role:** {role.mention if role else 'Deleted Role'}",
+                        value=f"**Type:** {type.capitalize()}{target_str}\n**Role:** {role.mention if role else 'Deleted Role'}\n**Winners:** {winner_count}",
                         inline=False
                     )
         await ctx.send(embed=embed)
@@ -332,12 +589,32 @@ class ConfigCog(commands.Cog):
         
         target_id = target.id if target else None
 
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("INSERT OR REPLACE INTO award_configs (award_name, award_type, frequency, role_id, target_id) VALUES (?, ?, ?, ?, ?)",
-                                 (award_name, award_type, frequency, role.id, target_id))
-        await self.bot.db.commit()
+        async with self.bot.db.transaction() as cursor:
+            # Upsert so re-creating an award keeps its configured number of winners.
+            await cursor.execute("""
+                INSERT INTO award_configs (guild_id, award_name, award_type, frequency, role_id, target_id) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (guild_id, award_name) DO UPDATE SET
+                    award_type = excluded.award_type, frequency = excluded.frequency,
+                    role_id = excluded.role_id, target_id = excluded.target_id
+            """, (ctx.guild.id, award_name, award_type, frequency, role.id, target_id))
         await ctx.send(f"✅ Award `{award_name}` created successfully!")
 
+    @config_award.command(name="winners", brief="Sets how many members win an award.",
+
+    help="Sets how many of the top members receive an award's role each cycle. Example: `!config-award winners motm 3` gives the role to the three most active members.")
+    @commands.has_permissions(administrator=True)
+    async def award_winners(self, ctx, award_name: str, count: int):
+        """Sets the number of winners (top N) for an award."""
+        if count < 1:
+            return await ctx.send("❌ The number of winners must be at least 1.")
+
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("UPDATE award_configs SET winner_count = ? WHERE guild_id = ? AND award_name = ?", (count, ctx.guild.id, award_name))
+            updated = cursor.rowcount
+        if not updated:
+            return await ctx.send(f"❌ No award named `{award_name}` exists.")
+        await ctx.send(f"✅ Award `{award_name}` will now go to the top **{count}** member(s).")
+
 # This function is required for the bot to load the cog.
 async def setup(bot):
     await bot.add_cog(ConfigCog(bot))
\ No newline at end of file
@@ -2,24 +2,25 @@
 import discord
 from discord.ext import commands
 from datetime import datetime
+import asyncio
 
 class EventsCog(commands.Cog):
+    # Participants per upsert statement (3 parameters each, well under SQLite's variable limit).
+    UPSERT_BATCH_SIZE = 400
+
+    # The reaction members use to sign up for an event.
+    SIGNUP_EMOJI = "✅"
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Message IDs of open events, so reaction events for other messages are ignored without SQL.
+        self.active_event_ids = set()
+        # Events whose sign-ups have been re-read from Discord since the last (re)connect.
+        self.reconciled_event_ids = set()
 
-    async def log_action(self, message: str):
-        """Helper function to send a message to the configured log channel."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT value FROM settings WHERE key = ?", ('log_channel_id',))
-            result = await cursor.fetchone()
-        if result:
-            channel_id = int(result[0])
-            log_channel = self.bot.get_channel(channel_id)
-            if log_channel:
-                try:
-                    await log_channel.send(f"[`{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}`] {message}")
-                except discord.Forbidden:
-                    print(f"Error: Bot could not send message to log channel {channel_id}.")
+    async def log_action(self, guild_id: int, message: str):
+        """Queues a message for the server's log channel (see utils/log_dispatcher.py)."""
+        self.bot.log_dispatcher.log(guild_id, message)
 
     @commands.command(name="event-create", brief="Creates a new community event.",
 
@@ -36,16 +37,17 @@ class EventsCog(commands.Cog):
         
         try:
             event_message = await ctx.send(embed=embed)
-            await event_message.add_reaction("✅")
+            await event_message.add_reaction(self.SIGNUP_EMOJI)
         except discord.Forbidden:
             return await ctx.send("❌ **Error:** I don't have permissions to send messages or add reactions in this channel.")
 
         # Store the event in the database
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("INSERT INTO active_events (message_id, host_id, title) VALUES (?, ?, ?)",
-                                 (event_message.id, ctx.author.id, title))
-        await self.bot.db.commit()
-        await self.log_action(f"**Event Created**: {ctx.author.mention} created event '{title}' in {ctx.channel.mention}.")
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("INSERT INTO active_events (message_id, guild_id, host_id, title, channel_id) VALUES (?, ?, ?, ?, ?)",
+                                 (event_message.id, ctx.guild.id, ctx.author.id, title, ctx.channel.id))
+        self.active_event_ids.add(event_message.id)
+        self.reconciled_event_ids.add(event_message.id)
+        await self.log_action(ctx.guild.id, f"**Event Created**: {ctx.author.mention} created event '{title}' in {ctx.channel.mention}.")
 
     @commands.command(name="event-close", brief="Closes an active event and logs stats.",
 
@@ -60,7 +62,7 @@ class EventsCog(commands.Cog):
         
         # Check if the event is in our database
         async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT host_id, title FROM active_events WHERE message_id = ?", (event_message_id,))
+            await cursor.execute("SELECT host_id, title FROM active_events WHERE message_id = ? AND guild_id = ?", (event_message_id, ctx.guild.id))
             event_data = await cursor.fetchone()
 
         if not event_data:
@@ -73,46 +75,61 @@ class EventsCog(commands.Cog):
             host_user = self.bot.get_user(host_id)
             return await ctx.send(f"❌ **Error:** Only the event host ({host_user.mention if host_user else 'Unknown Host'}) or an Administrator can close this event.")
 
-        # Fetch the original message to get reactions
+        # Fetch the original message so it can be marked as closed
         try:
             event_message = await ctx.channel.fetch_message(event_message_id)
         except discord.NotFound:
             return await ctx.send("❌ **Error:** The original event message seems to have been deleted.")
 
-        participants = set()
-        for reaction in event_message.reactions:
-            if str(reaction.emoji) == "✅":
-                async for user in reaction.users():
-                    if not user.bot:
-                        participants.add(user)
+        # Sign-ups are tracked live from reaction events; only events we haven't
+        # been able to reconcile since connecting are re-read from the message.
+        if event_message_id not in self.reconciled_event_ids:
+            await self.reconcile_event(event_message)
 
-        # Update stats in the database
         async with self.bot.db.cursor() as cursor:
-            # Increment host's count
+            await cursor.execute("SELECT user_id FROM event_participants WHERE message_id = ?", (event_message_id,))
+            participant_ids = [row[0] for row in await cursor.fetchall()]
+
+        # Update stats in the database: one upsert for the host and one batched upsert
+        # for all participants that hands back everyone's new participation count.
+        join_timestamp = datetime.utcnow().isoformat()
+        new_counts = {}
+        async with self.bot.db.transaction() as cursor:
             await cursor.execute("""
-                UPDATE members SET host_count = host_count + 1 WHERE user_id = ?
-            """, (host_id,))
-            # Check if host exists in members table, if not, insert them.
-            if cursor.rowcount == 0:
-                 await cursor.execute("INSERT OR IGNORE INTO members (user_id, join_date, host_count) VALUES (?, ?, 1)", (host_id, datetime.utcnow().isoformat()))
-
-            # Increment participants' counts
-            for member in participants:
-                await cursor.execute("""
-                    UPDATE members SET participation_count = participation_count + 1 WHERE user_id = ?
-                """, (member.id,))
-                if cursor.rowcount == 0:
-                    await cursor.execute("INSERT OR IGNORE INTO members (user_id, join_date, participation_count) VALUES (?, ?, 1)", (member.id, datetime.utcnow().isoformat()))
+                INSERT INTO members (guild_id, user_id, join_date, host_count) VALUES (?, ?, ?, 1)
+                ON CONFLICT (guild_id, user_id) DO UPDATE SET host_count = host_count + 1
+                RETURNING host_count
+            """, (ctx.guild.id, host_id, join_timestamp))
+            host_count = (await cursor.fetchone())[0]
+
+            for start in range(0, len(participant_ids), self.UPSERT_BATCH_SIZE):
+                batch = participant_ids[start:start + self.UPSERT_BATCH_SIZE]
+                placeholders = ", ".join("(?, ?, ?, 1)" for _ in batch)
+                params = [value for user_id in batch for value in (ctx.guild.id, user_id, join_timestamp)]
+                await cursor.execute(f"""
+                    INSERT INTO members (guild_id, user_id, join_date, participation_count) VALUES {placeholders}
+                    ON CONFLICT (guild_id, user_id) DO UPDATE SET participation_count = participation_count + 1
+                    RETURNING user_id, participation_count
+                """, params)
+                new_counts.update(await cursor.fetchall())
 
             # Remove event from active list
             await cursor.execute("DELETE FROM active_events WHERE message_id = ?", (event_message_id,))
-        await self.bot.db.commit()
+            await cursor.execute("DELETE FROM event_participants WHERE message_id = ?", (event_message_id,))
+        # The returned counts keep the in-memory members table in step (see utils/member_stats.py).
+        member_stats = self.bot.member_stats.guild(ctx.guild.id)
+        member_stats.put(host_id, join_timestamp, host_count=host_count)
+        for user_id, participation_count in new_counts.items():
+            member_stats.put(user_id, join_timestamp, participation_count=participation_count)
+        self.active_event_ids.discard(event_message_id)
+        self.reconciled_event_ids.discard(event_message_id)
+        self.bot.leaderboards.invalidate(ctx.guild.id, 'participation', 'hosting')
 
         # Check for and award participation roles
-        await self.check_participation_milestones(ctx, participants)
+        await self.check_participation_milestones(ctx, participant_ids, new_counts)
 
         # Finalize and update the event message
-        participant_mentions = [p.mention for p in participants]
+        participant_mentions = [f"<@{user_id}>" for user_id in participant_ids]
         final_embed = event_message.embeds[0]
         final_embed.color = discord.Color.red()
         final_embed.title = f"[CLOSED] {title}"
@@ -120,39 +137,109 @@ class EventsCog(commands.Cog):
         
         await event_message.edit(embed=final_embed)
         await event_message.clear_reactions()
-        await ctx.send(f"✅ Event '{title}' has been closed. Stats have been updated for {len(participants)} participants and 1 host.")
-        await self.log_action(f"**Event Closed**: {ctx.author.mention} closed event '{title}'. Participants: {len(participants)}")
+        await ctx.send(f"✅ Event '{title}' has been closed. Stats have been updated for {len(participant_ids)} participants and 1 host.")
+        await self.log_action(ctx.guild.id, f"**Event Closed**: {ctx.author.mention} closed event '{title}'. Participants: {len(participant_ids)}")
 
-    async def check_participation_milestones(self, ctx, participants):
-        """Check if any participants have earned a new milestone role."""
+    async def check_participation_milestones(self, ctx, participant_ids, new_counts: dict):
+        """Check if any participants have earned a new milestone role, using the counts returned by the stat upsert."""
         async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT count, role_id FROM participation_roles ORDER BY count DESC")
+            await cursor.execute("SELECT count, role_id FROM participation_roles WHERE guild_id = ? ORDER BY count DESC", (ctx.guild.id,))
             milestones = await cursor.fetchall()
 
         if not milestones:
             return
 
-        for member in participants:
-            async with self.bot.db.cursor() as cursor:
-                await cursor.execute("SELECT participation_count FROM members WHERE user_id = ?", (member.id,))
-                user_data = await cursor.fetchone()
-            
-            if not user_data:
+        async def award(member, role, count_milestone):
+            try:
+                await self.bot.role_changes.change(member, add=(role,), reason=f"Participation: {count_milestone} events")
+                await self.log_action(ctx.guild.id, f"**Participation Award**: Gave {role.mention} to {member.mention} for reaching {count_milestone} events.")
+            except discord.Forbidden:
+                await self.log_action(ctx.guild.id, f"**ERROR**: Failed to give participation role {role.mention} to {member.mention} (Bot role too low?).")
+            except discord.HTTPException as e:
+                # Any other failed call; one member's failure must not stop the rest of event-close.
+                await self.log_action(ctx.guild.id, f"**ERROR**: Failed to give participation role {role.mention} to {member.mention} ({e.status}).")
+
+        awards = []
+        for user_id in participant_ids:
+            member = ctx.guild.get_member(user_id)
+            current_count = new_counts.get(user_id)
+            if member is None or current_count is None:
                 continue
-            
-            current_count = user_data[0]
 
             for count_milestone, role_id in milestones:
                 if current_count >= count_milestone:
                     role = ctx.guild.get_role(role_id)
                     if role and role not in member.roles:
-                        try:
-                            await member.add_roles(role, reason=f"Participation: {count_milestone} events")
-                            await self.log_action(f"**Participation Award**: Gave {role.mention} to {member.mention} for reaching {count_milestone} events.")
-                        except discord.Forbidden:
-                            await self.log_action(f"**ERROR**: Failed to give participation role {role.mention} to {member.mention} (Bot role too low?).")
+                        awards.append(award(member, role, count_milestone))
                         # Stop after awarding the highest qualifying role
                         break
 
+        # Requested together, so they share the role changes window instead of waiting one after another.
+        await asyncio.gather(*awards)
+
+    # --- Live Sign-up Tracking ---
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Loads open events and catches up on reactions added or removed while we were offline."""
+        # active_events.channel_id may not exist until ConfigCog has migrated the schema.
+        config = self.bot.get_cog('ConfigCog')
+        if config:
+            await config.schema_ready.wait()
+        async with self.bot.db.cursor() as cursor:
+            await cursor.execute("SELECT message_id, channel_id FROM active_events")
+            events = await cursor.fetchall()
+        self.active_event_ids = {message_id for message_id, _ in events}
+        self.reconciled_event_ids = set()
+
+        for message_id, channel_id in events:
+            channel = self.bot.get_channel(channel_id) if channel_id else None
+            if not channel:
+                # Events created before channel_id was stored are reconciled when they are closed.
+                continue
+            try:
+                event_message = await channel.fetch_message(message_id)
+            except discord.HTTPException:
+                continue
+            await self.reconcile_event(event_message)
+
+    async def reconcile_event(self, event_message: discord.Message):
+        """Replaces an event's stored sign-ups with the current reactions on its message."""
+        user_ids = set()
+        for reaction in event_message.reactions:
+            if str(reaction.emoji) == self.SIGNUP_EMOJI:
+                async for user in reaction.users():
+                    if not user.bot:
+                        user_ids.add(user.id)
+
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("DELETE FROM event_participants WHERE message_id = ?", (event_message.id,))
+            await cursor.executemany("INSERT INTO event_participants (message_id, user_id) VALUES (?, ?)",
+                                     [(event_message.id, user_id) for user_id in user_ids])
+        self.reconciled_event_ids.add(event_message.id)
+
+    def _is_signup(self, payload: discord.RawReactionActionEvent) -> bool:
+        return (
+            payload.message_id in self.active_event_ids
+            and str(payload.emoji) == self.SIGNUP_EMOJI
+            and payload.user_id != self.bot.user.id
+        )
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        if not self._is_signup(payload) or (payload.member and payload.member.bot):
+            return
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("INSERT OR IGNORE INTO event_participants (message_id, user_id) VALUES (?, ?)",
+                                 (payload.message_id, payload.user_id))
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        if not self._is_signup(payload):
+            return
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("DELETE FROM event_participants WHERE message_id = ? AND user_id = ?",
+                                 (payload.message_id, payload.user_id))
+
 async def setup(bot):
     await bot.add_cog(EventsCog(bot))
\ No newline at end of file
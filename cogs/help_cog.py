@@ -4,12 +4,20 @@ import discord
 
 from discord.ext import commands
 
-import difflib # Used for the "did you mean?" feature
+from collections import Counter
 
 class HelpCog(commands.Cog, name="Help"):
 
     """A robust, dynamic, and context-aware help command."""
 
+    # Minimum trigram similarity (Dice coefficient) for a "did you mean?" suggestion.
+
+    SUGGESTION_CUTOFF = 0.45
+
+    # Rendered embeds kept per (view, permission set); the cache is simply cleared when full.
+
+    MAX_CACHED_EMBEDS = 256
+
     def __init__(self, bot: commands.Bot):
 
         self.bot = bot
@@ -18,10 +26,114 @@ class HelpCog(commands.Cog, name="Help"):
 
         self.hidden_cogs = ["Help", "ListenersCog"]
 
+        self.command_index = {}
+
+        self.cog_index = {}
+
+        self.ngram_index = {}
+
+        self.embed_cache = {}
+
+    async def cog_load(self):
+
+        """Builds the lookup indexes once. HelpCog is loaded last, so every other command already exists."""
+
+        self.build_index()
+
+    def build_index(self):
+
+        """
+
+        Indexes every command, alias and group subcommand (e.g. `config-award create`)
+
+        for exact lookups, and their trigrams for "did you mean?" suggestions.
+
+        """
+
+        self.command_index = {}
+
+        self.ngram_index = {}
+
+        self.embed_cache = {}
+
+        for command in self.bot.walk_commands():
+
+            parent = f"{command.full_parent_name} " if command.full_parent_name else ""
+
+            for name in [command.name, *command.aliases]:
+
+                self.command_index[f"{parent}{name}".lower()] = command
+
+        self.cog_index = {cog_name.lower(): cog for cog_name, cog in self.bot.cogs.items()}
+
+        for name, command in self.command_index.items():
+
+            if command.hidden:
+
+                continue
+
+            for gram in self._trigrams(name):
+
+                self.ngram_index.setdefault(gram, set()).add(name)
+
+    @staticmethod
+
+    def _trigrams(text: str) -> set:
+
+        padded = f"  {text.lower()} "
+
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def suggest(self, query: str):
+
+        """Returns the indexed command name most similar to `query`, or None."""
+
+        query_grams = self._trigrams(query)
+
+        shared = Counter()
+
+        for gram in query_grams:
+
+            shared.update(self.ngram_index.get(gram, ()))
+
+        best_name, best_score = None, 0.0
+
+        for name, common in shared.items():
+
+            score = 2 * common / (len(query_grams) + len(self._trigrams(name)))
+
+            if score > best_score or (score == best_score and best_name and name < best_name):
+
+                best_name, best_score = name, score
+
+        return best_name if best_score >= self.SUGGESTION_CUTOFF else None
+
+    async def _permission_key(self, ctx: commands.Context):
+
+        """The caller's effective permissions and whether they own the bot, which is all the bot's command checks depend on."""
+
+        return (ctx.permissions.value if ctx.guild else None, await self.bot.is_owner(ctx.author))
+
+    def _cache_embed(self, key, embed: discord.Embed) -> discord.Embed:
+
+        if len(self.embed_cache) >= self.MAX_CACHED_EMBEDS:
+
+            self.embed_cache.clear()
+
+        self.embed_cache[key] = embed
+
+        return embed
+
     async def send_cog_help(self, ctx: commands.Context, cog: commands.Cog):
 
         """Sends a detailed embed for a specific cog/category."""
 
+        key = ('cog', cog.qualified_name, ctx.prefix, await self._permission_key(ctx))
+
+        if (embed := self.embed_cache.get(key)):
+
+            return await ctx.send(embed=embed)
+
         embed = discord.Embed(
 
             title=f"Category: {cog.qualified_name}",
@@ -62,12 +174,18 @@ class HelpCog(commands.Cog, name="Help"):
 
         
 
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self._cache_embed(key, embed))
 
     async def send_command_help(self, ctx: commands.Context, command: commands.Command):
 
         """Sends a detailed embed for a specific command."""
 
+        key = ('command', command.qualified_name, ctx.prefix)
+
+        if (embed := self.embed_cache.get(key)):
+
+            return await ctx.send(embed=embed)
+
         embed = discord.Embed(
 
             title=f"Command: {command.name}",
@@ -98,7 +216,7 @@ class HelpCog(commands.Cog, name="Help"):
 
         
 
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self._cache_embed(key, embed))
 
     async def filter_commands(self, commands_to_filter, ctx):
 
@@ -140,6 +258,14 @@ class HelpCog(commands.Cog, name="Help"):
 
             # --- Main Help Embed (No Query) ---
 
+            # Rendered once per permission set; later calls with the same permissions are a dict lookup.
+
+            key = ('main', ctx.prefix, await self._permission_key(ctx))
+
+            if (embed := self.embed_cache.get(key)):
+
+                return await ctx.send(embed=embed)
+
             embed = discord.Embed(
 
                 title="Bot Help Menu",
@@ -172,17 +298,17 @@ class HelpCog(commands.Cog, name="Help"):
 
                     embed.add_field(name=cog_name, value=command_list, inline=False)
 
-            await ctx.send(embed=embed)
+            await ctx.send(embed=self._cache_embed(key, embed))
 
             return
 
         # --- Specific Help (Query Provided) ---
 
-        
+        query = " ".join(query.lower().split())
 
-        # Check if the query is a command
+        # Check if the query is a command, alias or subcommand
 
-        if (command := self.bot.get_command(query.lower())):
+        if (command := self.command_index.get(query)):
 
             await self.send_command_help(ctx, command)
 
@@ -192,29 +318,21 @@ class HelpCog(commands.Cog, name="Help"):
 
         # Check if the query is a cog/category
 
-        for cog_name, cog in self.bot.cogs.items():
+        if (cog := self.cog_index.get(query)):
 
-            if query.lower() == cog_name.lower():
+            await self.send_cog_help(ctx, cog)
 
-                await self.send_cog_help(ctx, cog)
-
-                return
+            return
 
         # --- "Did you mean?" Feature ---
 
-        all_command_names = [cmd.name for cmd in self.bot.commands if not cmd.hidden]
+        # Find the best match for the user's query among all commands and subcommands
 
-        
-
-        # Find the best match for the user's query
-
-        best_match = difflib.get_close_matches(query, all_command_names, n=1, cutoff=0.6)
+        suggestion = self.suggest(query)
 
         
 
-        if best_match:
-
-            suggestion = best_match[0]
+        if suggestion:
 
             await ctx.send(f"❌ Command not found. Did you mean `{ctx.prefix}{suggestion}`?")
 
@@ -224,4 +342,4 @@ class HelpCog(commands.Cog, name="Help"):
 
 async def setup(bot):
 
-    await bot.add_cog(HelpCog(bot))
\ No newline at end of file
+    await bot.add_cog(HelpCog(bot))
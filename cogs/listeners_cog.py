@@ -26,6 +26,9 @@ class ListenersCog(commands.Cog):
         elif isinstance(error, commands.MissingPermissions):
             await ctx.send(f"⛔ You don't have permission to use the `{ctx.command.name}` command.")
 
+        elif isinstance(error, commands.NotOwner):
+            await ctx.send(f"⛔ The `{ctx.command.qualified_name}` command affects every server, so only the bot's owners can use it.")
+
         elif isinstance(error, commands.MissingRequiredArgument):
             # Provides the user with the correct command usage
             await ctx.send(f"🤔 You're missing an argument. Correct usage: `{ctx.prefix}{ctx.command.qualified_name} {ctx.command.signature}`")
@@ -0,0 +1,275 @@
+# cogs/maintenance_cog.py
+import discord
+from discord.ext import commands, tasks
+from datetime import datetime, timezone
+import asyncio
+import os
+import time
+
+# PRAGMA auto_vacuum values
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class MaintenanceCog(commands.Cog):
+    """
+    Background SQLite upkeep: hands free pages back to the filesystem (incremental_vacuum),
+    refreshes query planner statistics (optimize) and truncates the WAL.
+    Work is done in short time-boxed slices, and only while the server is quiet.
+    """
+    # Minutes between maintenance checks.
+    INTERVAL_MINUTES = 30
+    # A check only does work if message activity since the previous check was below this rate.
+    QUIET_MESSAGES_PER_MINUTE = 10
+    # Time budget for one slice; anything left over continues at the next quiet check.
+    SLICE_SECONDS = 0.5
+    # Pages freed per incremental_vacuum step. Other coroutines get the writer between steps.
+    VACUUM_STEP_PAGES = 256
+    # PRAGMA optimize runs at most this often.
+    OPTIMIZE_INTERVAL_HOURS = 24
+    # When shard groups run as separate processes, one of them owns background maintenance
+    # (see utils/leases.py). The lease outlives two check intervals so a stopped owner is replaced.
+    LEASE_SECONDS = INTERVAL_MINUTES * 60 * 2
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.last_result = None
+        self.last_skip = None
+        self.last_optimize = 0.0
+        self.runs = 0
+        self._last_check = time.monotonic()
+        self._messages_at_last_check = self.bot.activity_buffer.rows_buffered
+        self._lock = asyncio.Lock()
+        self.maintenance.change_interval(minutes=self.INTERVAL_MINUTES)
+        self.maintenance.start()
+
+    def cog_unload(self):
+        self.maintenance.cancel()
+
+    async def log_action(self, guild_id: int, message: str):
+        """Queues a message for the server's log channel (see utils/log_dispatcher.py)."""
+        self.bot.log_dispatcher.log(guild_id, message)
+
+    async def _pragma(self, name: str):
+        async with self.bot.db.execute(f"PRAGMA {name}") as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def measure(self) -> dict:
+        """Current file size, free pages and WAL size."""
+        page_size = await self._pragma("page_size")
+        page_count = await self._pragma("page_count")
+        freelist_count = await self._pragma("freelist_count")
+        wal_path = f"{self.bot.db.path}-wal"
+        return {
+            "page_size": page_size,
+            "page_count": page_count,
+            "freelist_count": freelist_count,
+            "file_bytes": page_size * page_count,
+            "fragmentation": freelist_count / page_count if page_count else 0.0,
+            "wal_bytes": os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+            "auto_vacuum": await self._pragma("auto_vacuum"),
+        }
+
+    @tasks.loop(minutes=30)
+    async def maintenance(self):
+        """Runs a maintenance slice if message activity has been quiet since the last check."""
+        await self.bot.wait_until_ready()
+
+        now = time.monotonic()
+        minutes = (now - self._last_check) / 60
+        messages = self.bot.activity_buffer.rows_buffered - self._messages_at_last_check
+        # The first iteration fires at startup, before there is anything to measure.
+        if minutes < 1:
+            return
+        self._last_check = now
+        self._messages_at_last_check += messages
+
+        # The database is shared by every shard process; only the owner of the lease maintains it.
+        # The loop keeps the lease between checks, so it is renewed once held.
+        leases = self.bot.leases
+        if not (await leases.renew('db-maintenance', 0, self.LEASE_SECONDS)
+                or await leases.acquire('db-maintenance', 0, self.LEASE_SECONDS)):
+            return
+
+        rate = messages / minutes
+        if rate >= self.QUIET_MESSAGES_PER_MINUTE:
+            self.last_skip = (datetime.now(timezone.utc), rate)
+            return
+
+        try:
+            result = await self.run_slice()
+        except Exception as e:
+            print(f"Error: Database maintenance failed: {e}")
+            return
+        # Quiet slices that found nothing to do aren't worth a log line; the daily optimize run always is.
+        # The database is shared by every server, so the result goes to the console and to the
+        # log channel of each server this process serves that has one.
+        if result["reclaimed_bytes"] or result["optimized"]:
+            summary = self.describe(result)
+            print(summary)
+            for guild in self.bot.guilds:
+                if self.bot.settings.guild(guild.id).log_channel_id:
+                    await self.log_action(guild.id, summary)
+
+    async def run_slice(self, budget: float = None) -> dict:
+        """One time-boxed maintenance pass. Returns what it did."""
+        budget = self.SLICE_SECONDS if budget is None else budget
+        async with self._lock:
+            # Buffered activity keeps accumulating in memory while the slice holds the writer.
+            async with self.bot.activity_buffer.lock:
+                before = await self.measure()
+                start = time.perf_counter()
+                deadline = start + budget
+
+                vacuum_steps = 0
+                if before["auto_vacuum"] == 2:
+                    while before["freelist_count"] and time.perf_counter() < deadline:
+                        # incremental_vacuum frees one page per step, so the rows must be drained.
+                        # The writer lock keeps the step out of another coroutine's transaction (see utils/database.py).
+                        async with self.bot.db.lock:
+                            async with self.bot.db.execute(f"PRAGMA incremental_vacuum({self.VACUUM_STEP_PAGES})") as cursor:
+                                await cursor.fetchall()
+                        vacuum_steps += 1
+                        if not await self._pragma("freelist_count"):
+                            break
+                        await asyncio.sleep(0)
+
+                optimized = False
+                if time.time() - self.last_optimize >= self.OPTIMIZE_INTERVAL_HOURS * 3600 and time.perf_counter() < deadline:
+                    async with self.bot.db.lock:
+                        await self.bot.db.execute("PRAGMA optimize")
+                    self.last_optimize = time.time()
+                    optimized = True
+
+                async with self.bot.db.lock:
+                    async with self.bot.db.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cursor:
+                        checkpoint_busy, _, _ = await cursor.fetchone()
+
+                after = await self.measure()
+                elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.runs += 1
+        self.last_result = {
+            "at": datetime.now(timezone.utc),
+            "elapsed_ms": elapsed_ms,
+            "vacuum_steps": vacuum_steps,
+            "reclaimed_bytes": before["file_bytes"] - after["file_bytes"],
+            "fragmentation_before": before["fragmentation"],
+            "fragmentation_after": after["fragmentation"],
+            "free_pages_left": after["freelist_count"],
+            "wal_before": before["wal_bytes"],
+            "wal_after": after["wal_bytes"],
+            "checkpoint_busy": bool(checkpoint_busy),
+            "optimized": optimized,
+            "file_bytes": after["file_bytes"],
+        }
+        return self.last_result
+
+    @staticmethod
+    def describe(result: dict) -> str:
+        line = (
+            f"**DB Maintenance**: reclaimed {format_bytes(result['reclaimed_bytes'])} "
+            f"(fragmentation {result['fragmentation_before']:.1%} → {result['fragmentation_after']:.1%}), "
+            f"WAL {format_bytes(result['wal_before'])} → {format_bytes(result['wal_after'])}"
+        )
+        if result["checkpoint_busy"]:
+            line += " (checkpoint busy, will retry)"
+        if result["optimized"]:
+            line += ", planner statistics refreshed"
+        return line + f" in {result['elapsed_ms']:.0f}ms."
+
+    @commands.group(name="db-maintenance", brief="(Admin) Database maintenance status and controls.",
+
+    help="Parent command for the background database maintenance. Use `status` to see the schedule and last results, `run` to run a slice now, or `vacuum` to rebuild the file once so free space can be reclaimed incrementally.", invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def db_maintenance(self, ctx):
+        """Parent command for database maintenance."""
+        await ctx.send("Invalid subcommand. Use `status`, `run` or `vacuum`. Example: `!db-maintenance status`")
+
+    @db_maintenance.command(name="status", brief="Shows the maintenance schedule and last results.",
+
+    help="Shows when database maintenance runs, the current file size, fragmentation and WAL size, and what the last maintenance slice reclaimed.")
+    @commands.has_permissions(administrator=True)
+    async def maintenance_status(self, ctx):
+        """Shows the maintenance schedule and the last results."""
+        current = await self.measure()
+        embed = discord.Embed(title="Database Maintenance", color=discord.Color.blue())
+
+        next_run = self.maintenance.next_iteration
+        schedule = f"Every **{self.INTERVAL_MINUTES}** min when under **{self.QUIET_MESSAGES_PER_MINUTE}** msgs/min, **{self.SLICE_SECONDS:g}**s slices"
+        if next_run:
+            schedule += f"\nNext check <t:{int(next_run.timestamp())}:R>"
+        owner = await self.bot.leases.holder('db-maintenance', 0)
+        if owner and owner != self.bot.leases.owner:
+            schedule += f"\nBackground runs are done by `{owner}`"
+        embed.add_field(name="Schedule", value=schedule, inline=False)
+
+        mode = AUTO_VACUUM_MODES.get(current["auto_vacuum"], "unknown")
+        if current["auto_vacuum"] != 2:
+            mode += " (run `!db-maintenance vacuum` once to enable reclaiming)"
+        embed.add_field(name="Auto-Vacuum", value=mode, inline=False)
+        embed.add_field(name="File Size", value=f"**{format_bytes(current['file_bytes'])}**", inline=True)
+        embed.add_field(name="Fragmentation", value=f"**{current['fragmentation']:.1%}** ({current['freelist_count']} free pages)", inline=True)
+        embed.add_field(name="WAL Size", value=f"**{format_bytes(current['wal_bytes'])}**", inline=True)
+
+        if self.last_result:
+            result = self.last_result
+            embed.add_field(
+                name=f"Last Run (<t:{int(result['at'].timestamp())}:R>, {self.runs} total)",
+                value=self.describe(result).replace("**DB Maintenance**: ", ""),
+                inline=False
+            )
+        else:
+            embed.add_field(name="Last Run", value="No maintenance has run since startup.", inline=False)
+        if self.last_skip:
+            skipped_at, rate = self.last_skip
+            embed.add_field(name="Last Skipped", value=f"<t:{int(skipped_at.timestamp())}:R> ({rate:.1f} msgs/min)", inline=False)
+        await ctx.send(embed=embed)
+
+    @db_maintenance.command(name="run", brief="(Bot owner) Runs a maintenance slice now.",
+
+    help="Runs one maintenance slice immediately, regardless of current activity, and shows what it reclaimed. The database is shared by every server, so only the bot's owners can run it.")
+    # Shared by every server, so a server administrator isn't enough.
+    @commands.is_owner()
+    async def maintenance_run(self, ctx):
+        """Runs a maintenance slice immediately."""
+        result = await self.run_slice()
+        await ctx.send(f"✅ {self.describe(result)}")
+        await self.log_action(ctx.guild.id, self.describe(result) + f" (run by {ctx.author.mention})")
+
+    @db_maintenance.command(name="vacuum", brief="(Bot owner) Rebuilds the database file once.",
+
+    help="Runs a full VACUUM, which rebuilds the whole database file and switches it to incremental auto-vacuum so later maintenance can reclaim space in small slices. The bot's database writes pause for every server while it runs, so only the bot's owners can run it; use it during a quiet period.")
+    # Shared by every server, so a server administrator isn't enough.
+    @commands.is_owner()
+    async def maintenance_vacuum(self, ctx):
+        """Runs a one-off full VACUUM."""
+        await ctx.send("⚙️ Rebuilding the database file... Database writes are paused until this finishes.")
+        async with self._lock:
+            # Holding the buffer's lock pauses activity flushes; messages keep accumulating in memory.
+            async with self.bot.activity_buffer.lock:
+                await self.bot.activity_buffer.write_pending()
+                before = await self.measure()
+                start = time.perf_counter()
+                # Every other write waits for the writer lock, so no transaction can be open when VACUUM starts
+                # or begin while it runs (VACUUM fails inside a transaction).
+                async with self.bot.db.lock:
+                    await self.bot.db.execute("VACUUM")
+                after = await self.measure()
+        elapsed = time.perf_counter() - start
+        await ctx.send(
+            f"✅ VACUUM complete in {elapsed:.1f}s. Size {format_bytes(before['file_bytes'])} → {format_bytes(after['file_bytes'])}, "
+            f"auto-vacuum is now **{AUTO_VACUUM_MODES.get(after['auto_vacuum'], 'unknown')}**."
+        )
+        await self.log_action(ctx.guild.id, f"**DB Vacuum**: {ctx.author.mention} rebuilt the database file ({format_bytes(before['file_bytes'])} → {format_bytes(after['file_bytes'])}).")
+
+
+async def setup(bot):
+    await bot.add_cog(MaintenanceCog(bot))
@@ -2,25 +2,33 @@
 import discord
 from discord.ext import commands, tasks
 from datetime import datetime, timezone
-import json
+import asyncio
+import time
 
 class MembershipCog(commands.Cog):
+    # Maximum number of servers whose tenure check runs at the same time.
+    GUILD_CONCURRENCY = 4
+    # How long one process may own a server's tenure check (see utils/leases.py).
+    TENURE_LEASE_SECONDS = 3600
+    # Members in the database but missing from the server's member list are looked at again after
+    # this many days, or as soon as they join again.
+    TENURE_ABSENT_RECHECK_DAYS = 7
+    # Members read and written per !sync-members batch; the sync's position is saved with each batch.
+    SYNC_BATCH_SIZE = 500
+    # Minimum seconds between edits of the sync's progress message.
+    SYNC_PROGRESS_SECONDS = 3
+    # A running sync renews its lease with every batch.
+    SYNC_LEASE_SECONDS = 300
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         # The database setup is now handled by the ConfigCog, so we don't need it here.
         # Start the background task to check tenure
         self.tenure_check.start()
 
-    async def log_action(self, message: str):
-        """Helper function to send a message to the configured log channel."""
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT value FROM settings WHERE key = ?", ('log_channel_id',))
-            result = await cursor.fetchone()
-        if result:
-            channel_id = int(result[0])
-            log_channel = self.bot.get_channel(channel_id)
-            if log_channel:
-                await log_channel.send(f"[`{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}`] {message}")
+    async def log_action(self, guild_id: int, message: str):
+        """Queues a message for the server's log channel (see utils/log_dispatcher.py)."""
+        self.bot.log_dispatcher.log(guild_id, message)
 
     @commands.command(name="accept",
                      brief="Accepts new members into the alliance.", # This shows up in category lists
@@ -32,94 +40,239 @@ class MembershipCog(commands.Cog):
         if not members:
             return await ctx.send("Please mention at least one member to accept.")
 
-        # Get configured roles from DB
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT value FROM settings WHERE key = 'accept_add_roles'")
-            add_roles_res = await cursor.fetchone()
-            await cursor.execute("SELECT value FROM settings WHERE key = 'accept_remove_roles'")
-            remove_roles_res = await cursor.fetchone()
+        # Get configured roles from the settings cache
+        settings = self.bot.settings.guild(ctx.guild.id)
+        add_role_ids = settings.accept_add_roles
+        remove_role_ids = settings.accept_remove_roles
 
-        add_role_ids = json.loads(add_roles_res[0]) if add_roles_res else []
-        remove_role_ids = json.loads(remove_roles_res[0]) if remove_roles_res else []
+        roles_to_add = list(dict.fromkeys(role for role in map(ctx.guild.get_role, add_role_ids) if role))
+        roles_to_remove = {role for role in map(ctx.guild.get_role, remove_role_ids) if role}
 
-        roles_to_add = [ctx.guild.get_role(rid) for rid in add_role_ids if ctx.guild.get_role(rid)]
-        roles_to_remove = [ctx.guild.get_role(rid) for rid in remove_role_ids if ctx.guild.get_role(rid)]
-        
-        accepted_members = []
-        failed_members = []
+        # A member mentioned twice is only accepted once.
+        members = list({member.id: member for member in members}.values())
+        reason = f"Accepted by {ctx.author}"
 
-        for member in members:
+        async def apply_roles(member):
+            # The role changes coalescer turns the adds and removes into one request (or none if nothing changes).
             try:
-                # Perform role changes
-                await member.add_roles(*roles_to_add, reason=f"Accepted by {ctx.author}")
-                await member.remove_roles(*roles_to_remove, reason=f"Accepted by {ctx.author}")
-
-                # Record their official join date in the database
-                join_timestamp = datetime.utcnow().isoformat()
-                async with self.bot.db.cursor() as cursor:
-                    # Use INSERT OR REPLACE to handle cases where a member might already exist from a sync
-                    await cursor.execute("""
-                        INSERT OR REPLACE INTO members (user_id, join_date, participation_count, host_count)
-                        VALUES (?, ?, (SELECT participation_count FROM members WHERE user_id = ?), (SELECT host_count FROM members WHERE user_id = ?))
-                    """, (member.id, join_timestamp, member.id, member.id))
-                
-                accepted_members.append(member.mention)
+                await self.bot.role_changes.change(member, add=roles_to_add, remove=roles_to_remove, reason=reason)
             except discord.Forbidden:
-                failed_members.append(f"{member.mention} (Missing Permissions)")
+                return "Missing Permissions"
             except Exception as e:
-                failed_members.append(f"{member.mention} (Error: {e})")
-        
-        await self.bot.db.commit()
+                return f"Error: {e}"
+            return None
+
+        errors = await asyncio.gather(*(apply_roles(member) for member in members))
+        accepted = [member for member, error in zip(members, errors) if error is None]
+        accepted_members = [member.mention for member in accepted]
+        failed_members = [f"{member.mention} ({error})" for member, error in zip(members, errors) if error is not None]
+
+        # Record their official join dates in one upsert; existing stats are kept.
+        # next_tenure_due = 0 makes the tenure check pick them up again with the new date.
+        if accepted:
+            join_timestamp = datetime.utcnow().isoformat()
+            placeholders = ", ".join("(?, ?, ?, 0)" for _ in accepted)
+            params = [value for member in accepted for value in (ctx.guild.id, member.id, join_timestamp)]
+            async with self.bot.db.transaction() as cursor:
+                await cursor.execute(f"""
+                    INSERT INTO members (guild_id, user_id, join_date, next_tenure_due) VALUES {placeholders}
+                    ON CONFLICT (guild_id, user_id) DO UPDATE SET join_date = excluded.join_date, next_tenure_due = 0, departed_at = NULL
+                """, params)
+            member_stats = self.bot.member_stats.guild(ctx.guild.id)
+            for member in accepted:
+                member_stats.put(member.id, join_timestamp, join_date=join_timestamp, next_tenure_due=0, departed_at=None)
 
         if accepted_members:
             await ctx.send(f"✅ Successfully accepted: {', '.join(accepted_members)}. Welcome to the alliance!")
-            await self.log_action(f"**Accept**: {ctx.author.mention} accepted {', '.join(accepted_members)}.")
+            await self.log_action(ctx.guild.id, f"**Accept**: {ctx.author.mention} accepted {', '.join(accepted_members)}.")
         if failed_members:
             await ctx.send(f"❌ Failed to accept: {', '.join(failed_members)}.")
 
     # --- NEW COMMANDS FOR BACKFILLING DATA ---
 
-    @commands.command(name="sync-members", brief="(Admin) Backfills the database with all server members.",
+    @commands.command(name="sync-members", brief="(Admin) Syncs the database with the server's member list.",
 
-    help="A one-time utility to add all existing server members to the bot's database. It uses their Discord server join date as a default, which can be corrected with `!set-joindate`. This will not overwrite existing entries.")
+    help="Adds every server member who isn't in the database yet, using their Discord server join date as a default (correct it with `!set-joindate`), and marks members who have left so tenure checks and leaderboards skip them. Existing entries are not overwritten. Members are read and written in batches while a progress message is updated; if the bot restarts partway, the sync continues where it stopped.")
     @commands.has_permissions(administrator=True)
     async def sync_members(self, ctx):
         """
-        (Run Once) Backfills the database with existing server members.
+        Adds missing server members to the database and marks departed ones.
         Uses their server join date as a default. Will not overwrite existing entries.
         """
-        await ctx.send("⚙️ Starting member synchronization... This may take a moment for a large server.")
-        
-        # Get all user IDs already in our database
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT user_id FROM members")
-            existing_member_ids = {row[0] for row in await cursor.fetchall()}
-        
-        all_server_members = ctx.guild.members
-        new_members_to_add = []
-        
-        for member in all_server_members:
-            # Skip bots and members who are already in the database
-            if member.bot or member.id in existing_member_ids:
-                continue
-            
-            # Use the server join date as the default join date
-            join_date_iso = member.joined_at.isoformat()
-            new_members_to_add.append((member.id, join_date_iso, 0, 0))
+        async with self.bot.db.read("SELECT started_at FROM member_syncs WHERE guild_id = ?", (ctx.guild.id,)) as cursor:
+            row = await cursor.fetchone()
+        if row:
+            progress = await ctx.send(f"⚙️ Resuming the member sync started <t:{row[0]}:R>...")
+        else:
+            progress = await ctx.send("⚙️ Starting member synchronization... This may take a moment for a large server.")
+
+        # The sync's position is stored with every batch, so a restart picks it up again (see on_ready).
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("""
+                INSERT INTO member_syncs (guild_id, started_at, channel_id, message_id) VALUES (?, ?, ?, ?)
+                ON CONFLICT (guild_id) DO UPDATE SET channel_id = excluded.channel_id, message_id = excluded.message_id
+            """, (ctx.guild.id, int(datetime.now(timezone.utc).timestamp()), ctx.channel.id, progress.id))
 
-        if not new_members_to_add:
-            return await ctx.send("✅ Synchronization complete. No new members needed to be added to the database.")
+        result = await self.run_member_sync(ctx.guild, progress)
+        if result:
+            added, departed = result
+            await self.log_action(ctx.guild.id, f"**Member Sync**: {ctx.author.mention} ran a sync, adding {added} members and marking {departed} as departed.")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Continues member syncs that were interrupted by a restart."""
+        config = self.bot.get_cog('ConfigCog')
+        if config:
+            await config.schema_ready.wait()
+        async with self.bot.db.read("SELECT guild_id, channel_id, message_id FROM member_syncs") as cursor:
+            syncs = await cursor.fetchall()
+        for guild_id, channel_id, message_id in syncs:
+            # Servers on shards run by another process are resumed there.
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                continue
+            progress = None
+            channel = guild.get_channel(channel_id) if channel_id else None
+            if channel:
+                try:
+                    progress = await channel.fetch_message(message_id)
+                except discord.HTTPException:
+                    pass
+            print(f"Resuming the member sync of server {guild_id}.")
+            result = await self.run_member_sync(guild, progress)
+            if result:
+                added, departed = result
+                await self.log_action(guild_id, f"**Member Sync**: Resumed after a restart, adding {added} members and marking {departed} as departed.")
 
-        # Use executemany for a highly efficient bulk insert
-        async with self.bot.db.cursor() as cursor:
-            await cursor.executemany(
-                "INSERT INTO members (user_id, join_date, participation_count, host_count) VALUES (?, ?, ?, ?)",
-                new_members_to_add
+    async def run_member_sync(self, guild, progress=None):
+        """
+        Walks the member list in ID order from the stored position, upserting a batch at a time,
+        then marks members who weren't seen as departed. Returns (added, departed), or None if
+        this server's sync is already running.
+        """
+        if not await self.bot.leases.acquire('member-sync', guild.id, self.SYNC_LEASE_SECONDS):
+            await self._edit_progress(progress, "⏳ A member sync for this server is already running.")
+            return None
+        try:
+            async with self.bot.db.read("SELECT started_at, last_user_id, members_seen, members_added FROM member_syncs WHERE guild_id = ?", (guild.id,)) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                # Another run finished this sync while we waited for the lease.
+                await self._edit_progress(progress, "✅ The member sync for this server has already finished.")
+                return None
+            started_at, last_user_id, seen, added = row
+            member_stats = self.bot.member_stats.guild(guild.id)
+
+            last_edit = time.monotonic()
+            async for batch in self._member_pages(guild, last_user_id):
+                rows = [(guild.id, member.id, member.joined_at.isoformat(), started_at) for member in batch if not member.bot and member.joined_at]
+                async with self.bot.db.transaction() as cursor:
+                    if rows:
+                        existing = sum(1 for row in rows if row[1] in member_stats)
+                        # Members already in the database keep their data; they are only marked as seen by this sync.
+                        await cursor.executemany("""
+                            INSERT INTO members (guild_id, user_id, join_date, participation_count, host_count, next_tenure_due, last_synced)
+                            VALUES (?, ?, ?, 0, 0, 0, ?)
+                            ON CONFLICT (guild_id, user_id) DO UPDATE SET last_synced = excluded.last_synced, departed_at = NULL
+                        """, rows)
+                        added += len(rows) - existing
+                    seen += len(batch)
+                    last_user_id = batch[-1].id
+                    await cursor.execute(
+                        "UPDATE member_syncs SET last_user_id = ?, members_seen = ?, members_added = ? WHERE guild_id = ?",
+                        (last_user_id, seen, added, guild.id)
+                    )
+                for _, user_id, join_date, _ in rows:
+                    member_stats.put(user_id, join_date, departed_at=None)
+                await self.bot.leases.renew('member-sync', guild.id, self.SYNC_LEASE_SECONDS)
+
+                if time.monotonic() - last_edit >= self.SYNC_PROGRESS_SECONDS:
+                    last_edit = time.monotonic()
+                    total = f" of ~{guild.member_count}" if guild.member_count else ""
+                    await self._edit_progress(progress, f"⚙️ Syncing members... **{seen}**{total} checked, **{added}** added so far.")
+
+            departed = await self._mark_departed(guild, started_at)
+            async with self.bot.db.transaction() as cursor:
+                await cursor.execute("DELETE FROM member_syncs WHERE guild_id = ?", (guild.id,))
+        finally:
+            await self.bot.leases.release('member-sync', guild.id)
+
+        self.bot.leaderboards.invalidate(guild.id)
+        await self._edit_progress(progress, f"✅ Synchronization complete! Checked **{seen}** members, added **{added}** new members to the database and marked **{departed}** as departed.")
+        return added, departed
+
+    async def _member_pages(self, guild, after_id: int):
+        """Yields the server's members with IDs above `after_id` in ascending ID order, SYNC_BATCH_SIZE at a time."""
+        if guild.chunked:
+            # The member cache is complete, so no API calls are needed.
+            members = sorted((member for member in guild.members if member.id > after_id), key=lambda member: member.id)
+            for start in range(0, len(members), self.SYNC_BATCH_SIZE):
+                yield members[start:start + self.SYNC_BATCH_SIZE]
+            return
+        batch = []
+        async for member in guild.fetch_members(limit=None, after=discord.Object(id=after_id)):
+            batch.append(member)
+            if len(batch) >= self.SYNC_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def _mark_departed(self, guild, started_at: int) -> int:
+        """Marks members this sync didn't see as departed. Returns how many were marked."""
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute(
+                "SELECT user_id FROM members WHERE guild_id = ? AND departed_at IS NULL AND (last_synced IS NULL OR last_synced < ?)",
+                (guild.id, started_at)
             )
-        await self.bot.db.commit()
-
-        await ctx.send(f"✅ Synchronization complete! Added **{len(new_members_to_add)}** new members to the database.")
-        await self.log_action(f"**Member Sync**: {ctx.author.mention} ran a sync, adding {len(new_members_to_add)} members.")
+            # Rows written while the sync ran (e.g. by !accept) have no sync mark but belong to present members.
+            departed = [user_id for (user_id,) in await cursor.fetchall() if guild.get_member(user_id) is None]
+            now_ts = int(datetime.now(timezone.utc).timestamp())
+            await cursor.executemany("UPDATE members SET departed_at = ? WHERE guild_id = ? AND user_id = ?",
+                                     [(now_ts, guild.id, user_id) for user_id in departed])
+        member_stats = self.bot.member_stats.guild(guild.id)
+        for user_id in departed:
+            member_stats.mark_departed(user_id, now_ts)
+        return len(departed)
+
+    @staticmethod
+    async def _edit_progress(progress, content: str):
+        if progress is None:
+            return
+        try:
+            await progress.edit(content=content)
+        except discord.HTTPException:
+            pass
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        """Marks a member who leaves as departed, so tenure checks and leaderboards skip them."""
+        departed_at = int(datetime.now(timezone.utc).timestamp())
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("UPDATE members SET departed_at = ? WHERE guild_id = ? AND user_id = ? AND departed_at IS NULL",
+                                 (departed_at, member.guild.id, member.id))
+        self.bot.member_stats.guild(member.guild.id).mark_departed(member.id, departed_at)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        """A returning member is tracked again with their previous data, and is due for a tenure check."""
+        async with self.bot.db.transaction() as cursor:
+            await cursor.execute("UPDATE members SET departed_at = NULL, next_tenure_due = 0 WHERE guild_id = ? AND user_id = ?",
+                                 (member.guild.id, member.id))
+        self.bot.member_stats.guild(member.guild.id).update(member.id, departed_at=None, next_tenure_due=0)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        """A member who gets the tenure qualifying role is due for a tenure check."""
+        qualifying_role_id = self.bot.settings.guild(after.guild.id).tenure_qualifying_role_id
+        if not qualifying_role_id or after.bot:
+            return
+        had_role = any(role.id == qualifying_role_id for role in before.roles)
+        if not had_role and any(role.id == qualifying_role_id for role in after.roles):
+            async with self.bot.db.transaction() as cursor:
+                await cursor.execute("UPDATE members SET next_tenure_due = 0 WHERE guild_id = ? AND user_id = ?",
+                                     (after.guild.id, after.id))
+            self.bot.member_stats.guild(after.guild.id).update(after.id, next_tenure_due=0)
 
     @commands.command(name="set-joindate", brief="(Admin) Manually sets a member's join date.",
 
@@ -137,36 +290,38 @@ class MembershipCog(commands.Cog):
         except ValueError:
             return await ctx.send("❌ Invalid date format. Please use `YYYY-MM-DD` (e.g., `2023-05-21`).")
 
-        async with self.bot.db.cursor() as cursor:
+        async with self.bot.db.transaction() as cursor:
             # INSERT OR REPLACE is perfect here. It creates if not present, updates if present.
+            # next_tenure_due = 0 makes the tenure check pick them up again with the new date.
             await cursor.execute("""
-                INSERT OR REPLACE INTO members (user_id, join_date, participation_count, host_count)
-                VALUES (?, ?, 
-                    COALESCE((SELECT participation_count FROM members WHERE user_id = ?), 0), 
-                    COALESCE((SELECT host_count FROM members WHERE user_id = ?), 0)
+                INSERT OR REPLACE INTO members (guild_id, user_id, join_date, participation_count, host_count, next_tenure_due)
+                VALUES (?, ?, ?, 
+                    COALESCE((SELECT participation_count FROM members WHERE guild_id = ? AND user_id = ?), 0), 
+                    COALESCE((SELECT host_count FROM members WHERE guild_id = ? AND user_id = ?), 0),
+                    0
                 )
-            """, (member.id, join_date.isoformat(), member.id, member.id))
-        await self.bot.db.commit()
+            """, (ctx.guild.id, member.id, join_date.isoformat(), ctx.guild.id, member.id, ctx.guild.id, member.id))
+        self.bot.member_stats.guild(ctx.guild.id).put(member.id, join_date.isoformat(), join_date=join_date.isoformat(), next_tenure_due=0, departed_at=None)
 
         await ctx.send(f"✅ Successfully set {member.mention}'s join date to **{date_str}**.")
-        await self.log_action(f"**Date Set**: {ctx.author.mention} manually set {member.mention}'s join date to {date_str}.")
+        await self.log_action(ctx.guild.id, f"**Date Set**: {ctx.author.mention} manually set {member.mention}'s join date to {date_str}.")
 
 
     @commands.command(name="check-tenure", brief="(Admin) Manually triggers the tenure check.",
 
-    help="Manually runs the same process that automatically runs every 24 hours to check for and award tenure roles to all eligible members.")
+    help="Manually runs the same process that automatically runs every 24 hours to check for and award tenure roles to all members of this server whose next milestone is due.")
 
     @commands.has_permissions(administrator=True)
 
     async def manual_tenure_check(self, ctx):
 
-        """Manually triggers the daily tenure check for all qualified members."""
+        """Manually triggers the daily tenure check for this server's qualified members."""
 
         await ctx.send("⚙️ Manually starting the tenure check... This may take a moment.")
 
-        # We directly call the background task's function
+        if not await self.check_guild_tenure(ctx.guild):
 
-        await self.tenure_check.coro(self)
+            return await ctx.send("⏳ A tenure check for this server is already running. Try again once it has finished.")
 
         await ctx.send("✅ Manual tenure check complete. See the log channel for details on any roles awarded.")
 
@@ -176,29 +331,55 @@ class MembershipCog(commands.Cog):
 
     async def tenure_check(self):
 
-        """Checks daily for members who have reached a tenure milestone."""
+        """Checks daily, in every server, for members who have reached a tenure milestone."""
 
         await self.bot.wait_until_ready()
 
-        print("Running daily tenure check...")
+        print(f"Running daily tenure check for {len(self.bot.guilds)} servers...")
 
-        guild = self.bot.guilds[0]
+        # Servers are checked concurrently, a few at a time, so each one adds little to the total run time.
 
-        if not guild: return
+        guild_semaphore = asyncio.Semaphore(self.GUILD_CONCURRENCY)
 
-        # NEW: Fetch the qualifying role ID from the database
+        async def check(guild):
 
-        qualifying_role_id = None
+            async with guild_semaphore:
 
-        async with self.bot.db.cursor() as cursor:
+                try:
 
-            await cursor.execute("SELECT value FROM settings WHERE key = ?", ('tenure_qualifying_role_id',))
+                    await self.check_guild_tenure(guild)
 
-            result = await cursor.fetchone()
+                except Exception as e:
 
-            if result:
+                    print(f"Error: Tenure check failed for server {guild.id}: {e}")
+
+        await asyncio.gather(*(check(guild) for guild in self.bot.guilds))
+
+    async def check_guild_tenure(self, guild) -> bool:
+
+        """Awards due tenure roles in one server. False if another process (or run) already owns its check."""
+
+        if not await self.bot.leases.acquire('tenure', guild.id, self.TENURE_LEASE_SECONDS):
+
+            print(f"Skipping tenure check for server {guild.id}: it is already running.")
+
+            return False
+
+        try:
+
+            await self._check_guild_tenure(guild)
+
+        finally:
 
-                qualifying_role_id = int(result[0])
+            await self.bot.leases.release('tenure', guild.id)
+
+        return True
+
+    async def _check_guild_tenure(self, guild):
+
+        # NEW: Fetch the qualifying role ID from the settings cache
+
+        qualifying_role_id = self.bot.settings.guild(guild.id).tenure_qualifying_role_id
 
         
 
@@ -208,47 +389,59 @@ class MembershipCog(commands.Cog):
 
         if qualifying_role_id and not qualifying_role:
 
-            print(f"Warning: Tenure qualifying role ID {qualifying_role_id} is set but not found in the server. No tenure roles will be awarded.")
+            print(f"Warning: Tenure qualifying role ID {qualifying_role_id} is set but not found in server {guild.id}. No tenure roles will be awarded.")
 
             return
 
-        async with self.bot.db.cursor() as cursor:
+        now_utc = datetime.now(timezone.utc)
+
+        now_ts = int(now_utc.timestamp())
 
-            await cursor.execute("SELECT user_id, join_date FROM members")
+        # Only members whose next milestone is due are looked at (see `next_tenure_due`), straight from memory.
 
-            all_members_in_db = await cursor.fetchall()
+        member_stats = self.bot.member_stats.guild(guild.id)
 
-            await cursor.execute("SELECT days, role_id FROM tenure_roles ORDER BY days DESC")
+        async with self.bot.db.cursor() as cursor:
+
+            await cursor.execute("SELECT days, role_id FROM tenure_roles WHERE guild_id = ? ORDER BY days DESC", (guild.id,))
 
             tenure_roles = await cursor.fetchall()
 
         if not tenure_roles: return
 
-        now_utc = datetime.now(timezone.utc)
+        due_members = member_stats.due(now_ts)
 
-        awarded_count = 0
+        milestones_ascending = sorted(days for days, _ in tenure_roles)
 
-        for user_id, join_date_str in all_members_in_db:
+        reschedules = []
+
+        awards = []
+
+        for user_id, join_date in due_members:
 
             member = guild.get_member(user_id)
 
-            if not member: continue
+            # Every member looked at is rescheduled, so only members whose award failed stay due.
 
-            
+            if not member:
 
-            # NEW: Check if the member has the qualifying role (if one is set)
+                reschedules.append((now_ts + self.TENURE_ABSENT_RECHECK_DAYS * 86400, guild.id, user_id))
 
-            if qualifying_role and qualifying_role not in member.roles:
+                continue
 
-                continue # Skip this member if they don't have the required role
+            days_in_alliance = (now_utc - join_date).days
 
-            join_date = datetime.fromisoformat(join_date_str)
+            next_due = self.next_tenure_due(join_date, days_in_alliance, milestones_ascending)
 
-            if join_date.tzinfo is None:
+            # NEW: Check if the member has the qualifying role (if one is set)
 
-                join_date = join_date.replace(tzinfo=timezone.utc)
+            if qualifying_role and qualifying_role not in member.roles:
 
-            days_in_alliance = (now_utc - join_date).days
+                # Looked at again at their next milestone, or right away once they get the role (see on_member_update).
+
+                reschedules.append((next_due, guild.id, user_id))
+
+                continue
 
             for days_milestone, role_id in tenure_roles:
 
@@ -258,23 +451,60 @@ class MembershipCog(commands.Cog):
 
                     if role_to_award and role_to_award not in member.roles:
 
-                        try:
+                        awards.append(self._award_tenure_role(member, role_to_award, days_milestone, next_due))
 
-                            await member.add_roles(role_to_award, reason=f"Tenure: {days_milestone} days")
+                        break
 
-                            await self.log_action(f"**Tenure Award**: Gave {role_to_award.mention} to {member.mention} for reaching {days_milestone} days.")
+                    reschedules.append((next_due, guild.id, user_id))
 
-                            awarded_count += 1
+                    break # Move to the next member after finding their highest eligible role
 
-                        except discord.Forbidden:
+            else:
 
-                            await self.log_action(f"**ERROR**: Failed to give tenure role {role_to_award.mention} to {member.mention} (Permissions).")
+                reschedules.append((next_due, guild.id, user_id))
 
-                    break # Move to the next member after finding their highest eligible role
+        # Awards run concurrently (paced by bot.role_changes); each returns the member's reschedule on success.
 
-        
+        results = await asyncio.gather(*awards)
+
+        reschedules.extend(result for result in results if result)
+
+        awarded_count = sum(1 for result in results if result)
+
+        if reschedules:
+
+            async with self.bot.db.transaction() as cursor:
+
+                await cursor.executemany("UPDATE members SET next_tenure_due = ? WHERE guild_id = ? AND user_id = ?", reschedules)
+
+
+            for next_due, _, user_id in reschedules:
+
+                member_stats.update(user_id, next_tenure_due=next_due)
+
+        print(f"Tenure check complete for server {guild.id}. Checked {len(due_members)} due members, awarded roles to {awarded_count} members.")
+
+    @staticmethod
+    def next_tenure_due(join_date: datetime, days_in_alliance: int, milestones_ascending: list):
+        """Epoch time at which the member reaches their next tenure milestone, or None if there is none left."""
+        for days_milestone in milestones_ascending:
+            if days_milestone > days_in_alliance:
+                return int(join_date.timestamp()) + days_milestone * 86400
+        return None
+
+    async def _award_tenure_role(self, member, role, days_milestone, next_due):
+        """Gives one tenure role. Returns (next_due, guild_id, user_id) on success, None if it failed."""
+        try:
+            await self.bot.role_changes.change(member, add=(role,), reason=f"Tenure: {days_milestone} days")
+        except discord.Forbidden:
+            await self.log_action(member.guild.id, f"**ERROR**: Failed to give tenure role {role.mention} to {member.mention} (Permissions).")
+            return None
+        except discord.HTTPException as e:
+            # Any other failed call; the member stays due and is tried again at the next run.
+            await self.log_action(member.guild.id, f"**ERROR**: Failed to give tenure role {role.mention} to {member.mention} ({e.status}).")
+            return None
+        await self.log_action(member.guild.id, f"**Tenure Award**: Gave {role.mention} to {member.mention} for reaching {days_milestone} days.")
+        return (next_due, member.guild.id, member.id)
 
-        print(f"Tenure check complete. Awarded roles to {awarded_count} members.")
-                    
 async def setup(bot):
     await bot.add_cog(MembershipCog(bot))
\ No newline at end of file
@@ -0,0 +1,170 @@
+# cogs/stats_cog.py
+import discord
+from discord.ext import commands
+import math
+import time
+
+# !stats argument -> metrics family (see utils/metrics.py)
+FAMILY_NAMES = {
+    'commands': 'command', 'command': 'command',
+    'listeners': 'listener', 'listener': 'listener', 'events': 'listener',
+    'sql': 'sql', 'queries': 'sql', 'db': 'sql',
+    'http': 'http', 'rest': 'http', 'api': 'http',
+}
+FAMILY_TITLES = {'command': "Commands", 'listener': "Listeners", 'sql': "SQL Statements", 'http': "Discord REST Calls"}
+# !stats arguments for the per-shard page (see utils/shards.py)
+SHARD_NAMES = {'shards', 'shard', 'gateway'}
+
+
+def format_ms(seconds: float) -> str:
+    ms = seconds * 1000
+    return f"{ms:.2f}ms" if ms < 10 else f"{ms:.0f}ms"
+
+
+class StatsCog(commands.Cog):
+    """Shows the latency histograms recorded by bot.metrics and the slow-query log."""
+    # Entries per family on the overview, and on a single-family page.
+    OVERVIEW_ENTRIES = 5
+    DETAIL_ENTRIES = 15
+    # Long SQL statements are cut to this many characters in the embed.
+    LABEL_CHARACTERS = 70
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @staticmethod
+    def format_shard(shard: dict) -> str:
+        latency = f"{shard['latency'] * 1000:.0f}ms" if math.isfinite(shard["latency"]) else "n/a"
+        state = " (disconnected)" if shard["closed"] else ""
+        return f"`#{shard['shard_id']}` — {latency}, {shard['events_per_second']:.1f} events/s, {shard['guilds']} servers{state}"
+
+    def format_entry(self, label: str, histogram) -> str:
+        if len(label) > self.LABEL_CHARACTERS:
+            label = label[:self.LABEL_CHARACTERS - 1] + "…"
+        return (
+            f"`{label}` — {histogram.count}×, p50 {format_ms(histogram.quantile(0.5))}, "
+            f"p99 {format_ms(histogram.quantile(0.99))}, max {format_ms(histogram.max)}"
+        )
+
+    @commands.command(name="stats", brief="(Admin) Shows command, listener, SQL and API latencies.",
+
+    help="Shows latency percentiles recorded since startup for commands, listeners, SQL statements and Discord REST calls, ordered by total time spent, plus each shard's gateway latency and event rate. Add `commands`, `listeners`, `sql` or `http` to see more entries for one of them, or `shards` for every shard this process runs. Percentiles are estimated from histogram buckets; event rates cover the last minute.")
+    @commands.has_permissions(administrator=True)
+    async def stats(self, ctx, family: str = None):
+        """Shows the recorded latency histograms."""
+        metrics = self.bot.metrics
+        uptime = int(time.time() - metrics.started_at)
+        footer = f"Since startup ({uptime // 3600}h {uptime % 3600 // 60}m)"
+        if math.isfinite(self.bot.latency):
+            footer += f" · gateway latency {self.bot.latency * 1000:.0f}ms"
+
+        if family is not None and family.lower() in SHARD_NAMES:
+            shards = self.bot.shard_monitor.shards()
+            embed = discord.Embed(
+                title=f"Shards: {self.bot.shard_group}",
+                description="\n".join(self.format_shard(shard) for shard in shards)[:4096] or "No shards connected.",
+                color=discord.Color.blue()
+            )
+            embed.set_footer(text=footer)
+            return await ctx.send(embed=embed)
+
+        if family is not None:
+            key = FAMILY_NAMES.get(family.lower())
+            if key is None:
+                return await ctx.send("Invalid category. Use `commands`, `listeners`, `sql`, `http` or `shards`. Example: `!stats sql`")
+            entries = metrics.top(key, self.DETAIL_ENTRIES)
+            description = "\n".join(self.format_entry(label, histogram) for label, histogram in entries)
+            embed = discord.Embed(
+                title=f"Latency: {FAMILY_TITLES[key]}",
+                description=description or "Nothing recorded yet.",
+                color=discord.Color.blue()
+            )
+            embed.set_footer(text=footer)
+            return await ctx.send(embed=embed)
+
+        embed = discord.Embed(title="Latency Overview", color=discord.Color.blue())
+        for key, title in FAMILY_TITLES.items():
+            entries = metrics.top(key, self.OVERVIEW_ENTRIES)
+            value = "\n".join(self.format_entry(label, histogram) for label, histogram in entries)
+            embed.add_field(name=title, value=value[:1024] or "Nothing recorded yet.", inline=False)
+        shards = self.bot.shard_monitor.shards()
+        lines = [self.format_shard(shard) for shard in shards[:self.OVERVIEW_ENTRIES]]
+        if len(shards) > self.OVERVIEW_ENTRIES:
+            lines.append(f"...and {len(shards) - self.OVERVIEW_ENTRIES} more (`!stats shards`)")
+        embed.add_field(name=f"Shards ({self.bot.shard_group})", value="\n".join(lines)[:1024] or "No shards connected.", inline=False)
+        embed.set_footer(text=footer)
+        await ctx.send(embed=embed)
+
+    @commands.group(name="slow-queries", brief="(Admin) Shows recent slow SQL statements and their query plans.",
+
+    help="Parent command for the slow-query log. Statements slower than the threshold (SLOW_QUERY_MS, 100ms by default) are kept with their parameter types, duration and query plan. Use `list` to see the most recent ones, `show <number>` for one statement's full text and plan, `threshold <ms>` to change the threshold until the next restart, or `clear` to empty the log.", invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def slow_queries(self, ctx):
+        """Parent command for the slow-query log."""
+        await ctx.send("Invalid subcommand. Use `list`, `show`, `threshold` or `clear`. Example: `!slow-queries list`")
+
+    @slow_queries.command(name="list", brief="Lists the most recent slow statements.",
+
+    help="Lists the most recent statements that were slower than the threshold, newest first. ⚠️ marks statements whose plan reads all of `activity_log` or `members` without an index.")
+    @commands.has_permissions(administrator=True)
+    async def slow_queries_list(self, ctx):
+        """Lists the most recent slow statements."""
+        log = self.bot.slow_queries
+        embed = discord.Embed(title="Slow Queries", color=discord.Color.orange())
+        lines = []
+        for entry in list(reversed(log.entries))[:self.DETAIL_ENTRIES]:
+            sql = entry["sql"] if len(entry["sql"]) <= self.LABEL_CHARACTERS else entry["sql"][:self.LABEL_CHARACTERS - 1] + "…"
+            flag = "⚠️ " if entry["full_scans"] else ""
+            lines.append(f"**#{entry['number']}** {flag}{entry['elapsed_ms']:.0f}ms ({entry['role']}) <t:{int(entry['at'].timestamp())}:R>\n`{sql}`")
+        embed.description = "\n".join(lines) if lines else "No slow statements recorded."
+        embed.set_footer(text=f"Threshold {log.threshold_ms:g}ms · {log.recorded} recorded since startup, last {log.entries.maxlen} kept · !slow-queries show <number>")
+        await ctx.send(embed=embed)
+
+    @slow_queries.command(name="show", brief="Shows one slow statement with its query plan.",
+
+    help="Shows the full text, parameter types, duration and EXPLAIN QUERY PLAN output of one statement from `!slow-queries list`, by its number.")
+    @commands.has_permissions(administrator=True)
+    async def slow_queries_show(self, ctx, number: int):
+        """Shows one slow statement in full."""
+        entry = self.bot.slow_queries.get(number)
+        if entry is None:
+            return await ctx.send(f"Slow statement #{number} isn't in the log (only the most recent ones are kept). Use `!slow-queries list` to see them.")
+        embed = discord.Embed(title=f"Slow Query #{number}", description=f"```sql\n{entry['sql'][:3900]}\n```", color=discord.Color.orange())
+        embed.add_field(name="Duration", value=f"**{entry['elapsed_ms']:.1f}ms** on the {entry['role']} connection", inline=True)
+        embed.add_field(name="When", value=f"<t:{int(entry['at'].timestamp())}:F>", inline=True)
+        embed.add_field(name="Parameters", value=f"`{entry['shape'][:1000]}`", inline=False)
+        if entry["plan"]:
+            embed.add_field(name="Query Plan", value=f"```\n{chr(10).join(entry['plan'])[:1000]}\n```", inline=False)
+        elif entry["plan"] is not None:
+            embed.add_field(name="Query Plan", value="No tables are read.", inline=False)
+        elif entry["error"]:
+            embed.add_field(name="Query Plan", value=entry["error"][:1024], inline=False)
+        else:
+            embed.add_field(name="Query Plan", value="Not captured for this kind of statement.", inline=False)
+        if entry["full_scans"]:
+            embed.add_field(name="⚠️ Full Scans", value=", ".join(f"`{table}`" for table in entry["full_scans"]), inline=False)
+        await ctx.send(embed=embed)
+
+    @slow_queries.command(name="threshold", brief="Changes the slow-query threshold.",
+
+    help="Sets how slow (in milliseconds) a statement must be to be recorded. The change lasts until the bot restarts; set SLOW_QUERY_MS to make it permanent.")
+    @commands.has_permissions(administrator=True)
+    async def slow_queries_threshold(self, ctx, milliseconds: float):
+        """Changes the slow-query threshold until restart."""
+        if milliseconds <= 0:
+            return await ctx.send("The threshold must be greater than 0ms.")
+        self.bot.slow_queries.threshold_ms = milliseconds
+        await ctx.send(f"✅ Statements slower than **{milliseconds:g}ms** will now be recorded.")
+
+    @slow_queries.command(name="clear", brief="Empties the slow-query log.",
+
+    help="Removes every recorded slow statement and forgets the cached query plans.")
+    @commands.has_permissions(administrator=True)
+    async def slow_queries_clear(self, ctx):
+        """Empties the slow-query log."""
+        self.bot.slow_queries.clear()
+        await ctx.send("✅ Slow-query log cleared.")
+
+
+async def setup(bot):
+    await bot.add_cog(StatsCog(bot))
@@ -1,7 +1,7 @@
 # cogs/utility_cog.py (Corrected)
 import discord
 from discord.ext import commands
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 
 class UtilityCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -9,15 +9,13 @@ class UtilityCog(commands.Cog):
 
     @commands.command(name="profile", brief="Displays a member's alliance profile.",
 
-    help="Shows your own (or another member's) alliance statistics, including tenure, join date, and event participation/hosting counts.")
+    help="Shows your own (or another member's) alliance statistics, including tenure, join date, event participation/hosting counts, and their rank and percentile for activity, participation and hosting.")
     async def profile(self, ctx, member: discord.Member = None):
         """Displays the alliance profile of a member (or yourself)."""
         if member is None:
             member = ctx.author
 
-        async with self.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT join_date, participation_count, host_count FROM members WHERE user_id = ?", (member.id,))
-            user_data = await cursor.fetchone()
+        user_data = self.bot.member_stats.guild(ctx.guild.id).get(member.id)
 
         embed = discord.Embed(title=f"Alliance Profile: {member.display_name}", color=member.color)
         embed.set_thumbnail(url=member.avatar.url)
@@ -25,14 +23,9 @@ class UtilityCog(commands.Cog):
         if not user_data:
             embed.description = "This member is not officially tracked in the alliance database (have they been `!accept`'ed or `!sync-members`'d?)."
         else:
-            # The member's join_date from Discord is timezone-aware (UTC).
-            # We must compare it with a timezone-aware "now".
-            join_date = datetime.fromisoformat(user_data[0])
+            # The join date comes back timezone-aware (UTC), so compare it with an aware "now".
+            join_date = user_data[0]
             now_utc = datetime.now(timezone.utc)
-            
-            # Ensure join_date is also aware for a safe subtraction
-            if join_date.tzinfo is None:
-                join_date = join_date.replace(tzinfo=timezone.utc)
 
             days_in_alliance = (now_utc - join_date).days
             participation_count = user_data[1]
@@ -43,50 +36,117 @@ class UtilityCog(commands.Cog):
             embed.add_field(name="\u200b", value="\u200b", inline=True) # Spacer
             embed.add_field(name="Events Attended", value=f"**{participation_count}**", inline=True)
             embed.add_field(name="Events Hosted", value=f"**{host_count}**", inline=True)
+            embed.add_field(name="\u200b", value="\u200b", inline=True) # Spacer
+
+            # Ranks come from the cached leaderboard snapshots (bisect lookups, no per-call COUNT queries).
+            for stat, label in (('activity', "Activity Rank (30 Days)"), ('participation', "Participation Rank"), ('hosting', "Hosting Rank")):
+                snapshot = await self.bot.leaderboards.get(ctx.guild.id, stat)
+                ranking = snapshot.rank_of(member.id)
+                if ranking:
+                    value, rank, percentile = ranking
+                    _, unit, _ = LEADERBOARD_STYLES[stat]
+                    rank_str = f"**#{rank}** of {len(snapshot)} ({value} {unit})\nPercentile: **{percentile:.0f}**"
+                else:
+                    rank_str = "Unranked"
+                embed.add_field(name=label, value=rank_str, inline=True)
             
         await ctx.send(embed=embed)
 
     @commands.command(name="leaderboard", aliases=['lb'], brief="Shows leaderboards for various stats.",
 
-    help="Displays the top 10 members for a given statistic. Available stats: `activity` (monthly messages), `participation` (for events), `hosting` (event hosting).")
-    async def leaderboard(self, ctx, stat: str = 'activity'):
+    help="Displays the full ranking for a given statistic, 10 members per page. Available stats: `activity` (monthly messages), `participation` (for events), `hosting` (event hosting). Jump to a page with `!lb activity page 7` and use the buttons to move between pages.")
+    async def leaderboard(self, ctx, stat: str = 'activity', *, page: str = '1'):
         """
-        Shows the top 10 members for a given statistic.
+        Shows a page of the ranking for a given statistic.
         Stats: activity, participation, hosting
         """
         stat = stat.lower()
-        embed = discord.Embed(color=discord.Color.gold())
-        
-        async with self.bot.db.cursor() as cursor:
-            if stat == 'activity':
-                embed.title = "Top 10 Most Active Members (Last 30 Days)"
-                # FIX APPLIED HERE
-                time_cutoff = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-                await cursor.execute("""
-                    SELECT user_id, COUNT(*) as msg_count FROM activity_log
-                    WHERE timestamp >= ?
-                    GROUP BY user_id ORDER BY msg_count DESC LIMIT 10
-                """, (time_cutoff,))
-                results = await cursor.fetchall()
-                field_value = "\n".join([f"{i+1}. <@{user_id}> - {count} messages" for i, (user_id, count) in enumerate(results)]) if results else "No activity recorded yet."
-
-            elif stat == 'participation':
-                embed.title = "Top 10 Event Participants"
-                await cursor.execute("SELECT user_id, participation_count FROM members WHERE participation_count > 0 ORDER BY participation_count DESC LIMIT 10")
-                results = await cursor.fetchall()
-                field_value = "\n".join([f"{i+1}. <@{user_id}> - {count} events" for i, (user_id, count) in enumerate(results)]) if results else "No one has participated in events yet."
-
-            elif stat == 'hosting':
-                embed.title = "Top 10 Event Hosts"
-                await cursor.execute("SELECT user_id, host_count FROM members WHERE host_count > 0 ORDER BY host_count DESC LIMIT 10")
-                results = await cursor.fetchall()
-                field_value = "\n".join([f"{i+1}. <@{user_id}> - {count} events" for i, (user_id, count) in enumerate(results)]) if results else "No one has hosted an event yet."
-
-            else:
-                return await ctx.send("Invalid statistic. Please use `activity`, `participation`, or `hosting`.")
-
-        embed.description = field_value
-        await ctx.send(embed=embed)
+        if stat not in LEADERBOARD_STYLES:
+            return await ctx.send("Invalid statistic. Please use `activity`, `participation`, or `hosting`.")
+        try:
+            page_number = int(page.lower().removeprefix('page').strip())
+        except ValueError:
+            return await ctx.send("Invalid page. Example: `!lb activity page 7`")
+
+        # Served from the shared snapshot; only rebuilt when it is stale or invalidated.
+        snapshot = await self.bot.leaderboards.get(ctx.guild.id, stat)
+        start, rows = snapshot.page(page_number, LEADERBOARD_PAGE_SIZE)
+        view = LeaderboardView(ctx.author, snapshot, start, rows)
+        view.message = await ctx.send(embed=view.build_embed(), view=view)
+
+
+# Title, unit and empty-state text for each leaderboard.
+LEADERBOARD_STYLES = {
+    'activity': ("Most Active Members (Last 30 Days)", "messages", "No activity recorded yet."),
+    'participation': ("Top Event Participants", "events", "No one has participated in events yet."),
+    'hosting': ("Top Event Hosts", "events", "No one has hosted an event yet."),
+}
+LEADERBOARD_PAGE_SIZE = 10
+
+
+class LeaderboardView(discord.ui.View):
+    """Previous/next buttons that page through one leaderboard snapshot by keyset cursor."""
+    def __init__(self, author, snapshot, start: int, rows: list):
+        super().__init__(timeout=120)
+        self.author = author
+        self.snapshot = snapshot
+        self.start = start
+        self.rows = rows
+        self.message = None
+        self._update_buttons()
+
+    def build_embed(self) -> discord.Embed:
+        title, unit, empty_text = LEADERBOARD_STYLES[self.snapshot.stat]
+        embed = discord.Embed(title=title, color=discord.Color.gold())
+        if self.rows:
+            embed.description = "\n".join(
+                f"{self.start + i + 1}. <@{user_id}> - {value} {unit}" for i, (user_id, value) in enumerate(self.rows)
+            )
+        else:
+            embed.description = empty_text
+        page_number = self.start // LEADERBOARD_PAGE_SIZE + 1
+        embed.set_footer(text=f"Page {page_number}/{self.snapshot.page_count(LEADERBOARD_PAGE_SIZE)} • {len(self.snapshot)} ranked members")
+        embed.timestamp = datetime.fromtimestamp(self.snapshot.built_at, timezone.utc)
+        return embed
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.start == 0
+        self.next_page.disabled = self.start + len(self.rows) >= len(self.snapshot)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author.id:
+            await interaction.response.send_message("Run `!leaderboard` yourself to browse the rankings.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, start: int, rows: list):
+        if rows:
+            self.start, self.rows = start, rows
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if not self.rows:
+            return await self._show(interaction, self.start, self.rows)
+        first_key = self.snapshot.keys[self.start]
+        await self._show(interaction, *self.snapshot.page_before(first_key, LEADERBOARD_PAGE_SIZE))
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if not self.rows:
+            return await self._show(interaction, self.start, self.rows)
+        last_key = self.snapshot.keys[self.start + len(self.rows) - 1]
+        await self._show(interaction, *self.snapshot.page_after(last_key, LEADERBOARD_PAGE_SIZE))
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
 
 
 async def setup(bot):
@@ -0,0 +1,118 @@
+# utils/activity_buffer.py
+import asyncio
+import time
+from collections import defaultdict
+
+from utils.activity_partitions import month_of
+from utils.rollups import apply_rollups
+
+
+class ActivityBuffer:
+    """
+    Write-behind buffer for activity_log inserts.
+    Messages are collected in memory and written with a single executemany/commit
+    once the buffer reaches `max_rows` or the flush loop in ActivityCog fires.
+    Rows go straight into their month's partition (see utils/activity_partitions.py),
+    and the daily rollups in activity_daily are updated in the same transaction.
+    """
+    # A batch that keeps failing is put back this many times, then dropped, so one bad row
+    # can't block every later flush.
+    MAX_FLUSH_ATTEMPTS = 3
+
+    def __init__(self, db, partitions, max_rows: int = 200, flush_interval: float = 5.0):
+        self.db = db
+        self.partitions = partitions
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self._rows = []
+        self.lock = asyncio.Lock()
+
+        # Counters used by `!activity-buffer` to tune the thresholds.
+        self.rows_buffered = 0
+        self.rows_flushed = 0
+        self.flush_count = 0
+        self.failed_flushes = 0
+        self.rows_dropped = 0
+        # Failed flushes in a row; reset by a successful one.
+        self._failed_attempts = 0
+        self.last_flush_size = 0
+        self.max_flush_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def pending(self) -> int:
+        return len(self._rows)
+
+    def add(self, guild_id: int, user_id: int, channel_id: int, category_id, timestamp: str, ts: int) -> bool:
+        """Buffers one activity row. Returns True once the size threshold has been reached."""
+        self._rows.append((guild_id, user_id, channel_id, category_id, timestamp, ts))
+        self.rows_buffered += 1
+        return len(self._rows) >= self.max_rows
+
+    async def flush(self) -> int:
+        """Writes every buffered row in one transaction. Returns the number of rows written."""
+        async with self.lock:
+            return await self.write_pending()
+
+    async def write_pending(self) -> int:
+        """Same as flush(), for callers that already hold `lock`."""
+        if not self._rows:
+            return 0
+        rows, self._rows = self._rows, []
+
+        by_month = defaultdict(list)
+        for row in rows:
+            by_month[month_of(row[5])].append(row)
+
+        start = time.perf_counter()
+        try:
+            # A batch spans two months at most around a rollover; the new partition is created then.
+            tables = {month: await self.partitions.ensure(month) for month in by_month}
+            # Holding the writer means a failure only undoes this flush's statements.
+            async with self.db.transaction():
+                for month, month_rows in by_month.items():
+                    await self.db.executemany(f"""
+                        INSERT INTO {tables[month]} (guild_id, user_id, channel_id, category_id, timestamp, ts)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, month_rows)
+                await apply_rollups(self.db, rows)
+        except Exception:
+            self.failed_flushes += 1
+            self._failed_attempts += 1
+            if self._failed_attempts < self.MAX_FLUSH_ATTEMPTS:
+                # Put the rows back in front of anything buffered meanwhile so nothing is lost.
+                self._rows[:0] = rows
+            else:
+                self.rows_dropped += len(rows)
+                self._failed_attempts = 0
+                print(f"Error: Dropped {len(rows)} activity rows after {self.MAX_FLUSH_ATTEMPTS} failed flushes.")
+            raise
+        self._failed_attempts = 0
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.rows_flushed += len(rows)
+        self.flush_count += 1
+        self.last_flush_size = len(rows)
+        self.max_flush_size = max(self.max_flush_size, len(rows))
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+        return len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "rows_buffered": self.rows_buffered,
+            "rows_flushed": self.rows_flushed,
+            "flush_count": self.flush_count,
+            "failed_flushes": self.failed_flushes,
+            "rows_dropped": self.rows_dropped,
+            "last_flush_size": self.last_flush_size,
+            "max_flush_size": self.max_flush_size,
+            "avg_flush_size": self.rows_flushed / self.flush_count if self.flush_count else 0.0,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": self.max_flush_ms,
+            "avg_flush_ms": self.total_flush_ms / self.flush_count if self.flush_count else 0.0,
+        }
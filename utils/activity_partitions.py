@@ -0,0 +1,215 @@
+# utils/activity_partitions.py
+import asyncio
+from datetime import datetime, timezone
+
+# Raw activity is stored in one table per UTC month (activity_log_YYYYMM).
+# `activity_log` is a view over all of them for ad-hoc queries.
+PARTITION_PREFIX = "activity_log_"
+LEGACY_TABLE = "activity_log_legacy"
+
+
+def month_of(ts: int) -> int:
+    """Returns the YYYYMM partition key for an epoch timestamp."""
+    moment = datetime.fromtimestamp(ts, timezone.utc)
+    return moment.year * 100 + moment.month
+
+
+def month_bounds(month: int) -> tuple:
+    """Returns the [start, end) epoch range covered by a YYYYMM partition."""
+    year, month_number = divmod(month, 100)
+    start = datetime(year, month_number, 1, tzinfo=timezone.utc)
+    end = datetime(year + month_number // 12, month_number % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def next_month(month: int) -> int:
+    year, month_number = divmod(month, 100)
+    return (year + 1) * 100 + 1 if month_number == 12 else month + 1
+
+
+def table_for(month: int) -> str:
+    return f"{PARTITION_PREFIX}{month}"
+
+
+class ActivityPartitions:
+    """
+    Keeps track of the monthly activity_log partitions.
+    Partitions are created on demand (the first flush of a new month creates it, and the next
+    month is created ahead of time at startup), and retention drops whole partitions instead
+    of deleting rows from one large table.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.months = []
+        # Serialises DDL: partition creation from flushes, retention and the legacy migration.
+        self.lock = asyncio.Lock()
+
+    async def load(self):
+        """Reads the existing partitions and makes sure this month and the next one exist."""
+        async with self.lock:
+            await self._refresh()
+            # Partitions from before multi-server support get guild_id (0 until adopted, see `adopt`).
+            # The view is dropped while they differ, since its UNION ALL needs matching columns.
+            outdated = []
+            for month in self.months:
+                async with self.db.execute(f"PRAGMA table_info({table_for(month)})") as cursor:
+                    if "guild_id" not in {row[1] for row in await cursor.fetchall()}:
+                        outdated.append(table_for(month))
+            if outdated:
+                async with self.db.transaction():
+                    if not await self._table_exists("activity_log"):
+                        await self.db.execute("DROP VIEW IF EXISTS activity_log")
+                    for table in outdated:
+                        await self.db.execute(f"ALTER TABLE {table} ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0")
+                    await self._rebuild_view()
+        current = month_of(int(datetime.now(timezone.utc).timestamp()))
+        await self.ensure(current)
+        await self.ensure(next_month(current))
+
+    async def _refresh(self):
+        async with self.db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ?",
+            (f"{PARTITION_PREFIX}[0-9][0-9][0-9][0-9][0-9][0-9]",)
+        ) as cursor:
+            self.months = sorted(int(name[len(PARTITION_PREFIX):]) for (name,) in await cursor.fetchall())
+
+    async def _table_exists(self, name: str) -> bool:
+        async with self.db.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)) as cursor:
+            row = await cursor.fetchone()
+        return bool(row) and row[0] == 'table'
+
+    async def _rebuild_view(self):
+        # A database that still has the old activity_log table keeps it until it is migrated.
+        if await self._table_exists("activity_log"):
+            return
+        await self.db.execute("DROP VIEW IF EXISTS activity_log")
+        if self.months:
+            body = " UNION ALL ".join(f"SELECT * FROM {table_for(month)}" for month in self.months)
+        else:
+            body = "SELECT NULL AS log_id, NULL AS user_id, NULL AS channel_id, NULL AS category_id, NULL AS timestamp, NULL AS ts, NULL AS guild_id WHERE 0"
+        await self.db.execute(f"CREATE VIEW activity_log AS {body}")
+
+    async def ensure(self, month: int) -> str:
+        """Returns the partition table for `month`, creating it (and updating the view) if needed."""
+        table = table_for(month)
+        if month in self.months:
+            return table
+        async with self.lock:
+            if month not in self.months:
+                async with self.db.transaction():
+                    await self.db.execute(f"""
+                        CREATE TABLE IF NOT EXISTS {table} (
+                            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            user_id INTEGER NOT NULL,
+                            channel_id INTEGER NOT NULL,
+                            category_id INTEGER,
+                            timestamp TEXT NOT NULL,
+                            ts INTEGER NOT NULL,
+                            guild_id INTEGER NOT NULL DEFAULT 0
+                        )
+                    """)
+                    await self.db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_ts_user ON {table} (ts, user_id)")
+                    # Read the catalogue again: another process step may have created partitions we haven't seen.
+                    await self._refresh()
+                    await self._rebuild_view()
+                print(f"Created activity partition {table}.")
+        return table
+
+    def overlapping(self, since_ts: int = None) -> list:
+        """Partition tables (oldest first) that may hold rows with ts >= `since_ts`."""
+        return [
+            table_for(month) for month in self.months
+            if since_ts is None or month_bounds(month)[1] > since_ts
+        ]
+
+    async def min_ts(self):
+        """Oldest raw activity timestamp, or None if there is none."""
+        for table in self.overlapping():
+            async with self.db.execute(f"SELECT MIN(ts) FROM {table}") as cursor:
+                row = await cursor.fetchone()
+            if row and row[0] is not None:
+                return row[0]
+        return None
+
+    async def drop_before(self, cutoff_ts: int) -> tuple:
+        """
+        Drops every partition that ends at or before `cutoff_ts`.
+        The partition containing the cutoff is kept whole, so up to a month of extra raw history remains.
+        Returns (partitions_dropped, rows_dropped).
+        """
+        dropped_partitions = dropped_rows = 0
+        async with self.lock:
+            async with self.db.transaction():
+                for month in list(self.months):
+                    if month_bounds(month)[1] > cutoff_ts:
+                        break
+                    table = table_for(month)
+                    async with self.db.execute(f"SELECT COUNT(*) FROM {table}") as cursor:
+                        dropped_rows += (await cursor.fetchone())[0]
+                    await self.db.execute(f"DROP TABLE {table}")
+                    self.months.remove(month)
+                    dropped_partitions += 1
+                if dropped_partitions:
+                    await self._rebuild_view()
+        return dropped_partitions, dropped_rows
+
+    async def adopt(self, guild_id: int) -> int:
+        """
+        Assigns raw activity recorded before multi-server support (guild_id 0) to `guild_id`.
+        Runs one partition per transaction. Returns the number of rows updated.
+        """
+        adopted = 0
+        for table in self.overlapping():
+            async with self.db.transaction() as cursor:
+                await cursor.execute(f"UPDATE {table} SET guild_id = ? WHERE guild_id = 0", (guild_id,))
+                adopted += cursor.rowcount
+            await asyncio.sleep(0)
+        return adopted
+
+    async def detach_legacy(self):
+        """
+        Renames a pre-partitioning activity_log table out of the way of the view.
+        Returns the legacy table name if there is one left to migrate, otherwise None.
+        """
+        async with self.lock:
+            if await self._table_exists("activity_log"):
+                async with self.db.transaction():
+                    await self.db.execute(f"ALTER TABLE activity_log RENAME TO {LEGACY_TABLE}")
+                    await self._rebuild_view()
+            return LEGACY_TABLE if await self._table_exists(LEGACY_TABLE) else None
+
+    async def migrate_legacy(self) -> int:
+        """
+        Moves rows from the legacy table (see `detach_legacy`) into monthly partitions.
+        Each month is moved in its own transaction (insert into the partition, delete from the
+        old table), so an interrupted migration resumes where it stopped on the next start.
+        Returns the number of rows moved.
+        """
+        if not await self.detach_legacy():
+            return 0
+
+        moved = 0
+        while True:
+            async with self.db.execute(f"SELECT MIN(ts) FROM {LEGACY_TABLE}") as cursor:
+                oldest = (await cursor.fetchone())[0]
+            if oldest is None:
+                break
+            month = month_of(oldest)
+            start, end = month_bounds(month)
+            table = await self.ensure(month)
+            async with self.db.transaction() as cursor:
+                await cursor.execute(f"""
+                    INSERT INTO {table} (user_id, channel_id, category_id, timestamp, ts)
+                    SELECT user_id, channel_id, category_id, timestamp, ts FROM {LEGACY_TABLE}
+                    WHERE ts >= ? AND ts < ? ORDER BY log_id
+                """, (start, end))
+                moved += cursor.rowcount
+                await cursor.execute(f"DELETE FROM {LEGACY_TABLE} WHERE ts >= ? AND ts < ?", (start, end))
+            await asyncio.sleep(0)
+
+        async with self.lock:
+            async with self.db.transaction():
+                # Rows that never got a timestamp can't be placed in a month; they were invisible to every window anyway.
+                await self.db.execute(f"DROP TABLE {LEGACY_TABLE}")
+                await self._rebuild_view()
+        return moved
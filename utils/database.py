@@ -0,0 +1,279 @@
+# utils/database.py
+import asyncio
+import sqlite3
+import time
+import traceback
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import aiosqlite
+
+
+class TimedCursor:
+    """Wraps an aiosqlite cursor so every execute is timed and reported to the database hooks."""
+
+    def __init__(self, database, cursor, role: str):
+        self._database = database
+        self._cursor = cursor
+        self.role = role
+
+    async def execute(self, sql: str, parameters=()):
+        start = time.perf_counter()
+        try:
+            await self._cursor.execute(sql, parameters)
+        finally:
+            self._database._record(sql, parameters, start, self.role)
+        return self
+
+    async def executemany(self, sql: str, parameters):
+        start = time.perf_counter()
+        try:
+            await self._cursor.executemany(sql, parameters)
+        finally:
+            self._database._record(sql, None, start, self.role)
+        return self
+
+    async def fetchone(self):
+        return await self._cursor.fetchone()
+
+    async def fetchmany(self, size: int = None):
+        return await self._cursor.fetchmany(size) if size is not None else await self._cursor.fetchmany()
+
+    async def fetchall(self):
+        return await self._cursor.fetchall()
+
+    async def close(self):
+        await self._cursor.close()
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def __aiter__(self):
+        return self._cursor.__aiter__()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class _CursorResult:
+    """Lets `db.cursor()` / `db.execute()` be awaited or used with `async with`, like aiosqlite's own."""
+
+    def __init__(self, coro):
+        self._coro = coro
+        self._cursor = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self):
+        self._cursor = await self._coro
+        return self._cursor
+
+    async def __aexit__(self, *exc_info):
+        await self._cursor.close()
+
+
+class Database:
+    """
+    The bot's SQLite database: one writer connection plus a small pool of read-only connections.
+
+    The file runs in WAL mode, so the read pool (leaderboards, profiles, award rankings) never
+    waits behind activity inserts on the writer, and the writer never waits behind a long scan.
+    `bot.db` is an instance of this class; `cursor`, `execute`, `executemany`, `commit` and
+    `rollback` go to the writer exactly like the plain aiosqlite connection they replace.
+
+    Every coroutine shares the writer, so a commit from one of them would also commit (or end
+    a savepoint of) another's half-done writes. Writes therefore go through `transaction()`,
+    which holds `lock` from the first statement to the commit.
+
+    Hooks added with `add_hook` are called as hook(sql, parameters, elapsed_ms, role) after
+    every statement, where role is 'write' or 'read'.
+    """
+    MMAP_SIZE = 256 * 1024 * 1024
+    CACHE_SIZE_KIB = 32 * 1024
+    CACHED_STATEMENTS = 256
+    BUSY_TIMEOUT_MS = 5000
+
+    def __init__(self, path: str, readers: int = 3):
+        self.path = path
+        # An in-memory database can't be shared, so reads then use the writer.
+        self.reader_count = 0 if path == ":memory:" else max(readers, 0)
+        self.writer = None
+        self._readers = []
+        self._idle_readers = asyncio.Queue()
+        self._hooks = []
+        # Held by whoever has statements open on the writer (see transaction()).
+        self.lock = asyncio.Lock()
+        self.closed = False
+        self.query_count = {'write': 0, 'read': 0}
+        self.query_ms = {'write': 0.0, 'read': 0.0}
+
+    async def connect(self):
+        self.writer = await aiosqlite.connect(self.path, cached_statements=self.CACHED_STATEMENTS)
+        await self._configure(self.writer)
+        # Lets MaintenanceCog hand free pages back with incremental_vacuum. Takes effect
+        # immediately for a new file; an existing one needs a single VACUUM (`!db-maintenance vacuum`).
+        await self.writer.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await self.writer.execute("PRAGMA journal_mode = WAL")
+        await self.writer.execute("PRAGMA synchronous = NORMAL")
+
+        if self.reader_count:
+            uri = f"{Path(self.path).resolve().as_uri()}?mode=ro"
+            for _ in range(self.reader_count):
+                reader = await aiosqlite.connect(uri, uri=True, cached_statements=self.CACHED_STATEMENTS)
+                await self._configure(reader)
+                await reader.execute("PRAGMA query_only = ON")
+                self._readers.append(reader)
+                self._idle_readers.put_nowait(reader)
+        return self
+
+    async def _configure(self, connection):
+        await connection.execute(f"PRAGMA busy_timeout = {self.BUSY_TIMEOUT_MS}")
+        await connection.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+        await connection.execute(f"PRAGMA cache_size = -{self.CACHE_SIZE_KIB}")
+        await connection.execute("PRAGMA temp_store = MEMORY")
+
+    # --- Timing hooks ---
+
+    def add_hook(self, hook):
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        if hook in self._hooks:
+            self._hooks.remove(hook)
+
+    def _record(self, sql: str, parameters, start: float, role: str):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.query_count[role] += 1
+        self.query_ms[role] += elapsed_ms
+        for hook in self._hooks:
+            try:
+                hook(sql, parameters, elapsed_ms, role)
+            except Exception:
+                traceback.print_exc()
+
+    # --- Writer (same interface as an aiosqlite connection) ---
+
+    async def _writer_cursor(self):
+        return TimedCursor(self, await self.writer.cursor(), 'write')
+
+    async def _writer_execute(self, sql: str, parameters):
+        cursor = await self._writer_cursor()
+        return await cursor.execute(sql, parameters)
+
+    def cursor(self):
+        return _CursorResult(self._writer_cursor())
+
+    def execute(self, sql: str, parameters=()):
+        return _CursorResult(self._writer_execute(sql, parameters))
+
+    async def executemany(self, sql: str, parameters):
+        cursor = await self._writer_cursor()
+        try:
+            return await cursor.executemany(sql, parameters)
+        finally:
+            await cursor.close()
+
+    async def commit(self):
+        # Waits for a running transaction() instead of committing its half-done writes.
+        async with self.lock:
+            await self.writer.commit()
+
+    async def rollback(self):
+        async with self.lock:
+            await self.writer.rollback()
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Holds the writer for the duration of the block and yields a cursor on it. The block's
+        writes are committed when it ends, or rolled back if it raises. Don't call commit(),
+        rollback() or another transaction() inside it.
+        """
+        async with self.lock:
+            cursor = await self._writer_cursor()
+            try:
+                yield cursor
+                await self.writer.commit()
+            except BaseException:
+                await self.writer.rollback()
+                raise
+            finally:
+                await cursor.close()
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.writer.in_transaction
+
+    # --- Read pool ---
+
+    @asynccontextmanager
+    async def _borrow_reader(self):
+        reader = await self._idle_readers.get() if self.reader_count else self.writer
+        try:
+            yield reader
+        finally:
+            if self.reader_count:
+                self._idle_readers.put_nowait(reader)
+
+    @asynccontextmanager
+    async def read(self, sql: str = None, parameters=()):
+        """
+        Borrows a read-only connection for the duration of the block and yields a cursor on it.
+        If `sql` is given it is executed first. Only committed data is visible.
+        """
+        async with self._borrow_reader() as reader:
+            cursor = TimedCursor(self, await reader.cursor(), 'read')
+            try:
+                if sql:
+                    await cursor.execute(sql, parameters)
+                yield cursor
+            finally:
+                await cursor.close()
+
+    async def explain(self, sql: str, parameters=()) -> list:
+        """
+        EXPLAIN QUERY PLAN rows (id, parent, notused, detail) for a statement. Runs on a reader
+        and is not reported to the hooks, so a slow-query hook can call it without recursing.
+        """
+        async with self._borrow_reader() as reader:
+            async with reader.execute(f"EXPLAIN QUERY PLAN {sql}", parameters) as cursor:
+                return await cursor.fetchall()
+
+    # --- Lifecycle ---
+
+    async def close(self):
+        """Closes the read pool, then the writer (which checkpoints the WAL back into the main file)."""
+        if self.closed:
+            return
+        self.closed = True
+        for reader in self._readers:
+            try:
+                await reader.close()
+            except sqlite3.Error:
+                traceback.print_exc()
+        self._readers.clear()
+        if self.writer:
+            await self.writer.close()
+
+    def stats(self) -> dict:
+        return {
+            "readers": self.reader_count,
+            "idle_readers": self._idle_readers.qsize(),
+            "writes": self.query_count['write'],
+            "reads": self.query_count['read'],
+            "write_ms": self.query_ms['write'],
+            "read_ms": self.query_ms['read'],
+        }
@@ -0,0 +1,133 @@
+# utils/leaderboards.py
+import asyncio
+import time
+from bisect import bisect_left, bisect_right
+
+from utils.rollups import window_start_day
+
+
+class LeaderboardSnapshot:
+    """
+    A fully ranked leaderboard, frozen at the time it was built.
+    Rows are (user_id, value) ordered by value descending, then user ID ascending.
+    Pages are addressed by keyset cursors, i.e. the sort key of a row: (-value, user_id).
+    Rank lookups bisect a sorted array of the values instead of counting rows in SQL.
+    """
+    def __init__(self, guild_id: int, stat: str, rows: list):
+        self.guild_id = guild_id
+        self.stat = stat
+        self.rows = rows
+        self.keys = [(-value, user_id) for user_id, value in rows]
+        self.values_by_user = dict(rows)
+        # Rows are sorted by value descending, so reversing them gives the ascending order bisect needs.
+        self.values_ascending = [value for _, value in reversed(rows)]
+        self.built_at = time.time()
+        self._built_monotonic = time.monotonic()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def age(self) -> float:
+        return time.monotonic() - self._built_monotonic
+
+    def rank_of(self, user_id: int):
+        """
+        Returns (value, rank, percentile) for a ranked member, or None if they aren't ranked.
+        Tied members share a rank; percentile is the share of ranked members at or below their value.
+        """
+        value = self.values_by_user.get(user_id)
+        if value is None:
+            return None
+        at_or_below = bisect_right(self.values_ascending, value)
+        rank = len(self.values_ascending) - at_or_below + 1
+        percentile = at_or_below / len(self.values_ascending) * 100
+        return value, rank, percentile
+
+    def page_count(self, page_size: int) -> int:
+        return max(1, -(-len(self.rows) // page_size))
+
+    def page(self, number: int, page_size: int):
+        """Returns (start_index, rows) for a 1-based page number."""
+        start = (min(max(number, 1), self.page_count(page_size)) - 1) * page_size
+        return start, self.rows[start:start + page_size]
+
+    def page_after(self, cursor: tuple, page_size: int):
+        """Returns (start_index, rows) for the page following the row with key `cursor`."""
+        start = bisect_right(self.keys, cursor)
+        return start, self.rows[start:start + page_size]
+
+    def page_before(self, cursor: tuple, page_size: int):
+        """Returns (start_index, rows) for the page preceding the row with key `cursor`."""
+        end = bisect_left(self.keys, cursor)
+        start = max(0, end - page_size)
+        return start, self.rows[start:end]
+
+
+class LeaderboardCache:
+    """
+    Caches one LeaderboardSnapshot per server and statistic for `ttl` seconds.
+    Cogs call invalidate() when they change the underlying counts.
+    """
+    STATS = ('activity', 'participation', 'hosting')
+    # Window of the activity leaderboard, in days.
+    ACTIVITY_DAYS = 30
+
+    def __init__(self, bot, ttl: float = 60.0):
+        self.bot = bot
+        self.ttl = ttl
+        # (guild_id, stat) -> snapshot / rebuild lock
+        self._snapshots = {}
+        self._locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, guild_id: int, *stats: str):
+        """Drops a server's cached snapshots for `stats` (or all of them if none are given)."""
+        for stat in stats or self.STATS:
+            self._snapshots.pop((guild_id, stat), None)
+
+    async def get(self, guild_id: int, stat: str) -> LeaderboardSnapshot:
+        key = (guild_id, stat)
+        snapshot = self._snapshots.get(key)
+        if snapshot and snapshot.age() < self.ttl:
+            self.hits += 1
+            return snapshot
+
+        # Only one rebuild per server and statistic at a time; concurrent callers wait for it.
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        async with lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot and snapshot.age() < self.ttl:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            snapshot = LeaderboardSnapshot(guild_id, stat, await self._load(guild_id, stat))
+            self._snapshots[key] = snapshot
+            return snapshot
+
+    async def _load(self, guild_id: int, stat: str) -> list:
+        # Event counts and departures come from the in-memory members table (see utils/member_stats.py).
+        members = self.bot.member_stats.guild(guild_id)
+        if stat == 'participation':
+            return members.ranked('participation_count')
+        if stat == 'hosting':
+            return members.ranked('host_count')
+        if stat != 'activity':
+            raise ValueError(f"Unknown leaderboard statistic: {stat}")
+
+        # Make sure buffered messages are counted.
+        await self.bot.activity_buffer.flush()
+        async with self.bot.db.read("""
+            SELECT user_id, SUM(message_count) AS msg_count FROM activity_daily
+            WHERE guild_id = ? AND day >= ?
+            GROUP BY user_id
+            ORDER BY msg_count DESC, user_id ASC
+        """, (guild_id, window_start_day(self.ACTIVITY_DAYS))) as cursor:
+            rows = await cursor.fetchall()
+        departed = members.departed()
+        return [row for row in rows if row[0] not in departed] if departed else rows
+
+    def stats(self) -> dict:
+        return {"cached": len(self._snapshots), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,83 @@
+# utils/leases.py
+import os
+import socket
+import time
+
+
+class JobLeases:
+    """
+    Time-limited ownership of background jobs, stored in the `job_leases` table so that
+    several bot processes (one per shard group) sharing the database never run the same
+    job for the same server at once. Server-independent jobs use guild_id 0.
+    A lease that isn't released (e.g. the process died) expires after its TTL.
+    Within this process, a lease belongs to the run that acquired it: a second run of the
+    same job is refused until the first one releases it.
+    """
+
+    def __init__(self, db, label: str = None):
+        self.db = db
+        # Identifies this process in the table; `label` says which shards it runs.
+        self.owner = f"{socket.gethostname()}:{os.getpid()}" + (f" ({label})" if label else "")
+        # (job, guild_id) of the leases a run in this process currently holds.
+        self._running = set()
+        self.acquired = 0
+        self.contended = 0
+
+    async def _claim(self, job: str, guild_id: int, ttl: float) -> bool:
+        """Takes the lease in the table if it is free, expired or already ours, and extends it."""
+        now = time.time()
+        async with self.db.transaction() as cursor:
+            await cursor.execute("""
+                INSERT INTO job_leases (job, guild_id, owner, expires_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (job, guild_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE job_leases.owner = excluded.owner OR job_leases.expires_at <= ?
+                RETURNING owner
+            """, (job, guild_id, self.owner, now + ttl, now))
+            won = await cursor.fetchone() is not None
+        return won
+
+    async def acquire(self, job: str, guild_id: int, ttl: float) -> bool:
+        """Takes the lease for a new run. False if another run, here or in another process, holds it."""
+        key = (job, guild_id)
+        # Checked and claimed before the first await, so two runs here can't both get past it.
+        if key in self._running:
+            self.contended += 1
+            return False
+        self._running.add(key)
+        try:
+            won = await self._claim(job, guild_id, ttl)
+        except BaseException:
+            self._running.discard(key)
+            raise
+        if won:
+            self.acquired += 1
+        else:
+            self._running.discard(key)
+            self.contended += 1
+        return won
+
+    async def renew(self, job: str, guild_id: int, ttl: float) -> bool:
+        """Extends a lease held by a run in this process. False if there is none or it was lost after expiring."""
+        key = (job, guild_id)
+        if key not in self._running:
+            return False
+        if await self._claim(job, guild_id, ttl):
+            return True
+        self._running.discard(key)
+        return False
+
+    async def release(self, job: str, guild_id: int):
+        self._running.discard((job, guild_id))
+        async with self.db.transaction() as cursor:
+            await cursor.execute("DELETE FROM job_leases WHERE job = ? AND guild_id = ? AND owner = ?",
+                                 (job, guild_id, self.owner))
+
+    async def holder(self, job: str, guild_id: int):
+        """The owner of an unexpired lease, or None."""
+        async with self.db.read("SELECT owner FROM job_leases WHERE job = ? AND guild_id = ? AND expires_at > ?",
+                                (job, guild_id, time.time())) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    def stats(self) -> dict:
+        return {"acquired": self.acquired, "contended": self.contended}
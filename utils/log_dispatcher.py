@@ -0,0 +1,139 @@
+# utils/log_dispatcher.py
+import asyncio
+from datetime import datetime
+
+import aiohttp
+import discord
+
+
+class LogDispatcher:
+    """
+    Shared, non-blocking sender for each server's log channel.
+    Cogs queue lines with log(); a background worker merges bursts into as few
+    messages as fit under Discord's 2000 character limit (per server) and retries
+    with backoff when it gets rate limited.
+    """
+    MAX_LENGTH = 2000
+
+    def __init__(self, bot, coalesce_delay: float = 1.0, max_retries: int = 5):
+        self.bot = bot
+        self.coalesce_delay = coalesce_delay
+        self.max_retries = max_retries
+        self._queue = asyncio.Queue()
+        self._pending = []
+        self._task = None
+
+        self.lines_queued = 0
+        self.messages_sent = 0
+        self.lines_dropped = 0
+        self.retries = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def log(self, guild_id: int, message: str):
+        """Queues a line for a server's log channel. Never blocks."""
+        self._queue.put_nowait((guild_id, f"[`{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}`] {message}"))
+        self.lines_queued += 1
+
+    async def close(self):
+        """Stops the worker and sends whatever is still queued."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._send_batch(self._take_pending())
+
+    def _take_pending(self) -> list:
+        lines, self._pending = self._pending, []
+        while not self._queue.empty():
+            lines.append(self._queue.get_nowait())
+        return lines
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            self._pending.append(await self._queue.get())
+            # Give a burst (e.g. a tenure run) a moment to pile up so it is sent together.
+            await asyncio.sleep(self.coalesce_delay)
+            entries = self._take_pending()
+            # A failed batch is dropped, not fatal: the worker must keep draining the queue.
+            try:
+                await self._send_batch(entries)
+            except Exception as e:
+                self.lines_dropped += len(entries)
+                print(f"Error: Failed to send {len(entries)} log lines: {e}")
+
+    @classmethod
+    def pack(cls, lines: list) -> list:
+        """Joins lines into as few messages as possible, splitting any line that is too long itself."""
+        chunks = []
+        current = ""
+        for line in lines:
+            while len(line) > cls.MAX_LENGTH:
+                cut = line.rfind("\n", 0, cls.MAX_LENGTH)
+                if cut <= 0:
+                    cut = cls.MAX_LENGTH
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(line[:cut])
+                line = line[cut:].lstrip("\n")
+            if not line:
+                continue
+            if current and len(current) + 1 + len(line) > cls.MAX_LENGTH:
+                chunks.append(current)
+                current = line
+            else:
+                current = f"{current}\n{line}" if current else line
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _send_batch(self, entries: list):
+        lines_by_guild = {}
+        for guild_id, line in entries:
+            lines_by_guild.setdefault(guild_id, []).append(line)
+        for guild_id, lines in lines_by_guild.items():
+            channel_id = self.bot.settings.guild(guild_id).log_channel_id
+            log_channel = self.bot.get_channel(channel_id) if channel_id else None
+            if not log_channel:
+                self.lines_dropped += len(lines)
+                continue
+            for chunk in self.pack(lines):
+                await self._send(log_channel, chunk)
+
+    async def _send(self, log_channel, content: str):
+        for attempt in range(self.max_retries):
+            try:
+                await log_channel.send(content)
+                self.messages_sent += 1
+                return
+            except discord.Forbidden:
+                print(f"Error: Bot could not send message to log channel {log_channel.id}.")
+                return
+            except discord.HTTPException as e:
+                # discord.py already waits out normal rate limits; this covers 429s it gives up on and 5xx errors.
+                if e.status != 429 and e.status < 500:
+                    print(f"Error: Failed to send to log channel {log_channel.id}: {e}")
+                    return
+                self.retries += 1
+                await asyncio.sleep(getattr(e, 'retry_after', None) or 2 ** attempt)
+            except (OSError, aiohttp.ClientError, asyncio.TimeoutError):
+                # Connection problems are retried like 5xx errors.
+                self.retries += 1
+                await asyncio.sleep(2 ** attempt)
+        print(f"Error: Giving up on a log message for channel {log_channel.id} after {self.max_retries} attempts.")
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "lines_queued": self.lines_queued,
+            "messages_sent": self.messages_sent,
+            "lines_dropped": self.lines_dropped,
+            "retries": self.retries,
+        }
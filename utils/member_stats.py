@@ -0,0 +1,217 @@
+# utils/member_stats.py
+from array import array
+from datetime import datetime, timezone
+from heapq import heappop, heappush
+from operator import itemgetter
+
+
+class GuildMemberStats:
+    """
+    One server's rows of the `members` table, stored column by column in typed arrays
+    (about 40 bytes per member) with a user_id -> row map, plus a heap of (next_tenure_due, row)
+    so tenure checks only touch members who are due.
+    Values are given in the same form they are written to SQL: join dates as ISO strings,
+    NULL (None) for "no milestone left" and "still in the server".
+    """
+    # Stored for a NULL next_tenure_due: the member has no milestone left, so they are never due.
+    NEVER_DUE = 2 ** 63 - 1
+
+    def __init__(self):
+        self.rows = {}
+        self.user_ids = array('q')
+        # Epoch seconds (UTC)
+        self.join_dates = array('d')
+        self.participation_counts = array('i')
+        self.host_counts = array('i')
+        self.next_tenure_due = array('q')
+        # 0 while the member is in the server
+        self.departed_at = array('q')
+        self._columns = {
+            'join_date': self.join_dates,
+            'participation_count': self.participation_counts,
+            'host_count': self.host_counts,
+            'next_tenure_due': self.next_tenure_due,
+            'departed_at': self.departed_at,
+        }
+        # Entries go stale when a member's next_tenure_due changes; they are skipped when popped.
+        self._due_heap = []
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def __contains__(self, user_id: int):
+        return user_id in self.rows
+
+    @staticmethod
+    def _epoch(join_date: str) -> float:
+        value = datetime.fromisoformat(join_date)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+
+    @staticmethod
+    def _datetime(epoch: float) -> datetime:
+        return datetime.fromtimestamp(epoch, timezone.utc)
+
+    def _encode(self, column: str, value):
+        if column == 'join_date':
+            return self._epoch(value)
+        if value is None:
+            return self.NEVER_DUE if column == 'next_tenure_due' else 0
+        return value
+
+    def _append(self, user_id: int, join_date: str, participation_count=0, host_count=0, next_tenure_due=0, departed_at=None):
+        self.rows[user_id] = len(self.user_ids)
+        self.user_ids.append(user_id)
+        self.join_dates.append(self._epoch(join_date))
+        self.participation_counts.append(participation_count or 0)
+        self.host_counts.append(host_count or 0)
+        self.next_tenure_due.append(self._encode('next_tenure_due', next_tenure_due))
+        self.departed_at.append(departed_at or 0)
+        self._schedule(len(self.user_ids) - 1)
+
+    def _schedule(self, row: int):
+        due = self.next_tenure_due[row]
+        # Departed members are scheduled again when they return (see update()).
+        if due != self.NEVER_DUE and not self.departed_at[row]:
+            heappush(self._due_heap, (due, row))
+
+    def get(self, user_id: int):
+        """(join_date, participation_count, host_count) of a tracked member, or None."""
+        row = self.rows.get(user_id)
+        if row is None:
+            return None
+        return self._datetime(self.join_dates[row]), self.participation_counts[row], self.host_counts[row]
+
+    def update(self, user_id: int, **values):
+        """Sets columns of a tracked member's row; untracked members are ignored, like an SQL UPDATE."""
+        row = self.rows.get(user_id)
+        if row is None:
+            return
+        for column, value in values.items():
+            value = self._encode(column, value)
+            if column == 'next_tenure_due':
+                if value == self.next_tenure_due[row]:
+                    continue
+                self.next_tenure_due[row] = value
+                self._schedule(row)
+                # Stale entries pile up as members are rescheduled; rebuild once they dominate.
+                if len(self._due_heap) > 2 * len(self.user_ids) + 1024:
+                    self._rebuild_due_heap()
+            elif column == 'departed_at':
+                returned = self.departed_at[row] and not value
+                self.departed_at[row] = value
+                if returned:
+                    self._schedule(row)
+            else:
+                self._columns[column][row] = value
+
+    def put(self, user_id: int, default_join_date: str, **values):
+        """Like update(), but adds the member first (joined at `default_join_date`) if they aren't tracked yet."""
+        if user_id not in self.rows:
+            self._append(user_id, default_join_date)
+        self.update(user_id, **values)
+
+    def mark_departed(self, user_id: int, departed_at: int):
+        """Records when a tracked member left, unless they are already marked as departed."""
+        row = self.rows.get(user_id)
+        if row is not None and not self.departed_at[row]:
+            self.departed_at[row] = departed_at
+
+    def reset_tenure_due(self):
+        """Makes every member due, e.g. after the tenure milestones change."""
+        self.next_tenure_due[:] = array('q', bytes(8 * len(self.next_tenure_due)))
+        # Every entry is (0, row) in row order, which is already a valid heap.
+        self._due_heap = [(0, row) for row in range(len(self.user_ids)) if not self.departed_at[row]]
+
+    def _rebuild_due_heap(self):
+        self._due_heap = []
+        for row in range(len(self.user_ids)):
+            self._schedule(row)
+
+    def due(self, now_ts: int) -> list:
+        """
+        (user_id, join_date) of members in the server whose next tenure milestone is due.
+        They stay due until the caller reschedules them with update().
+        """
+        heap = self._due_heap
+        rows = []
+        seen = set()
+        while heap and heap[0][0] <= now_ts:
+            due, row = heappop(heap)
+            # Skip entries left behind by a reschedule, duplicates and members who left.
+            if due != self.next_tenure_due[row] or row in seen or self.departed_at[row]:
+                continue
+            seen.add(row)
+            rows.append(row)
+        for row in rows:
+            heappush(heap, (self.next_tenure_due[row], row))
+        return [(self.user_ids[row], self._datetime(self.join_dates[row])) for row in rows]
+
+    def ranked(self, column: str) -> list:
+        """(user_id, count) of members in the server with a nonzero count, highest first, then by user ID."""
+        rows = [
+            (user_id, value)
+            for user_id, value, departed_at in zip(self.user_ids, self._columns[column], self.departed_at)
+            if value > 0 and not departed_at
+        ]
+        # Two stable sorts avoid building a key tuple per row.
+        rows.sort(key=itemgetter(0))
+        rows.sort(key=itemgetter(1), reverse=True)
+        return rows
+
+    def departed(self) -> set:
+        return {user_id for user_id, departed_at in zip(self.user_ids, self.departed_at) if departed_at}
+
+    def nbytes(self) -> int:
+        arrays = (self.user_ids, *self._columns.values())
+        # The row map holds about 100 bytes per member (dict slot plus the key and value ints),
+        # a heap entry about 80 (list slot, tuple and its two ints).
+        return sum(len(column) * column.itemsize for column in arrays) + 100 * len(self.rows) + 80 * len(self._due_heap)
+
+
+class MemberStatsIndex:
+    """
+    In-memory copy of the `members` table, keyed by server (see GuildMemberStats).
+    Loaded once at startup by ConfigCog and kept up to date write-through by the cogs that
+    write the table, so profiles, participation/hosting leaderboards and tenure checks
+    don't touch SQL.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        # guild_id -> GuildMemberStats
+        self._guilds = {}
+        self.loaded = False
+
+    async def load(self):
+        """(Re)loads every member from the database."""
+        guilds = {}
+        async with self.db.cursor() as cursor:
+            await cursor.execute(
+                "SELECT guild_id, user_id, join_date, participation_count, host_count, next_tenure_due, departed_at FROM members"
+            )
+            while True:
+                rows = await cursor.fetchmany(5000)
+                if not rows:
+                    break
+                for guild_id, user_id, join_date, participation_count, host_count, next_tenure_due, departed_at in rows:
+                    guild = guilds.get(guild_id)
+                    if guild is None:
+                        guild = guilds[guild_id] = GuildMemberStats()
+                    guild._append(user_id, join_date, participation_count, host_count, next_tenure_due, departed_at)
+        self._guilds = guilds
+        self.loaded = True
+
+    def guild(self, guild_id: int) -> GuildMemberStats:
+        guild = self._guilds.get(guild_id)
+        if guild is None:
+            guild = self._guilds[guild_id] = GuildMemberStats()
+        return guild
+
+    def stats(self) -> dict:
+        return {
+            "guilds": len(self._guilds),
+            "members": sum(len(guild) for guild in self._guilds.values()),
+            "bytes": sum(guild.nbytes() for guild in self._guilds.values()),
+        }
@@ -0,0 +1,191 @@
+# utils/metrics.py
+import bisect
+import re
+import time
+from functools import lru_cache
+
+import aiohttp
+from aiohttp import web
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metric family -> (Prometheus metric name, label name)
+FAMILIES = {
+    'command': ("alliance_command_duration_seconds", "command"),
+    'listener': ("alliance_listener_duration_seconds", "listener"),
+    'sql': ("alliance_sql_duration_seconds", "statement"),
+    'http': ("alliance_discord_request_duration_seconds", "route"),
+}
+
+# Distinct labels kept per family; anything past this is counted under OVERFLOW_LABEL.
+MAX_LABELS_PER_FAMILY = 300
+OVERFLOW_LABEL = "(other)"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROW_LIST = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SNOWFLAKE = re.compile(r"/\d{15,21}")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    """
+    Collapses a statement to its shape: literals become ?, placeholder lists and multi-row
+    VALUES lists become a single (?), and whitespace is squashed.
+    """
+    text = _WHITESPACE.sub(" ", sql).strip()
+    text = _STRING_LITERAL.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _PLACEHOLDER_LIST.sub("(?)", text)
+    text = _ROW_LIST.sub("(?)", text)
+    return text
+
+
+def normalize_route(method: str, url) -> str:
+    """'PUT /api/v10/guilds/{id}/members/{id}/roles/{id}' for a Discord REST call."""
+    return f"{method} {_SNOWFLAKE.sub('/{id}', url.path)}"
+
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram (the Prometheus model) plus the exact maximum."""
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimated quantile in seconds, interpolated within its bucket like histogram_quantile()."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+
+class Metrics:
+    """
+    Latency histograms for commands, listeners, SQL statements and Discord REST calls.
+    Shown by `!stats` (cogs/stats_cog.py) and, if METRICS_PORT is set, served in the
+    Prometheus text format on http://METRICS_HOST:METRICS_PORT/metrics.
+    """
+    def __init__(self):
+        self.histograms = {family: {} for family in FAMILIES}
+        # name -> callable returning a dict of numeric stats, exported as gauges.
+        self.collectors = {}
+        self.started_at = time.time()
+        self._runner = None
+
+    def observe(self, family: str, label: str, seconds: float):
+        histograms = self.histograms[family]
+        histogram = histograms.get(label)
+        if histogram is None:
+            if len(histograms) >= MAX_LABELS_PER_FAMILY:
+                label = OVERFLOW_LABEL
+                histogram = histograms.get(label)
+            if histogram is None:
+                histogram = histograms[label] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def observe_sql(self, sql: str, parameters, elapsed_ms: float, role: str):
+        """Database hook (see utils/database.py)."""
+        self.observe('sql', normalize_sql(sql), elapsed_ms / 1000)
+
+    def add_collector(self, name: str, collect):
+        self.collectors[name] = collect
+
+    def top(self, family: str, limit: int, key: str = 'total') -> list:
+        """(label, histogram) pairs with the most total time (or the highest p99 with key='p99')."""
+        items = list(self.histograms[family].items())
+        if key == 'p99':
+            items.sort(key=lambda item: item[1].quantile(0.99), reverse=True)
+        else:
+            items.sort(key=lambda item: item[1].total, reverse=True)
+        return items[:limit]
+
+    # --- Discord REST timing ---
+
+    def http_trace(self) -> aiohttp.TraceConfig:
+        """TraceConfig for the bot's HTTP session (passed to the Bot as `http_trace`)."""
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            context.start = time.perf_counter()
+
+        async def on_request_done(session, context, params):
+            start = getattr(context, 'start', None)
+            if start is not None:
+                self.observe('http', normalize_route(params.method, params.url), time.perf_counter() - start)
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_done)
+        trace.on_request_exception.append(on_request_done)
+        return trace
+
+    # --- Prometheus exposition ---
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for family, (metric, label_name) in FAMILIES.items():
+            lines.append(f"# HELP {metric} Latency of {family} executions.")
+            lines.append(f"# TYPE {metric} histogram")
+            for label, histogram in sorted(self.histograms[family].items()):
+                label_pair = f'{label_name}="{self._escape(label)}"'
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{metric}_bucket{{{label_pair},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{label_pair},le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum{{{label_pair}}} {histogram.total:.6f}")
+                lines.append(f"{metric}_count{{{label_pair}}} {histogram.count}")
+
+        lines.append("# HELP alliance_component_stat Internal counters of the bot's shared services.")
+        lines.append("# TYPE alliance_component_stat gauge")
+        for component, collect in sorted(self.collectors.items()):
+            for stat, value in sorted(collect().items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'alliance_component_stat{{component="{component}",stat="{stat}"}} {value}')
+        lines.append("# TYPE alliance_uptime_seconds gauge")
+        lines.append(f"alliance_uptime_seconds {time.time() - self.started_at:.0f}")
+        return "\n".join(lines) + "\n"
+
+    async def start_server(self, host: str, port: int):
+        """Serves /metrics for Prometheus to scrape."""
+        async def handle(request):
+            return web.Response(
+                body=self.render_prometheus().encode(),
+                headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+            )
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop_server(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
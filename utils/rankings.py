@@ -0,0 +1,52 @@
+# utils/rankings.py
+import heapq
+from collections import Counter, defaultdict
+
+
+def top_n(counter: Counter, n: int) -> list:
+    """
+    Returns the `n` highest (user_id, count) pairs.
+    Ties are broken by the lower user ID so repeated runs always pick the same winners.
+    """
+    return heapq.nsmallest(n, counter.items(), key=lambda item: (-item[1], item[0]))
+
+
+async def rank_awards(db, guild_id: int, awards, since_day: int) -> dict:
+    """
+    Computes the winners of every award of a server in one pass over its daily rollups.
+
+    `awards` is a list of (award_name, award_type, target_id, winner_count).
+    Returns {award_name: [(user_id, message_count), ...]} ordered best first.
+    """
+    channel_targets = {target_id for _, award_type, target_id, _ in awards if award_type == 'channel'}
+    category_targets = {target_id for _, award_type, target_id, _ in awards if award_type == 'category'}
+
+    server_counts = Counter()
+    channel_counts = defaultdict(Counter)
+    category_counts = defaultdict(Counter)
+
+    async with db.read("""
+        SELECT user_id, channel_id, category_id, SUM(message_count)
+        FROM activity_daily
+        WHERE guild_id = ? AND day >= ?
+        GROUP BY user_id, channel_id, category_id
+    """, (guild_id, since_day)) as cursor:
+        async for user_id, channel_id, category_id, message_count in cursor:
+            server_counts[user_id] += message_count
+            if channel_id in channel_targets:
+                channel_counts[channel_id][user_id] += message_count
+            if category_id in category_targets:
+                category_counts[category_id][user_id] += message_count
+
+    results = {}
+    for award_name, award_type, target_id, winner_count in awards:
+        if award_type == 'server':
+            counter = server_counts
+        elif award_type == 'channel':
+            counter = channel_counts.get(target_id, Counter())
+        elif award_type == 'category':
+            counter = category_counts.get(target_id, Counter())
+        else:
+            counter = Counter()
+        results[award_name] = top_n(counter, max(winner_count or 1, 1))
+    return results
@@ -0,0 +1,192 @@
+# utils/roles.py
+import asyncio
+import time
+
+import discord
+
+
+class ReconcileResult:
+    """Outcome of reconciling one role's holders."""
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.kept = []
+        self.failed = []  # (member, 'add' | 'remove')
+        self.skipped_calls = 0
+
+
+async def _apply(result, member, action, change):
+    try:
+        await change
+    except discord.HTTPException:
+        # Covers Forbidden as well as any other rejected request.
+        result.failed.append((member, action))
+        return
+    (result.added if action == 'add' else result.removed).append(member)
+
+
+async def reconcile_role(role: discord.Role, desired_members, role_changes,
+                         add_reason: str = None, remove_reason: str = None) -> ReconcileResult:
+    """
+    Makes `desired_members` the exact set of holders of `role`, touching only members whose
+    state actually changes. Changes go through `role_changes` (a RoleChangeCoalescer), so they
+    are merged with any other role changes requested for the same members.
+    """
+    result = ReconcileResult()
+    current = {member.id: member for member in role.members}
+    desired = {member.id: member for member in desired_members}
+
+    to_remove = [member for member_id, member in current.items() if member_id not in desired]
+    to_add = [member for member_id, member in desired.items() if member_id not in current]
+    result.kept = [member for member_id, member in desired.items() if member_id in current]
+
+    # The old approach removed the role from every holder and re-added it to every winner.
+    result.skipped_calls = (len(current) + len(desired)) - (len(to_remove) + len(to_add))
+
+    await asyncio.gather(
+        *(_apply(result, m, 'remove', role_changes.change(m, remove=(role,), reason=remove_reason)) for m in to_remove),
+        *(_apply(result, m, 'add', role_changes.change(m, add=(role,), reason=add_reason)) for m in to_add),
+    )
+    return result
+
+
+class _PendingChange:
+    """Role changes requested for one member during the current window."""
+    __slots__ = ("member", "add", "remove", "reasons", "futures")
+
+    def __init__(self, member):
+        self.member = member
+        # role_id -> role; a later request for the same role wins.
+        self.add = {}
+        self.remove = {}
+        self.reasons = []
+        self.futures = []
+
+    def merge(self, add, remove, reason):
+        for role in add:
+            self.remove.pop(role.id, None)
+            self.add[role.id] = role
+        for role in remove:
+            self.add.pop(role.id, None)
+            self.remove[role.id] = role
+        if reason and reason not in self.reasons:
+            self.reasons.append(reason)
+
+
+class RoleChangeCoalescer:
+    """
+    Shared path for every role change the bot makes. Requests for the same member that arrive
+    within `window` seconds are merged into one final role set and applied with a single REST
+    call. Calls across the whole bot are limited to `per_second` (0 for no limit), with at most
+    `concurrency` in flight.
+    Each caller gets the outcome of the call its request was part of.
+    """
+    # Discord's limit on audit log reasons.
+    MAX_REASON_LENGTH = 512
+
+    def __init__(self, window: float = 0.5, per_second: float = 5.0, concurrency: int = 5):
+        self.window = window
+        self.per_second = per_second
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # (guild_id, member_id) -> _PendingChange
+        self._pending = {}
+        self._tasks = set()
+        self._tokens = max(1.0, per_second)
+        self._refilled = time.monotonic()
+
+        self.requested = 0
+        self.merged = 0
+        self.calls = 0
+        self.skipped = 0
+        self.failed = 0
+
+    async def change(self, member, add=(), remove=(), reason: str = None):
+        """
+        Requests roles to add to and remove from `member`. Returns once the merged change has
+        been applied; raises the discord.HTTPException if the call failed.
+        """
+        loop = asyncio.get_running_loop()
+        key = (member.guild.id, member.id)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingChange(member)
+            loop.call_later(self.window, self._start, key)
+        else:
+            self.merged += 1
+        self.requested += 1
+        pending.merge(add, remove, reason)
+        future = loop.create_future()
+        pending.futures.append(future)
+        await future
+
+    def _start(self, key):
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        task = asyncio.create_task(self._apply(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _apply(self, pending: _PendingChange):
+        try:
+            await self._call(pending)
+        except Exception as e:
+            self.failed += 1
+            for future in pending.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in pending.futures:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _call(self, pending: _PendingChange):
+        member = pending.member
+        to_add = [role for role in pending.add.values() if role not in member.roles]
+        to_remove = [role for role in pending.remove.values() if role in member.roles]
+        if not to_add and not to_remove:
+            self.skipped += 1
+            return
+        reason = "; ".join(pending.reasons)[:self.MAX_REASON_LENGTH] or None
+        async with self._semaphore:
+            await self._take_token()
+            if len(to_add) + len(to_remove) == 1:
+                # A single role uses its own endpoint, which doesn't depend on the cached role list.
+                if to_add:
+                    await member.add_roles(*to_add, reason=reason)
+                else:
+                    await member.remove_roles(*to_remove, reason=reason)
+            else:
+                roles = [role for role in member.roles if not role.is_default() and role not in to_remove]
+                await member.edit(roles=roles + to_add, reason=reason)
+            self.calls += 1
+
+    async def _take_token(self):
+        # Token bucket holding up to one second of calls.
+        if self.per_second <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self._tokens = min(max(1.0, self.per_second), self._tokens + (now - self._refilled) * self.per_second)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.per_second)
+
+    async def close(self):
+        """Applies everything still waiting for its window and waits for calls in flight."""
+        for key in list(self._pending):
+            self._start(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "requested": self.requested,
+            "merged": self.merged,
+            "calls": self.calls,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
@@ -0,0 +1,128 @@
+# utils/rollups.py
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+
+# Rollups are bucketed by UTC day: the number of whole days since the Unix epoch.
+SECONDS_PER_DAY = 86400
+
+
+def day_of(ts: int) -> int:
+    """Returns the UTC day bucket for an epoch timestamp."""
+    return ts // SECONDS_PER_DAY
+
+
+def window_start_day(days: int) -> int:
+    """First day bucket of a window covering today and the previous `days - 1` days."""
+    today = day_of(int(datetime.now(timezone.utc).timestamp()))
+    return today - days + 1
+
+
+async def apply_rollups(db, rows):
+    """
+    Adds a batch of activity rows (guild_id, user_id, channel_id, category_id, timestamp, ts)
+    to activity_daily. Does not commit; call it inside the transaction that inserts the rows.
+    """
+    counts = Counter(
+        (guild_id, day_of(ts), user_id, channel_id, category_id or 0)
+        for guild_id, user_id, channel_id, category_id, _timestamp, ts in rows
+    )
+    await db.executemany("""
+        INSERT INTO activity_daily (guild_id, day, user_id, channel_id, category_id, message_count)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (guild_id, day, user_id, channel_id, category_id)
+        DO UPDATE SET message_count = message_count + excluded.message_count
+    """, [(*key, count) for key, count in counts.items()])
+
+
+async def _first_complete_raw_day(partitions):
+    """
+    Day bucket from which the raw activity partitions still hold every row, or None if they are empty.
+    The oldest day may have been partly pruned (before partitioning, `!award-cycle reset` deleted
+    rows by timestamp), so it is skipped.
+    """
+    oldest_ts = await partitions.min_ts()
+    if oldest_ts is None:
+        return None
+    return day_of(oldest_ts) + 1
+
+
+async def rebuild_rollups(db, buffer, since_day: int = None, chunk_size: int = 50000) -> int:
+    """
+    Recomputes activity_daily (for every server) from the raw activity partitions for every day
+    they still fully cover. Older days are left untouched so award history survives raw log pruning.
+    Only the monthly partitions that overlap the rebuilt days are read.
+    Returns the number of raw rows that were re-aggregated.
+    """
+    partitions = buffer.partitions
+    async with buffer.lock:
+        # Snapshot the id ranges and clear the affected days atomically with respect to flushes.
+        # Anything flushed after this point is above a partition's snapshot and rolled up by the flush itself.
+        await buffer.write_pending()
+        if since_day is None:
+            since_day = await _first_complete_raw_day(partitions)
+            if since_day is None:
+                return 0
+        since_ts = since_day * SECONDS_PER_DAY
+        id_ranges = []
+        async with db.transaction() as cursor:
+            for table in partitions.overlapping(since_ts):
+                await cursor.execute(f"SELECT COALESCE(MAX(log_id), 0) FROM {table}")
+                id_ranges.append((table, (await cursor.fetchone())[0]))
+            await cursor.execute("DELETE FROM activity_daily WHERE day >= ?", (since_day,))
+
+    total = 0
+    for table, max_log_id in id_ranges:
+        last_log_id = 0
+        while last_log_id < max_log_id:
+            upper = min(last_log_id + chunk_size, max_log_id)
+            async with db.transaction() as cursor:
+                await cursor.execute(f"""
+                    INSERT INTO activity_daily (guild_id, day, user_id, channel_id, category_id, message_count)
+                    SELECT guild_id, ts / 86400, user_id, channel_id, COALESCE(category_id, 0), COUNT(*)
+                    FROM {table}
+                    WHERE log_id > ? AND log_id <= ? AND ts >= ?
+                    GROUP BY 1, 2, 3, 4, 5
+                    ON CONFLICT (guild_id, day, user_id, channel_id, category_id)
+                    DO UPDATE SET message_count = message_count + excluded.message_count
+                """, (last_log_id, upper, since_ts))
+                await cursor.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE log_id > ? AND log_id <= ? AND ts >= ?",
+                    (last_log_id, upper, since_ts)
+                )
+                total += (await cursor.fetchone())[0]
+            last_log_id = upper
+            await asyncio.sleep(0)
+    return total
+
+
+async def check_rollups(db, buffer, guild_id: int):
+    """
+    Compares a server's activity_daily rows with a fresh count of the raw activity partitions
+    for every fully covered day. Returns a list of (day, raw_count, rollup_count) for the days that disagree.
+    """
+    await buffer.flush()
+    since_day = await _first_complete_raw_day(buffer.partitions)
+    if since_day is None:
+        return []
+    since_ts = since_day * SECONDS_PER_DAY
+
+    raw_counts = Counter()
+    for table in buffer.partitions.overlapping(since_ts):
+        async with db.execute(f"""
+            SELECT ts / 86400 AS day, COUNT(*) FROM {table}
+            WHERE guild_id = ? AND ts >= ? GROUP BY day
+        """, (guild_id, since_ts)) as cursor:
+            raw_counts.update(dict(await cursor.fetchall()))
+    async with db.execute("""
+        SELECT day, SUM(message_count) FROM activity_daily
+        WHERE guild_id = ? AND day >= ? GROUP BY day
+    """, (guild_id, since_day)) as cursor:
+        rollup_counts = dict(await cursor.fetchall())
+
+    mismatches = []
+    for day in sorted(set(raw_counts) | set(rollup_counts)):
+        raw, rolled = raw_counts.get(day, 0), rollup_counts.get(day, 0)
+        if raw != rolled:
+            mismatches.append((day, raw, rolled))
+    return mismatches
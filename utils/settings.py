@@ -0,0 +1,122 @@
+# utils/settings.py
+import json
+
+
+class GuildSettings:
+    """One server's settings, served from the SettingsStore cache."""
+    def __init__(self, store, guild_id: int):
+        self.store = store
+        self.guild_id = guild_id
+
+    def get(self, key: str, default=None):
+        return self.store.get(self.guild_id, key, default)
+
+    async def set(self, key: str, value):
+        await self.store.set(self.guild_id, key, value)
+
+    async def delete(self, key: str):
+        await self.store.delete(self.guild_id, key)
+
+    # --- Typed accessors ---
+
+    @property
+    def log_channel_id(self):
+        return self.get('log_channel_id')
+
+    @property
+    def announcement_channel_id(self):
+        return self.get('announcement_channel_id')
+
+    @property
+    def tenure_qualifying_role_id(self):
+        return self.get('tenure_qualifying_role_id')
+
+    @property
+    def accept_add_roles(self) -> tuple:
+        return self.get('accept_add_roles', ())
+
+    @property
+    def accept_remove_roles(self) -> tuple:
+        return self.get('accept_remove_roles', ())
+
+
+class SettingsStore:
+    """
+    In-memory copy of the `settings` table, keyed by server.
+    Loaded once at startup and updated write-through by ConfigCog, so reads never touch SQL.
+    Use `guild(guild_id)` for one server's typed settings.
+    A hit is a read of a key that is configured, a miss is a read of one that isn't.
+    """
+    # Keys whose values are stored as JSON lists of role IDs.
+    JSON_KEYS = {'accept_add_roles', 'accept_remove_roles'}
+    # Keys whose values are stored as a single ID.
+    INT_KEYS = {'log_channel_id', 'announcement_channel_id', 'tenure_qualifying_role_id'}
+
+    def __init__(self, db):
+        self.db = db
+        # guild_id -> {key: value}
+        self._values = {}
+        self._views = {}
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def _decode(cls, key: str, raw: str):
+        if key in cls.JSON_KEYS:
+            return tuple(json.loads(raw))
+        if key in cls.INT_KEYS:
+            return int(raw)
+        return raw
+
+    @classmethod
+    def _encode(cls, key: str, value) -> str:
+        if key in cls.JSON_KEYS:
+            return json.dumps(list(value))
+        return str(value)
+
+    async def load(self):
+        """(Re)loads every setting from the database."""
+        async with self.db.cursor() as cursor:
+            await cursor.execute("SELECT guild_id, key, value FROM settings")
+            rows = await cursor.fetchall()
+        values = {}
+        for guild_id, key, value in rows:
+            values.setdefault(guild_id, {})[key] = self._decode(key, value)
+        self._values = values
+        self.loaded = True
+
+    def guild(self, guild_id: int) -> GuildSettings:
+        view = self._views.get(guild_id)
+        if view is None:
+            view = self._views[guild_id] = GuildSettings(self, guild_id)
+        return view
+
+    def get(self, guild_id: int, key: str, default=None):
+        values = self._values.get(guild_id)
+        if values and key in values:
+            self.hits += 1
+            return values[key]
+        self.misses += 1
+        return default
+
+    async def set(self, guild_id: int, key: str, value):
+        """Writes a setting to the database and the cache."""
+        async with self.db.transaction() as cursor:
+            await cursor.execute("INSERT OR REPLACE INTO settings (guild_id, key, value) VALUES (?, ?, ?)",
+                                 (guild_id, key, self._encode(key, value)))
+        self._values.setdefault(guild_id, {})[key] = tuple(value) if key in self.JSON_KEYS else value
+
+    async def delete(self, guild_id: int, key: str):
+        """Removes a setting from the database and the cache."""
+        async with self.db.transaction() as cursor:
+            await cursor.execute("DELETE FROM settings WHERE guild_id = ? AND key = ?", (guild_id, key))
+        self._values.get(guild_id, {}).pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "guilds": len(self._values),
+            "keys": sum(len(values) for values in self._values.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
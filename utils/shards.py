@@ -0,0 +1,131 @@
+# utils/shards.py
+import asyncio
+import math
+import time
+from collections import deque
+
+
+def parse_shard_ids(value: str) -> list:
+    """Parses SHARD_IDS, e.g. "0-3" or "0,2,4-5"."""
+    shard_ids = []
+    for part in value.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            shard_ids.extend(range(int(first), int(last) + 1))
+        else:
+            shard_ids.append(int(part))
+    return sorted(set(shard_ids))
+
+
+def describe_shard_group(shard_ids, shard_count) -> str:
+    """A short name for the shards this process runs, e.g. "shards 0-3 of 8"."""
+    if not shard_count:
+        return "all shards"
+    if not shard_ids:
+        return f"all {shard_count} shards"
+    shard_ids = sorted(shard_ids)
+    if shard_ids == list(range(shard_ids[0], shard_ids[-1] + 1)) and len(shard_ids) > 1:
+        return f"shards {shard_ids[0]}-{shard_ids[-1]} of {shard_count}"
+    return f"shard{'s' if len(shard_ids) > 1 else ''} {', '.join(map(str, shard_ids))} of {shard_count}"
+
+
+class ShardMonitor:
+    """
+    Samples each of this process's shards every `interval` seconds: heartbeat latency and the
+    gateway event rate over the last `window` seconds. The rate comes from the shard's gateway
+    sequence number, which Discord increments for every dispatched event.
+    """
+
+    def __init__(self, bot, interval: float = 10.0, window: float = 60.0):
+        self.bot = bot
+        self.interval = interval
+        self.window = window
+        # shard_id -> last sequence number seen, and (monotonic time, events counted so far) samples
+        self._sequences = {}
+        self._events = {}
+        self._samples = {}
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def _sequence(self, shard_id: int):
+        # discord.py doesn't expose the sequence number on ShardInfo, only on the shard's websocket.
+        try:
+            return self.bot._get_websocket(shard_id=shard_id).sequence
+        except (KeyError, AttributeError):
+            return None
+
+    def sample(self):
+        now = time.monotonic()
+        for shard_id in self.bot.shards:
+            sequence = self._sequence(shard_id)
+            if sequence is None:
+                continue
+            last = self._sequences.get(shard_id)
+            if last is None:
+                delta = 0
+            elif sequence >= last:
+                delta = sequence - last
+            else:
+                # A new gateway session restarts the sequence from 1.
+                delta = sequence
+            self._sequences[shard_id] = sequence
+            self._events[shard_id] = self._events.get(shard_id, 0) + delta
+            samples = self._samples.setdefault(shard_id, deque())
+            samples.append((now, self._events[shard_id]))
+            while len(samples) > 2 and now - samples[0][0] > self.window:
+                samples.popleft()
+
+    def events_per_second(self, shard_id: int) -> float:
+        samples = self._samples.get(shard_id)
+        if not samples or len(samples) < 2:
+            return 0.0
+        (start, first), (end, last) = samples[0], samples[-1]
+        return (last - first) / (end - start) if end > start else 0.0
+
+    def shards(self) -> list:
+        """One dict per shard of this process: id, latency (seconds, NaN until the first heartbeat), event rate, servers."""
+        guild_counts = {}
+        for guild in self.bot.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+        return [
+            {
+                "shard_id": shard_id,
+                "latency": shard.latency,
+                "events_per_second": self.events_per_second(shard_id),
+                "events": self._events.get(shard_id, 0),
+                "guilds": guild_counts.get(shard_id, 0),
+                "closed": shard.is_closed(),
+            }
+            for shard_id, shard in sorted(self.bot.shards.items())
+        ]
+
+    def stats(self) -> dict:
+        values = {"shards": len(self.bot.shards)}
+        for shard in self.shards():
+            prefix = f"shard_{shard['shard_id']}"
+            if math.isfinite(shard["latency"]):
+                values[f"{prefix}_latency_ms"] = shard["latency"] * 1000
+            values[f"{prefix}_events_per_second"] = shard["events_per_second"]
+            values[f"{prefix}_events"] = shard["events"]
+            values[f"{prefix}_guilds"] = shard["guilds"]
+        return values
@@ -0,0 +1,149 @@
+# utils/slow_queries.py
+import asyncio
+import re
+from collections import deque
+from datetime import datetime, timezone
+
+# Only these statements have a query plan worth capturing.
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+# A plan step that reads every row of one of these tables is flagged (partitions count as activity_log).
+WATCHED_TABLES = ("activity_log", "members")
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+_SUBQUERY = re.compile(r"^(?:CO-ROUTINE|MATERIALIZE) (\w+)")
+_PLACEHOLDER = re.compile(r"\?|[:@$]\w+")
+
+
+def parameters_shape(parameters) -> str:
+    """The types (and string lengths) of a statement's parameters, without their values."""
+    if parameters is None:
+        return "executemany"
+
+    def describe(value):
+        if isinstance(value, (str, bytes)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return type(value).__name__
+
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {describe(value)}" for name, value in parameters.items()) + "}"
+    return "(" + ", ".join(describe(value) for value in parameters) + ")"
+
+
+def full_scans(plan: list) -> list:
+    """Watched tables the plan reads in full (a SCAN that doesn't use an index)."""
+    # Scanning a view's already-computed rows isn't a table scan; its underlying tables are listed separately.
+    subqueries = {match.group(1) for match in (_SUBQUERY.match(detail) for _, _, _, detail in plan) if match}
+    tables = []
+    for _, _, _, detail in plan:
+        match = _SCAN.match(detail)
+        if not match or "INDEX" in detail:
+            continue
+        table = match.group(1)
+        if table not in subqueries and any(table == watched or table.startswith(f"{watched}_") for watched in WATCHED_TABLES):
+            tables.append(table)
+    return tables
+
+
+def format_plan(plan: list) -> list:
+    """EXPLAIN QUERY PLAN rows as indented lines, the way the sqlite3 shell prints them."""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in plan:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+class SlowQueryLog:
+    """
+    Database hook that keeps the most recent statements slower than `threshold_ms` in a ring
+    buffer, with their parameter shape, duration and EXPLAIN QUERY PLAN output.
+    The hook itself only queues; plans are captured by a background worker on a read connection.
+    """
+    # Plans are cached per statement text so a repeatedly slow statement is explained once.
+    PLAN_CACHE_SIZE = 128
+
+    def __init__(self, db, threshold_ms: float = 100.0, capacity: int = 50):
+        self.db = db
+        self.threshold_ms = threshold_ms
+        self.entries = deque(maxlen=capacity)
+        # Entries are numbered from 1 in the order they were recorded.
+        self.recorded = 0
+        self._plans = {}
+        self._queue = asyncio.Queue(maxsize=capacity)
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self.db.add_hook(self.observe)
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        self.db.remove_hook(self.observe)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def clear(self):
+        self.entries.clear()
+        self._plans.clear()
+
+    def observe(self, sql: str, parameters, elapsed_ms: float, role: str):
+        """Database hook (see utils/database.py)."""
+        if elapsed_ms < self.threshold_ms:
+            return
+        self.recorded += 1
+        entry = {
+            "number": self.recorded,
+            "at": datetime.now(timezone.utc),
+            "sql": " ".join(sql.split()),
+            "role": role,
+            "elapsed_ms": elapsed_ms,
+            "shape": parameters_shape(parameters),
+            "plan": None,
+            "full_scans": [],
+            "error": None,
+        }
+        self.entries.append(entry)
+        if entry["sql"].split(" ", 1)[0].upper() in EXPLAINABLE:
+            try:
+                self._queue.put_nowait((entry, sql, parameters))
+            except asyncio.QueueFull:
+                entry["error"] = "plan skipped (too many slow queries at once)"
+        print(f"Slow query ({role}, {elapsed_ms:.0f}ms, params {entry['shape']}): {entry['sql'][:200]}")
+
+    async def _run(self):
+        while True:
+            entry, sql, parameters = await self._queue.get()
+            try:
+                plan = self._plans.get(sql)
+                if plan is None:
+                    plan = await self.db.explain(sql, self._plan_parameters(sql, parameters))
+                    if len(self._plans) >= self.PLAN_CACHE_SIZE:
+                        self._plans.clear()
+                    self._plans[sql] = plan
+                entry["plan"] = format_plan(plan)
+                entry["full_scans"] = full_scans(plan)
+                if entry["full_scans"]:
+                    print(f"Slow query: full scan of {', '.join(entry['full_scans'])} in: {entry['sql'][:200]}")
+            except Exception as e:
+                entry["error"] = f"EXPLAIN failed: {e}"
+
+    @staticmethod
+    def _plan_parameters(sql: str, parameters):
+        # executemany doesn't report its rows; the plan doesn't depend on the values, so bind NULLs.
+        if parameters is not None:
+            return parameters
+        names = _PLACEHOLDER.findall(sql)
+        if any(name != "?" for name in names):
+            return {name[1:]: None for name in names}
+        return (None,) * len(names)
+
+    def get(self, number: int):
+        return next((entry for entry in self.entries if entry["number"] == number), None)
+
+    def stats(self) -> dict:
+        return {"recorded": self.recorded, "kept": len(self.entries), "threshold_ms": self.threshold_ms}